@@ -0,0 +1,13 @@
+#!/bin/bash
+
+set -e
+
+POLL_INTERVAL=${IMPORT_WORKER_POLL_INTERVAL:-5}
+WORKERS=${IMPORT_WORKER_PROCESSES:-1}
+
+export OTEL_SERVICE_NAME="${OTEL_SERVICE_NAME:-openafval-import-worker}"
+
+echo "Starting import worker"
+exec python src/manage.py run_import_jobs \
+    --poll-interval $POLL_INTERVAL \
+    --workers $WORKERS
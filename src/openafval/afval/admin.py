@@ -1,4 +1,3 @@
-import io
 import logging
 import uuid
 
@@ -7,16 +6,22 @@ from django.contrib import admin, messages
 from django.contrib.postgres.aggregates import ArrayAgg
 from django.core.exceptions import PermissionDenied
 from django.db.models import Q
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import path
 from django.utils.html import format_html, format_html_join
 from django.utils.translation import gettext_lazy as _
 
-from .models import Container, ContainerLocation, Klant, Lediging
+from .models import (
+    Container,
+    ContainerLocation,
+    ImportJob,
+    ImportRun,
+    Klant,
+    Lediging,
+    LedigingTotaal,
+)
 from .profiel_display import format_afval_profiel
-from .services.exceptions import CSVImportError
-from .services.import_services import import_from_csv_stream
 
 logger = logging.getLogger(__name__)
 
@@ -179,25 +184,21 @@ class LedigingAdmin(ReadOnlyMixin, admin.ModelAdmin):
             if form.is_valid():
                 csv_file = form.cleaned_data["csv_file"]
 
-                try:
-                    csv_content = csv_file.read().decode("utf-8")
-                    csv_stream = io.StringIO(csv_content)
-
-                    import_from_csv_stream(csv_stream)
-
-                    self.message_user(
-                        request,
-                        "CSV import succesvol voltooid!",
-                        messages.SUCCESS,
-                    )
-                    return redirect("admin:afval_lediging_changelist")
-                except CSVImportError as exc:
-                    logger.exception("CSV import failed")
-                    self.message_user(
-                        request,
-                        f"Fout bij importeren: {exc.message}",
-                        messages.ERROR,
-                    )
+                # The import itself runs in the background (see the run_import_jobs
+                # command), this request only stores the upload
+                job = ImportJob.objects.create(
+                    bestand=csv_file,
+                    bestandsnaam=csv_file.name,
+                    bestandsgrootte=csv_file.size,
+                    aangemaakt_door=request.user,
+                )
+                logger.info("Scheduled import job %s for %s", job.pk, csv_file.name)
+                self.message_user(
+                    request,
+                    "CSV import ingepland. De voortgang is op deze pagina te volgen.",
+                    messages.SUCCESS,
+                )
+                return redirect("admin:afval_importjob_change", job.pk)
         else:
             form = CSVImportForm()
 
@@ -209,3 +210,100 @@ class LedigingAdmin(ReadOnlyMixin, admin.ModelAdmin):
             "has_permission": True,
         }
         return render(request, "admin/afval/import_csv.html", context)
+
+
+@admin.register(LedigingTotaal)
+class LedigingTotaalAdmin(ReadOnlyMixin, admin.ModelAdmin):
+    list_display = (
+        "klant",
+        "maand",
+        "afval_type",
+        "container",
+        "container_location",
+        "aantal_ledigingen",
+        "totaal_gewicht",
+        "totaal_kosten",
+    )
+    list_filter = ("afval_type",)
+    list_select_related = ("klant",)
+    search_fields = ("klant__bsn",)
+    date_hierarchy = "maand"
+    ordering = ("klant", "-maand")
+
+
+@admin.register(ImportRun)
+class ImportRunAdmin(ReadOnlyMixin, admin.ModelAdmin):
+    list_display = (
+        "aangemaakt_op",
+        "bron",
+        "modus",
+        "aantal_ledigingen",
+        "bestandsgrootte",
+        "bestand_gewijzigd_op",
+    )
+    list_filter = ("modus",)
+    ordering = ("-aangemaakt_op",)
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(ReadOnlyMixin, admin.ModelAdmin):
+    list_display = (
+        "aangemaakt_op",
+        "bestandsnaam",
+        "status",
+        "rijen_gelezen",
+        "rijen_geimporteerd",
+        "voltooid_op",
+    )
+    list_filter = ("status",)
+    ordering = ("-aangemaakt_op",)
+    # The uploaded file itself is not shown: it contains BSNs
+    fields = (
+        "bestandsnaam",
+        "bestandsgrootte",
+        "status",
+        "aangemaakt_door",
+        "aangemaakt_op",
+        "gestart_op",
+        "voltooid_op",
+        "bytes_gelezen",
+        "rijen_gelezen",
+        "rijen_geimporteerd",
+        "foutmelding",
+        "import_run",
+    )
+    change_form_template = "admin/afval/importjob/change_form.html"
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                "<uuid:object_id>/voortgang/",
+                self.admin_site.admin_view(self.progress_view),
+                name="afval_importjob_progress",
+            ),
+        ]
+        return custom_urls + urls
+
+    def progress_view(self, request: HttpRequest, object_id: uuid.UUID) -> JsonResponse:
+        """The progress of the job, polled by its change page while it runs."""
+        job = get_object_or_404(ImportJob, pk=object_id)
+        if not self.has_view_permission(request, job):
+            raise PermissionDenied
+
+        resterende_tijd = job.resterende_tijd
+        return JsonResponse(
+            {
+                "status": job.status,
+                "status_label": job.get_status_display(),
+                "bestandsgrootte": job.bestandsgrootte,
+                "bytes_gelezen": job.bytes_gelezen,
+                "rijen_gelezen": job.rijen_gelezen,
+                "rijen_geimporteerd": job.rijen_geimporteerd,
+                "voortgang": round(job.voortgang, 4),
+                "resterende_seconden": (
+                    round(resterende_tijd.total_seconds()) if resterende_tijd is not None else None
+                ),
+                "foutmelding": job.foutmelding,
+            }
+        )
@@ -0,0 +1,88 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from django.db.models import Q, QuerySet
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.utils.urls import replace_query_param
+
+from openafval.afval.models import Lediging
+
+
+class LedigingCursorPagination(BasePagination):
+    """Page through ledigingen, the most recently emptied first.
+
+    The cursor is the position (``geleegd_op``, ``id``) of the last lediging of the
+    previous page, so a page is a range scan of the profiel index, however far into
+    the ledigingen it is. Unlike with offsets, ledigingen imported in the meantime
+    don't shift the pages.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 100
+    max_page_size = 1000
+    ordering = ("-geleegd_op", "-id")
+
+    def paginate_queryset(
+        self, queryset: QuerySet[Lediging], request, view=None, first_page: bool = False
+    ) -> list:
+        """Return the page at the cursor of the request, or the first page."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        if not first_page and (position := self.decode_cursor(request)):
+            geleegd_op, pk = position
+            queryset = queryset.filter(
+                Q(geleegd_op__lt=geleegd_op) | Q(geleegd_op=geleegd_op, id__lt=pk)
+            )
+
+        # One more than a page, to know whether there is a next page
+        results = list(queryset.order_by(*self.ordering)[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        page = results[: self.page_size]
+        self.next_position = (page[-1].geleegd_op, page[-1].id) if self.has_next else None
+        return page
+
+    def get_page_size(self, request) -> int:
+        """Return the page size of the request (at most the maximum), or the default."""
+        if self.page_size_query_param not in request.query_params:
+            return self.page_size
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except ValueError:
+            raise ValidationError(
+                {self.page_size_query_param: _("Enter a positive whole number.")}
+            ) from None
+
+    def decode_cursor(self, request) -> tuple[datetime, uuid.UUID] | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            geleegd_op, pk = base64.urlsafe_b64decode(encoded.encode()).decode().split("|")
+            return datetime.fromisoformat(geleegd_op), uuid.UUID(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(_("Invalid cursor")) from None
+
+    def encode_cursor(self, position: tuple[datetime, uuid.UUID]) -> str:
+        geleegd_op, pk = position
+        return base64.urlsafe_b64encode(f"{geleegd_op.isoformat()}|{pk}".encode()).decode()
+
+    def get_next_link(self, url: str | None = None) -> str | None:
+        """Return the link to the next page, at ``url`` or else the current URL."""
+        if self.next_position is None:
+            return None
+        url = url or self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
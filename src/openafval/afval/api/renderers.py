@@ -0,0 +1,183 @@
+"""Rendering afval profielen straight to JSON.
+
+The serializers and ``CamelCaseJSONRenderer`` walk every lediging field by field,
+which dominates the response time of large profielen. :func:`render_afval_profiel`
+turns the profiel dataclasses into the same camelCase JSON, byte for byte, with
+the keys written out and orjson doing the encoding.
+"""
+
+import dataclasses
+import decimal
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from decimal import Decimal
+
+from django.utils import timezone
+
+import orjson
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+
+from openafval.afval.profiel import AfvalProfiel, LedigingProfiel
+
+from .serializers import (
+    AfvalProfielSerializer,
+    LedigingSerializer,
+    PaginatedAfvalProfielSerializer,
+)
+
+_NOT_PAGINATED = object()
+
+# As the DecimalFields of the serializers quantize
+_CENT = Decimal("0.01")
+_DECIMAL_CONTEXT = decimal.Context(prec=10)
+
+
+class _Incompatible(Exception):
+    """A value orjson would encode differently than the serializers."""
+
+
+class AfvalProfielJSONRenderer(CamelCaseJSONRenderer):
+    """The API's JSON renderer, which passes content rendered already as is.
+
+    The afval profiel endpoint renders its response with :func:`render_afval_profiel`
+    (or takes it from the cache) when this is the negotiated renderer; other
+    renderers, such as the browsable API, are given the content parsed again.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if isinstance(data, bytes):
+            return data
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+def render_afval_profiel(profiel: AfvalProfiel, *, ledigingen_next=_NOT_PAGINATED) -> bytes:
+    """Render the profiel as the serializers and the API renderer would.
+
+    With ``ledigingen_next``, it is rendered as a page of the ledigingen, as
+    :class:`PaginatedAfvalProfielSerializer` would.
+    """
+    try:
+        data = _afval_profiel(profiel)
+    except _Incompatible:
+        # Only very large or small numbers, which the serializers render in exponent
+        # notation the way Python does rather than orjson
+        return _render_with_serializer(profiel, ledigingen_next)
+    if ledigingen_next is not _NOT_PAGINATED:
+        data["ledigingenNext"] = ledigingen_next
+    return _dumps(data)
+
+
+def stream_afval_profiel(
+    profiel: AfvalProfiel, ledigingen: Iterable[list[LedigingProfiel]]
+) -> Iterator[bytes]:
+    """Render the profiel as :func:`render_afval_profiel`, a chunk of ledigingen at a time.
+
+    The ledigingen of ``profiel`` itself are left out, they are rendered from the
+    ``ledigingen`` chunks as they come in instead.
+    """
+    content = render_afval_profiel(dataclasses.replace(profiel, ledigingen=[]))
+    # The ledigingen come last
+    assert content.endswith(b"[]}")
+    yield content[:-2]
+
+    tz = timezone.get_current_timezone()
+    separator = b""
+    for chunk in ledigingen:
+        if not chunk:
+            continue
+        try:
+            content = _dumps(_ledigingen(chunk, tz))
+        except _Incompatible:
+            content = CamelCaseJSONRenderer().render(LedigingSerializer(chunk, many=True).data)
+        # Without the brackets of the list
+        yield separator + content[1:-1]
+        separator = b","
+    yield b"]}"
+
+
+def _dumps(data) -> bytes:
+    content = orjson.dumps(data)
+    # Like the JSONRenderer of DRF, for use in JavaScript
+    return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+def _render_with_serializer(profiel: AfvalProfiel, ledigingen_next) -> bytes:
+    if ledigingen_next is _NOT_PAGINATED:
+        serializer = AfvalProfielSerializer(profiel)
+    else:
+        serializer = PaginatedAfvalProfielSerializer(
+            {**dataclasses.asdict(profiel), "ledigingen_next": ledigingen_next}
+        )
+    return CamelCaseJSONRenderer().render(serializer.data)
+
+
+def _afval_profiel(profiel: AfvalProfiel) -> dict:
+    # In the order of the fields of the serializers
+    tz = timezone.get_current_timezone()
+    klant = profiel.klant
+    return {
+        "klant": {
+            "id": klant.id,
+            "bsn": str(klant.bsn),
+            "naam": str(klant.naam),
+            "totaalKosten": _decimal(klant.totaal_kosten),
+        },
+        "containers": [
+            {
+                "id": container.id,
+                "publicContainerId": str(container.public_container_id),
+                "afvalType": str(container.afval_type),
+                "isVerzamelcontainer": bool(container.is_verzamelcontainer),
+                "heeftSleutel": bool(container.heeft_sleutel),
+                "totaalGewicht": _float(container.totaal_gewicht),
+                "totaalKosten": _decimal(container.totaal_kosten),
+            }
+            for container in profiel.containers
+        ],
+        "containerLocaties": [
+            {
+                "id": locatie.id,
+                "adres": str(locatie.adres),
+                "totaalGewicht": _float(locatie.totaal_gewicht),
+                "totaalKosten": _decimal(locatie.totaal_kosten),
+            }
+            for locatie in profiel.container_locaties
+        ],
+        "ledigingen": _ledigingen(profiel.ledigingen, tz),
+    }
+
+
+def _ledigingen(ledigingen: Iterable[LedigingProfiel], tz) -> list[dict]:
+    return [
+        {
+            "id": lediging.id,
+            "containerLocation": lediging.container_location,
+            "klant": lediging.klant,
+            "container": lediging.container,
+            "gewicht": _float(lediging.gewicht),
+            "geleegdOp": _datetime(lediging.geleegd_op, tz),
+            "kosten": _decimal(lediging.kosten),
+        }
+        for lediging in ledigingen
+    ]
+
+
+def _float(value) -> float:
+    value = float(value)
+    # Python and orjson only agree on the notation of the numbers in between
+    if value and not 1e-4 <= abs(value) < 1e16:
+        raise _Incompatible(value)
+    return value
+
+
+def _decimal(value) -> float:
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value).strip())
+    return _float(value.quantize(_CENT, context=_DECIMAL_CONTEXT))
+
+
+def _datetime(value: datetime, tz) -> str:
+    value = value.astimezone(tz).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
@@ -1,5 +1,9 @@
 from rest_framework import serializers
 
+from openafval.afval.constants import AfvalTypeChoices
+
+MAX_BULK_BSNS = 10_000
+
 
 class ContainerSerializer(serializers.Serializer):
     id = serializers.UUIDField()
@@ -40,3 +44,40 @@ class AfvalProfielSerializer(serializers.Serializer):
     containers = ContainerSerializer(many=True)
     container_locaties = ContainerLocationSerializer(many=True)
     ledigingen = LedigingSerializer(many=True)
+
+
+class PaginatedAfvalProfielSerializer(AfvalProfielSerializer):
+    ledigingen = LedigingSerializer(many=True, help_text="The first page of ledigingen.")
+    ledigingen_next = serializers.URLField(
+        allow_null=True, help_text="The next page of ledigingen, if any."
+    )
+
+
+class LedigingPageSerializer(serializers.Serializer):
+    next = serializers.URLField(allow_null=True)
+    results = LedigingSerializer(many=True)
+
+
+class AfvalProfielenRequestSerializer(serializers.Serializer):
+    bsns = serializers.ListField(
+        child=serializers.RegexField(r"^[0-9]{8,9}$"),
+        allow_empty=False,
+        max_length=MAX_BULK_BSNS,
+        help_text="The BSNs of the klanten to return the afval profiel of.",
+    )
+    startdatum = serializers.DateField(
+        required=False, help_text="Filter ledigingen from this date (YYYY-MM-DD)."
+    )
+    einddatum = serializers.DateField(
+        required=False, help_text="Filter ledigingen until this date (YYYY-MM-DD)."
+    )
+    afval_type = serializers.ChoiceField(
+        choices=AfvalTypeChoices.choices,
+        required=False,
+        help_text="Filter containers by waste type.",
+    )
+    adressen = serializers.ListField(
+        child=serializers.CharField(),
+        required=False,
+        help_text="Filter container locations by address.",
+    )
@@ -1,25 +1,187 @@
 from __future__ import annotations
 
+import dataclasses
 import logging
+from collections.abc import Iterator
+from datetime import datetime
+from itertools import islice
 
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.dateparse import parse_date
+from django.utils.http import http_date
 from django.utils.translation import gettext_lazy as _
 
-from drf_spectacular.utils import OpenApiParameter, extend_schema
+import orjson
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from drf_spectacular.utils import OpenApiParameter, PolymorphicProxySerializer, extend_schema
 from rest_framework import views
 from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.fields import BooleanField
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from openafval.afval.cache import (
+    afval_profiel_cache_key,
+    afval_profiel_etag,
+    cache_afval_profiel,
+    get_cached_afval_profiel,
+    get_import_generation,
+    import_generation_started,
+)
 from openafval.afval.constants import AfvalTypeChoices
-from openafval.afval.models import Klant
+from openafval.afval.models import Klant, Lediging
+from openafval.afval.profiel import AfvalProfiel, AfvalProfielBuilder, LedigingProfiel
 
-from .serializers import AfvalProfielSerializer
+from .pagination import LedigingCursorPagination
+from .renderers import AfvalProfielJSONRenderer, render_afval_profiel, stream_afval_profiel
+from .serializers import (
+    AfvalProfielenRequestSerializer,
+    AfvalProfielSerializer,
+    LedigingPageSerializer,
+    PaginatedAfvalProfielSerializer,
+)
 
 logger = logging.getLogger(__name__)
 
+STREAM_CHUNK_SIZE = 2000  # Ledigingen fetched and rendered at a time when streaming
+BULK_BATCH_SIZE = 500  # Klanten of which the profielen are built from a single query
+
+FILTER_PARAMETERS = [
+    OpenApiParameter(
+        name="afval-type",
+        enum=AfvalTypeChoices.values,
+        description="Filter containers by waste type",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="adres",
+        type=str,
+        description="Filter container locations by address (repeatable for multiple)",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="startdatum",
+        type=str,
+        description="Filter ledigingen from this date (YYYY-MM-DD)",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="einddatum",
+        type=str,
+        description="Filter ledigingen until this date (YYYY-MM-DD)",
+        required=False,
+    ),
+]
+
+
+def validate_filters(request) -> dict:
+    """Validate the filters of the afval profiel, shared by its endpoints."""
+    params = request.GET
+
+    startdatum = params.get("startdatum")
+    einddatum = params.get("einddatum")
+    afval_type = params.get("afval-type")
+
+    errors = {}
+    if startdatum and parse_date(startdatum) is None:
+        errors["startdatum"] = _("Enter a valid date in YYYY-MM-DD format.")
+    if einddatum and parse_date(einddatum) is None:
+        errors["einddatum"] = _("Enter a valid date in YYYY-MM-DD format.")
+    if afval_type and afval_type not in AfvalTypeChoices.values:
+        errors["afval-type"] = _(
+            "Select a valid choice. %(value)s is not one of the available choices."
+        ) % {"value": afval_type}
+    if errors:
+        raise ValidationError(errors)
+
+    return {
+        "startdatum": startdatum,
+        "einddatum": einddatum,
+        "afval_type": afval_type,
+        "adressen": params.getlist("adres"),
+    }
+
+
+def _lediging_profielen(ledigingen: list) -> list[LedigingProfiel]:
+    return [
+        LedigingProfiel(
+            id=lediging.id,
+            container_location=lediging.container_location_id,
+            klant=lediging.klant_id,
+            container=lediging.container_id,
+            gewicht=lediging.gewicht,
+            geleegd_op=lediging.geleegd_op,
+            kosten=lediging.kosten,
+        )
+        for lediging in ledigingen
+    ]
+
+
+def _stream_lediging_profielen(ledigingen: QuerySet[Lediging]) -> Iterator[list[LedigingProfiel]]:
+    """Fetch the ledigingen in chunks, in the order of the profiel, with a server-side cursor."""
+    rows = (
+        ledigingen.order_by("-geleegd_op")
+        .values_list(
+            "id",
+            "container_location_id",
+            "klant_id",
+            "container_id",
+            "gewicht",
+            "geleegd_op",
+            "kosten",
+            named=True,
+        )
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+    while chunk := list(islice(rows, STREAM_CHUNK_SIZE)):
+        yield _lediging_profielen(chunk)
+
+
+def _stream_afval_profiel(klant: Klant, filters: dict) -> Iterator[bytes]:
+    """Render the afval profiel of the klant, streaming the ledigingen from the database.
+
+    The totals and the ledigingen are read in a single ``REPEATABLE READ``
+    transaction, so they agree even when an import commits while the response is
+    being streamed.
+    """
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        profiel = klant.afval_profiel(
+            startdatum=filters["startdatum"],
+            einddatum=filters["einddatum"],
+            afval_type=filters["afval_type"],
+            container_locaties=filters["adressen"] or None,
+            met_ledigingen=False,
+        )
+        yield from stream_afval_profiel(
+            profiel, _stream_lediging_profielen(_profiel_ledigingen(klant, filters))
+        )
+
+
+def _profiel_ledigingen(klant: Klant, filters: dict) -> QuerySet[Lediging]:
+    return Lediging.objects.for_profiel(
+        klant,
+        startdatum=parse_date(filters["startdatum"]) if filters["startdatum"] else None,
+        einddatum=parse_date(filters["einddatum"]) if filters["einddatum"] else None,
+        afval_type=filters["afval_type"],
+        adressen=filters["adressen"],
+    )
+
 
 class AfvalProfielAPIView(views.APIView):
+    renderer_classes = [
+        AfvalProfielJSONRenderer if renderer is CamelCaseJSONRenderer else renderer
+        for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+    ]
+
     @extend_schema(
         summary=_("Retrieve afval profiel for a klant by BSN"),
         tags=["Afval profiel"],
@@ -29,69 +191,225 @@ class AfvalProfielAPIView(views.APIView):
             "all containers, all container locations, and ledigingen."
         ),
         parameters=[
+            *FILTER_PARAMETERS,
             OpenApiParameter(
-                name="afval-type",
-                enum=AfvalTypeChoices.values,
-                description="Filter containers by waste type",
+                name="page_size",
+                type=int,
+                description=(
+                    "Return the first page of this many ledigingen, and a link to the "
+                    "next page, instead of all ledigingen"
+                ),
                 required=False,
             ),
             OpenApiParameter(
-                name="adres",
-                type=str,
-                description="Filter container locations by address (repeatable for multiple)",
+                name="stream",
+                type=bool,
+                description=(
+                    "Stream the ledigingen from the database as they are rendered, rather "
+                    "than building the whole profiel first, for very long histories. "
+                    "Cannot be combined with pageSize"
+                ),
                 required=False,
             ),
+        ],
+        responses={
+            200: PolymorphicProxySerializer(
+                component_name="AfvalProfielResponse",
+                serializers=[AfvalProfielSerializer, PaginatedAfvalProfielSerializer],
+                resource_type_field_name=None,
+            ),
+            304: None,
+            404: None,
+        },
+    )
+    def get(self, request, bsn: str, *args, **kwargs):
+        try:
+            filters, page_size, stream = self._validate(request)
+        except ValidationError:
+            # An unknown klant is not found, whatever the parameters
+            get_object_or_404(Klant, bsn=bsn)
+            raise
+        # Other formats, such as the browsable API, render the whole profiel
+        stream = stream and isinstance(request.accepted_renderer, AfvalProfielJSONRenderer)
+
+        generation = get_import_generation()
+        cache_key = afval_profiel_cache_key(
+            bsn,
+            generation=generation,
+            page_size=page_size,
+            # The first page links to the next by absolute URL
+            origin=request.build_absolute_uri("/") if page_size is not None else None,
+            **filters,
+        )
+
+        # The profiel only changes with an import, so the client's copy can be
+        # validated without looking at the ledigingen. Only whether the klant exists
+        # matters, which a cached profiel already proves.
+        etag = afval_profiel_etag(cache_key)
+        last_modified = import_generation_started(generation)
+        content = get_cached_afval_profiel(cache_key)
+        klant = get_object_or_404(Klant, bsn=bsn) if content is None else None
+        if conditional_response := get_conditional_response(
+            request, etag=etag, last_modified=int(last_modified.timestamp())
+        ):
+            return self._with_validators(conditional_response, etag, last_modified)
+
+        if klant is not None:
+            if stream:
+                # The same content, but not cached: that would take the whole of it
+                response = StreamingHttpResponse(
+                    _stream_afval_profiel(klant, filters),
+                    content_type=CamelCaseJSONRenderer.media_type,
+                )
+                return self._with_validators(response, etag, last_modified)
+
+            profiel = klant.afval_profiel(
+                startdatum=filters["startdatum"],
+                einddatum=filters["einddatum"],
+                afval_type=filters["afval_type"],
+                container_locaties=filters["adressen"] or None,
+                met_ledigingen=page_size is None,
+            )
+            try:
+                if page_size is None:
+                    content = render_afval_profiel(profiel)
+                else:
+                    content = self._render_paginated(request, bsn, klant, filters, profiel)
+            except (KeyError, AttributeError, TypeError) as exc:
+                logger.exception("Serialization for afval profiel failed")
+                raise APIException(
+                    "Internal error building afval profiel. Please contact support."
+                ) from exc
+
+            cache_afval_profiel(cache_key, content)
+
+        # Rendered already, as AfvalProfielJSONRenderer passes it on
+        if not isinstance(request.accepted_renderer, AfvalProfielJSONRenderer):
+            content = orjson.loads(content)
+        return self._with_validators(Response(content), etag, last_modified)
+
+    def _validate(self, request) -> tuple[dict, int | None, bool]:
+        filters = validate_filters(request)
+
+        page_size = None
+        paginator = LedigingCursorPagination()
+        if paginator.page_size_query_param in request.GET:
+            page_size = paginator.get_page_size(request)
+
+        stream = request.GET.get("stream", "false")
+        if stream not in BooleanField.TRUE_VALUES | BooleanField.FALSE_VALUES:
+            raise ValidationError({"stream": _("Must be a valid boolean.")})
+        stream = stream in BooleanField.TRUE_VALUES
+        if stream and page_size is not None:
+            raise ValidationError({"stream": _("Cannot be combined with pageSize.")})
+        return filters, page_size, stream
+
+    def _render_paginated(
+        self, request, bsn: str, klant: Klant, filters: dict, profiel: AfvalProfiel
+    ) -> bytes:
+        # The first page, linking to the next page of the ledigingen endpoint
+        paginator = LedigingCursorPagination()
+        page = paginator.paginate_queryset(
+            _profiel_ledigingen(klant, filters), request, self, first_page=True
+        )
+        url = request.build_absolute_uri(
+            reverse("api:afval-profiel-ledigingen", kwargs={"bsn": bsn})
+        )
+        if query := request.GET.urlencode():
+            url = f"{url}?{query}"
+        return render_afval_profiel(
+            dataclasses.replace(profiel, ledigingen=_lediging_profielen(page)),
+            ledigingen_next=paginator.get_next_link(url),
+        )
+
+    def _with_validators(self, response, etag: str, last_modified: datetime):
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+        # Private, as it contains personal data, and revalidated on every use
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class AfvalProfielLedigingenAPIView(views.APIView):
+    @extend_schema(
+        summary=_("List the ledigingen of the afval profiel of a klant by BSN"),
+        tags=["Afval profiel"],
+        description=_(
+            "Returns the ledigingen of the afval profiel of a specific klant, the most "
+            "recently emptied first, a page at a time. Follow the next link to get the "
+            "next page."
+        ),
+        parameters=[
+            *FILTER_PARAMETERS,
             OpenApiParameter(
-                name="startdatum",
+                name="cursor",
                 type=str,
-                description="Filter ledigingen from this date (YYYY-MM-DD)",
+                description="The pagination cursor value",
                 required=False,
             ),
             OpenApiParameter(
-                name="einddatum",
-                type=str,
-                description="Filter ledigingen until this date (YYYY-MM-DD)",
+                name="page_size",
+                type=int,
+                description="Number of ledigingen to return per page",
                 required=False,
             ),
         ],
         responses={
-            200: AfvalProfielSerializer,
+            200: LedigingPageSerializer,
             404: None,
         },
     )
     def get(self, request, bsn: str, *args, **kwargs):
         klant = get_object_or_404(Klant, bsn=bsn)
-        params = request.GET
-
-        startdatum = params.get("startdatum")
-        einddatum = params.get("einddatum")
-        afval_type = params.get("afval-type")
-
-        errors = {}
-        if startdatum and parse_date(startdatum) is None:
-            errors["startdatum"] = _("Enter a valid date in YYYY-MM-DD format.")
-        if einddatum and parse_date(einddatum) is None:
-            errors["einddatum"] = _("Enter a valid date in YYYY-MM-DD format.")
-        if afval_type and afval_type not in AfvalTypeChoices.values:
-            errors["afval-type"] = _(
-                "Select a valid choice. %(value)s is not one of the available choices."
-            ) % {"value": afval_type}
-        if errors:
-            raise ValidationError(errors)
+        filters = validate_filters(request)
 
-        profiel = klant.afval_profiel(
-            startdatum=startdatum,
-            einddatum=einddatum,
-            afval_type=afval_type,
-            container_locaties=params.getlist("adres") or None,
+        paginator = LedigingCursorPagination()
+        page = paginator.paginate_queryset(_profiel_ledigingen(klant, filters), request, self)
+        serializer = LedigingPageSerializer(
+            {"next": paginator.get_next_link(), "results": _lediging_profielen(page)}
         )
+        return Response(serializer.data)
 
-        try:
-            serializer = AfvalProfielSerializer(profiel)
-        except (KeyError, AttributeError, TypeError) as exc:
-            logger.exception("Serialization for afval profiel failed")
-            raise APIException(
-                "Internal error building afval profiel. Please contact support."
-            ) from exc
 
-        return Response(serializer.data)
+class AfvalProfielenAPIView(views.APIView):
+    @extend_schema(
+        summary=_("Retrieve the afval profielen of many klanten by BSN"),
+        tags=["Afval profiel"],
+        description=_(
+            "Returns the complete afval profielen of the klanten with the given BSNs, "
+            "as newline delimited JSON: one profiel per line, as the afval profiel "
+            "endpoint returns it. BSNs without a klant are left out, and the profielen "
+            "are not in the order of the BSNs."
+        ),
+        request=AfvalProfielenRequestSerializer,
+        responses={
+            (200, "application/x-ndjson"): AfvalProfielSerializer,
+            400: None,
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = AfvalProfielenRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        builder = AfvalProfielBuilder(
+            startdatum=data.get("startdatum"),
+            einddatum=data.get("einddatum"),
+            afval_type=data.get("afval_type"),
+            container_locaties=data.get("adressen") or None,
+        )
+        bsns = list(dict.fromkeys(data["bsns"]))
+        return StreamingHttpResponse(
+            self._stream(builder, bsns), content_type="application/x-ndjson"
+        )
+
+    def _stream(self, builder: AfvalProfielBuilder, bsns: list[str]) -> Iterator[bytes]:
+        # The profielen of a batch of klanten are built from one query, a klant at a time
+        for start in range(0, len(bsns), BULK_BATCH_SIZE):
+            klanten = list(Klant.objects.filter(bsn__in=bsns[start : start + BULK_BATCH_SIZE]))
+            for profiel in builder.build_all(
+                klanten,
+                builder.rows(klanten).iterator(chunk_size=STREAM_CHUNK_SIZE),
+                builder.dimensions(klanten),
+            ):
+                yield render_afval_profiel(profiel) + b"\n"
@@ -0,0 +1,95 @@
+"""Caching of afval profielen.
+
+The ledigingen only change when an import runs. Every cache key includes the
+current *import generation*, which an import replaces once it is committed: that
+invalidates all cached profielen at once, without deleting them one by one (they
+simply expire).
+"""
+
+import hashlib
+import json
+import time
+from datetime import UTC, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.dateparse import parse_date
+from django.utils.http import quote_etag
+
+GENERATION_CACHE_KEY = "afval:import-generation"
+
+
+def get_import_generation() -> int:
+    """Return the current import generation.
+
+    A generation is the time (in nanoseconds) it started. If the cache lost it, a
+    new generation starts: no cached profiel can be mistaken for a current one.
+    """
+    generation = cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        generation = time.time_ns()
+        if not cache.add(GENERATION_CACHE_KEY, generation, timeout=None):
+            # Another process started one first
+            generation = cache.get(GENERATION_CACHE_KEY, generation)
+    return generation
+
+
+def bump_import_generation() -> int:
+    """Start a new import generation, invalidating all cached profielen."""
+    generation = time.time_ns()
+    cache.set(GENERATION_CACHE_KEY, generation, timeout=None)
+    return generation
+
+
+def afval_profiel_cache_key(
+    bsn: str,
+    *,
+    generation: int | None = None,
+    startdatum: str | None = None,
+    einddatum: str | None = None,
+    afval_type: str | None = None,
+    adressen: list[str] | None = None,
+    page_size: int | None = None,
+    origin: str | None = None,
+) -> str:
+    """Return the cache key of a profiel in the (current) import generation.
+
+    The filters are normalized, so equivalent requests share an entry. The BSN is
+    hashed rather than stored in the key. A profiel that links to the API itself
+    is cached per ``origin`` (scheme and host) it was requested at.
+    """
+    if generation is None:
+        generation = get_import_generation()
+    filters = [
+        bsn,
+        parse_date(startdatum).isoformat() if startdatum else None,
+        parse_date(einddatum).isoformat() if einddatum else None,
+        afval_type or None,
+        sorted(set(adressen or [])),
+        page_size,
+        origin,
+    ]
+    digest = hashlib.sha256(json.dumps(filters).encode()).hexdigest()
+    return f"afval:profiel:{generation}:{digest}"
+
+
+def afval_profiel_etag(cache_key: str) -> str:
+    """Return the ETag of the profiel cached under ``cache_key``.
+
+    Like the key, it changes with the filters and with every import generation.
+    """
+    return quote_etag(hashlib.sha256(cache_key.encode()).hexdigest()[:32])
+
+
+def import_generation_started(generation: int) -> datetime:
+    """Return when ``generation`` started, the last time the profielen could change."""
+    return datetime.fromtimestamp(generation / 1_000_000_000, tz=UTC)
+
+
+def get_cached_afval_profiel(key: str) -> bytes | None:
+    """Return the cached profiel, as the rendered response content."""
+    return cache.get(key)
+
+
+def cache_afval_profiel(key: str, content: bytes) -> None:
+    cache.set(key, content, timeout=settings.AFVAL_PROFIEL_CACHE_TIMEOUT)
@@ -6,3 +6,10 @@ class AfvalTypeChoices(models.TextChoices):
     GFT = "gft", _("Groente, Fruit en Tuin afval (GFT)")
     RESTAFVAL = "restafval", _("Rest afval (Rest)")
     MED = "med", _("Medisch afval")
+
+
+class ImportJobStatusChoices(models.TextChoices):
+    PENDING = "pending", _("In wachtrij")
+    RUNNING = "running", _("Bezig")
+    SUCCEEDED = "succeeded", _("Voltooid")
+    FAILED = "failed", _("Mislukt")
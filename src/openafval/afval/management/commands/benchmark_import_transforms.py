@@ -0,0 +1,158 @@
+import tempfile
+import time
+from collections.abc import Callable
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+import numpy as np
+import pandas as pd
+
+from openafval.afval.services.transforms import (
+    REQUIRED_COLUMNS,
+    _map_fractie_id_to_afval_type,
+    prepare_chunk,
+    read_csv,
+    to_datetimes,
+    to_decimals,
+)
+
+FRACTIE_IDS = ["GFT", "Restafval", "REST", "Groen", "Medisch"]
+
+
+def _legacy_csv_boolean(value: str) -> bool:
+    if pd.isnull(value):
+        return False
+    return value == "J"
+
+
+def _legacy_transform(chunk_df: pd.DataFrame) -> list[tuple]:
+    """The row-by-row transforms the import used before they were vectorized."""
+    chunk_df = chunk_df.dropna(subset=REQUIRED_COLUMNS)
+    chunk_df["afval_type"] = chunk_df["FRACTIE_ID"].apply(_map_fractie_id_to_afval_type)
+    chunk_df["is_verzamelcontainer"] = chunk_df["VERZAMELCONTAINER_J_N"].apply(_legacy_csv_boolean)
+    chunk_df["heeft_sleutel"] = chunk_df["SLEUTELNUMMER"].notna() & (
+        chunk_df["SLEUTELNUMMER"] != ""
+    )
+    chunk_df["OBJECTADRES"] = chunk_df["OBJECTADRES"].fillna("")
+    chunk_df["SUBJECTNAAM"] = chunk_df["SUBJECTNAAM"].fillna("")
+    chunk_df["geleegd_op_utc"] = pd.to_datetime(chunk_df["LEDIGINGSMOMENT"]).dt.tz_localize("UTC")
+    chunk_df["TOTAALKOSTEN_LEDIGING"] = chunk_df["TOTAALKOSTEN_LEDIGING"].fillna(0)
+    chunk_df["LEDIGING_ID"] = chunk_df["LEDIGING_ID"].fillna("")
+    return [
+        (
+            row.LEDIGING_ID,
+            row.GEWICHT_VERDEELD,
+            row.geleegd_op_utc.to_pydatetime(),
+            Decimal(str(row.TOTAALKOSTEN_LEDIGING)),
+        )
+        for row in chunk_df[
+            ["LEDIGING_ID", "GEWICHT_VERDEELD", "geleegd_op_utc", "TOTAALKOSTEN_LEDIGING"]
+        ].itertuples(index=False)
+    ]
+
+
+def _vectorized_transform(chunk_df: pd.DataFrame) -> list[tuple]:
+    chunk_df = prepare_chunk(chunk_df, REQUIRED_COLUMNS)
+    return list(
+        zip(
+            chunk_df["LEDIGING_ID"].tolist(),
+            chunk_df["GEWICHT_VERDEELD"].tolist(),
+            to_datetimes(chunk_df["geleegd_op_utc"]),
+            to_decimals(chunk_df["TOTAALKOSTEN_LEDIGING"]),
+            strict=True,
+        )
+    )
+
+
+def write_synthetic_csv(path: str, rows: int, seed: int = 0) -> None:
+    """Write a CSV export with ``rows`` random ledigingen to ``path``."""
+    rng = np.random.default_rng(seed)
+
+    def ids(prefix: str, count: int, width: int) -> pd.Series:
+        return prefix + pd.Series(rng.integers(0, count, rows)).astype(str).str.zfill(width)
+
+    klanten = max(rows // 20, 1)
+    subject_ids = pd.Series(rng.integers(0, klanten, rows))
+    moments = pd.Timestamp("2024-01-01") + pd.to_timedelta(
+        rng.integers(0, 365 * 24 * 3600, rows), unit="s"
+    )
+    kosten = rng.uniform(0, 25, rows).round(2)
+    kosten[rng.random(rows) < 0.05] = np.nan
+
+    frame = pd.DataFrame(
+        {
+            "SUBJECT_ID": "SUBJ" + subject_ids.astype(str).str.zfill(7),
+            "BSN": (100_000_000 + subject_ids).astype(str),
+            "SUBJECTNAAM": "Klant " + subject_ids.astype(str),
+            "OBJECT_ID": ids("OBJ", klanten, 7),
+            "OBJECTADRES": "Straat " + pd.Series(rng.integers(1, 500, rows)).astype(str),
+            "CONTAINER_ID": ids("CONT", klanten * 2, 7),
+            "SLEUTELNUMMER": np.where(rng.random(rows) < 0.5, "", "KEY"),
+            "VERZAMELCONTAINER_J_N": np.where(rng.random(rows) < 0.2, "J", "N"),
+            "FRACTIE_ID": rng.choice(FRACTIE_IDS, rows),
+            "LEDIGING_ID": "LED" + pd.Series(np.arange(rows)).astype(str).str.zfill(9),
+            "GEWICHT_ONVERDEELD": rng.uniform(0, 100, rows).round(1),
+            "GEWICHT_VERDEELD": rng.uniform(0, 100, rows).round(1),
+            "LEDIGINGSMOMENT": moments.strftime("%Y-%m-%d %H:%M:%S"),
+            "TOTAALKOSTEN_LEDIGING": kosten,
+        }
+    )
+    frame.to_csv(path, sep=";", index=False)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the throughput (rows per second) of the import's column transforms, "
+        "row by row versus vectorized, on a synthetic CSV export."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1_000_000,
+            help="Number of rows in the synthetic CSV (default: 1,000,000)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=50_000,
+            help="Number of rows per chunk, as in the import (default: 50,000)",
+        )
+
+    def handle(self, **options):
+        rows: int = options["rows"]
+        chunk_size: int = options["chunk_size"]
+        if rows < 1 or chunk_size < 1:
+            raise CommandError("--rows and --chunk-size must be at least 1")
+
+        with tempfile.NamedTemporaryFile(suffix=".csv") as csv_file:
+            self.stdout.write(f"Generating synthetic CSV with {rows:,} rows...")
+            write_synthetic_csv(csv_file.name, rows)
+
+            results = {}
+            for name, transform in (
+                ("row by row", _legacy_transform),
+                ("vectorized", _vectorized_transform),
+            ):
+                seconds = self._measure(csv_file.name, chunk_size, transform)
+                results[name] = seconds
+                self.stdout.write(
+                    f"{name:>12}: {rows / seconds:12,.0f} rows/s ({seconds:.2f} seconds)"
+                )
+
+        speedup = results["row by row"] / results["vectorized"]
+        self.stdout.write(self.style.SUCCESS(f"Vectorized transforms are {speedup:.1f}x faster"))
+
+    def _measure(
+        self, path: str, chunk_size: int, transform: Callable[[pd.DataFrame], list[tuple]]
+    ) -> float:
+        # Only the transforms are timed, parsing the CSV is the same for both
+        seconds = 0.0
+        with open(path, encoding="utf-8") as stream:
+            for chunk_df in read_csv(stream, chunk_size=chunk_size):
+                start = time.perf_counter()
+                transform(chunk_df)
+                seconds += time.perf_counter() - start
+        return seconds
@@ -0,0 +1,140 @@
+import random
+import time
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+
+from openafval.afval.api.renderers import render_afval_profiel
+from openafval.afval.api.serializers import AfvalProfielSerializer
+from openafval.afval.constants import AfvalTypeChoices
+from openafval.afval.profiel import (
+    AfvalProfiel,
+    ContainerLocatieProfiel,
+    ContainerProfiel,
+    KlantProfiel,
+    LedigingProfiel,
+)
+
+
+def synthetic_afval_profiel(ledigingen: int, seed: int = 0) -> AfvalProfiel:
+    """Return a profiel with ``ledigingen`` random ledigingen, as built from the database."""
+    rng = random.Random(seed)
+    klant_id = uuid.UUID(int=rng.getrandbits(128))
+    containers = [
+        ContainerProfiel(
+            id=uuid.UUID(int=rng.getrandbits(128)),
+            public_container_id=f"CONT{index:07d}",
+            afval_type=rng.choice(AfvalTypeChoices.values),
+            is_verzamelcontainer=rng.random() < 0.2,
+            heeft_sleutel=rng.random() < 0.5,
+            totaal_gewicht=0.0,
+            totaal_kosten=Decimal("0"),
+        )
+        for index in range(5)
+    ]
+    locaties = [
+        ContainerLocatieProfiel(
+            id=uuid.UUID(int=rng.getrandbits(128)),
+            adres=f"Straat {index + 1}, Amsterdam",
+            totaal_gewicht=0.0,
+            totaal_kosten=Decimal("0"),
+        )
+        for index in range(3)
+    ]
+
+    start = datetime(2020, 1, 1, tzinfo=UTC)
+    leds = []
+    for _ in range(ledigingen):
+        container, locatie = rng.choice(containers), rng.choice(locaties)
+        lediging = LedigingProfiel(
+            id=uuid.UUID(int=rng.getrandbits(128)),
+            container_location=locatie.id,
+            klant=klant_id,
+            container=container.id,
+            gewicht=round(rng.uniform(0, 100), 1),
+            geleegd_op=start + timedelta(seconds=rng.randrange(5 * 365 * 24 * 3600)),
+            kosten=Decimal(rng.randrange(2500)) / 100,
+        )
+        for total in (container, locatie):
+            total.totaal_gewicht += lediging.gewicht
+            total.totaal_kosten += lediging.kosten
+        leds.append(lediging)
+    leds.sort(key=lambda lediging: lediging.geleegd_op, reverse=True)
+
+    return AfvalProfiel(
+        klant=KlantProfiel(
+            id=klant_id,
+            bsn="123456789",
+            naam="Klant",
+            totaal_kosten=sum((lediging.kosten for lediging in leds), Decimal("0")),
+        ),
+        containers=containers,
+        container_locaties=locaties,
+        ledigingen=leds,
+    )
+
+
+def _render_with_serializer(profiel: AfvalProfiel) -> bytes:
+    return CamelCaseJSONRenderer().render(AfvalProfielSerializer(profiel).data)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the time to render an afval profiel to JSON, through the serializers "
+        "versus directly from the profiel, on a synthetic profiel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ledigingen",
+            type=int,
+            default=10_000,
+            help="Number of ledigingen in the synthetic profiel (default: 10,000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of times to render, the fastest time counts (default: 5)",
+        )
+
+    def handle(self, **options):
+        ledigingen: int = options["ledigingen"]
+        repeat: int = options["repeat"]
+        if ledigingen < 0 or repeat < 1:
+            raise CommandError("--ledigingen must be positive and --repeat at least 1")
+
+        profiel = synthetic_afval_profiel(ledigingen)
+        if render_afval_profiel(profiel) != _render_with_serializer(profiel):
+            raise CommandError("The renderings differ")
+
+        results = {}
+        for name, render in (
+            ("serializers", _render_with_serializer),
+            ("direct", render_afval_profiel),
+        ):
+            seconds = self._measure(profiel, repeat, render)
+            results[name] = seconds
+            self.stdout.write(f"{name:>12}: {seconds * 1000:10.1f} ms per profiel")
+
+        speedup = results["serializers"] / results["direct"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendering {ledigingen:,} ledigingen directly is {speedup:.1f}x faster"
+            )
+        )
+
+    def _measure(
+        self, profiel: AfvalProfiel, repeat: int, render: Callable[[AfvalProfiel], bytes]
+    ) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render(profiel)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,73 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from openafval.afval.cache import bump_import_generation
+from openafval.afval.models import Lediging, LedigingTotaal
+from openafval.afval.services.aggregates import LedigingTotaalChanges
+from openafval.afval.services.postgres import YearlyPartitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Detach the yearly partitions of the ledigingen emptied before the given year. "
+        "The detached tables are kept for archiving, unless --drop is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "before",
+            type=int,
+            help="Detach the partitions of the years before this year",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop the detached tables, instead of keeping them for archiving",
+        )
+
+    def handle(self, **options):
+        partitions = YearlyPartitions.for_table(
+            Lediging._meta.db_table, column=Lediging._meta.get_field("geleegd_op").column
+        )
+        if partitions is None:
+            raise CommandError("Ledigingen are only partitioned on PostgreSQL")
+
+        years = [year for year in partitions.years() if year < options["before"]]
+        if not years:
+            self.stdout.write(f"No partitions before {options['before']}")
+            return
+
+        with transaction.atomic():
+            for year in years:
+                table = partitions.detach(year)
+                if options["drop"]:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"DROP TABLE {connection.ops.quote_name(table)}")
+                    self.stdout.write(f"Dropped the ledigingen of {year} ({table})")
+                else:
+                    self.stdout.write(f"Detached the ledigingen of {year} into {table}")
+            self._remove_totalen(years)
+            # The cached profielen still count the detached ledigingen
+            transaction.on_commit(bump_import_generation)
+
+    def _remove_totalen(self, years: list[int]) -> None:
+        # The partitions run by the year in UTC, the months of the totals are in local
+        # time: the months at the turn of a year are rebuilt from the ledigingen left
+        changes = LedigingTotaalChanges()
+        for year in years:
+            LedigingTotaal.objects.filter(
+                maand__range=(date(year, 2, 1), date(year, 11, 1))
+            ).delete()
+            changes.maanden.update(
+                LedigingTotaal.objects.filter(
+                    maand__in=[
+                        date(year - 1, 12, 1),
+                        date(year, 1, 1),
+                        date(year, 12, 1),
+                        date(year + 1, 1, 1),
+                    ]
+                ).values_list("klant_id", "maand")
+            )
+        changes.refresh()
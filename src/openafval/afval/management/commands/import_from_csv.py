@@ -7,6 +7,7 @@ from django.core.management.base import BaseCommand, CommandError
 from openafval.afval.services.exceptions import CSVImportError
 from openafval.afval.services.import_services import (
     FTPSConfig,
+    ImportMode,
     import_from_file,
     import_from_ftps_path,
 )
@@ -36,6 +37,65 @@ class Command(BaseCommand):
             help="Number of rows to process from the CSV in a single chunk",
             required=False,
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of processes that parse and prepare CSV chunks in parallel, "
+                "while the import writes them to the database (default: 1)"
+            ),
+            required=False,
+        )
+        parser.add_argument(
+            "--mode",
+            type=ImportMode,
+            choices=list(ImportMode),
+            default=ImportMode.FULL,
+            help=(
+                "'full' replaces all existing data, 'shadow' replaces all existing data by "
+                "loading into shadow tables that are swapped in at the end (PostgreSQL only), "
+                "'incremental' inserts new and updates changed rows based on the supplier's "
+                "IDs (default: full)"
+            ),
+            required=False,
+        )
+        parser.add_argument(
+            "--delete-missing",
+            action="store_true",
+            help="In incremental mode, delete rows that are no longer present in the CSV",
+        )
+        parser.add_argument(
+            "--defer-indexes",
+            action="store_true",
+            help=(
+                "In full mode, drop the foreign keys and secondary indexes before loading "
+                "and rebuild them afterwards (PostgreSQL only). Faster for large files, "
+                "but the API waits for the import to finish"
+            ),
+        )
+        parser.add_argument(
+            "--truncate",
+            action="store_true",
+            help=(
+                "In full mode, purge the existing data with TRUNCATE instead of DELETE "
+                "(PostgreSQL only). Faster for large tables, but the API waits for the "
+                "import to finish"
+            ),
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help=(
+                "Import a CSV file from FTPS while it is being downloaded, instead of "
+                "downloading it to a temporary file first (not supported for ZIP archives)"
+            ),
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Import a file from FTPS even if it did not change since the last import",
+        )
         parser.add_argument(
             "--ftps-timeout",
             type=int,
@@ -50,6 +110,22 @@ class Command(BaseCommand):
         ftps_password: str | None = os.environ.get("FTPS_PASSWORD")
         ftps_timeout: int = options["ftps_timeout"]
         chunk_size: int | None = options["chunk_size"]
+        mode: ImportMode = options["mode"]
+        delete_missing: bool = options["delete_missing"]
+        defer_indexes: bool = options["defer_indexes"]
+        truncate: bool = options["truncate"]
+        streaming: bool = options["stream"]
+        force: bool = options["force"]
+        workers: int = options["workers"]
+
+        if delete_missing and mode != ImportMode.INCREMENTAL:
+            raise CommandError("--delete-missing can only be used with --mode incremental")
+        if defer_indexes and mode != ImportMode.FULL:
+            raise CommandError("--defer-indexes can only be used with --mode full")
+        if truncate and mode != ImportMode.FULL:
+            raise CommandError("--truncate can only be used with --mode full")
+        if workers < 1:
+            raise CommandError("--workers must be at least 1")
 
         try:
             # Check if source is an FTPS URL
@@ -94,11 +170,38 @@ class Command(BaseCommand):
 
                 # Import from FTPS
                 self.stdout.write(f"Importing from FTPS: {source}")
-                import_from_ftps_path(ftps_config, remote_path, chunk_size=chunk_size)
+                import_run = import_from_ftps_path(
+                    ftps_config,
+                    remote_path,
+                    chunk_size=chunk_size,
+                    mode=mode,
+                    delete_missing=delete_missing,
+                    streaming=streaming,
+                    force=force,
+                    workers=workers,
+                    defer_indexes=defer_indexes,
+                    truncate=truncate,
+                )
+                if import_run is None:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            "File has not changed since the last import, skipped "
+                            "(use --force to import it anyway)"
+                        )
+                    )
+                    return
             else:
                 # Import from local file
                 self.stdout.write(f"Importing from local file: {source}")
-                import_from_file(source, chunk_size=chunk_size)
+                import_from_file(
+                    source,
+                    chunk_size=chunk_size,
+                    mode=mode,
+                    delete_missing=delete_missing,
+                    workers=workers,
+                    defer_indexes=defer_indexes,
+                    truncate=truncate,
+                )
 
             self.stdout.write(self.style.SUCCESS("Import completed successfully"))
 
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from openafval.afval.constants import ImportJobStatusChoices
+from openafval.afval.services.import_jobs import (
+    claim_next_job,
+    fail_stale_jobs,
+    run_import_job,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the CSV imports uploaded in the admin. Waits for new uploads, unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the pending imports and exit, instead of waiting for new uploads",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5,
+            help="Number of seconds between checks for new uploads (default: 5)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Number of rows to process from the CSV in a single chunk",
+            required=False,
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of processes that parse and prepare CSV chunks in parallel, "
+                "while the import writes them to the database (default: 1)"
+            ),
+        )
+
+    def handle(self, **options):
+        poll_interval: float = options["poll_interval"]
+        if poll_interval <= 0:
+            raise CommandError("--poll-interval must be positive")
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        while True:
+            for job in fail_stale_jobs():
+                self.stderr.write(
+                    self.style.ERROR(f"Import of {job.bestandsnaam} (job {job.pk}) stopped")
+                )
+
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            self.stdout.write(f"Importing {job.bestandsnaam} (job {job.pk})...")
+            job = run_import_job(job, chunk_size=options["chunk_size"], workers=options["workers"])
+            if job.status == ImportJobStatusChoices.SUCCEEDED:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Imported {job.rijen_geimporteerd:,} ledigingen")
+                )
+            else:
+                self.stderr.write(self.style.ERROR(f"Import failed: {job.foutmelding}"))
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.15 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("afval", "0005_alter_container_afval_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="containerlocation",
+            name="object_id",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="De externe object-ID zoals bij de leverancier bekend is.",
+                max_length=64,
+                verbose_name="object ID",
+            ),
+        ),
+        migrations.AddField(
+            model_name="klant",
+            name="subject_id",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="De externe subject-ID zoals bij de leverancier bekend is.",
+                max_length=64,
+                verbose_name="subject ID",
+            ),
+        ),
+        migrations.AddField(
+            model_name="lediging",
+            name="lediging_id",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="De externe lediging-ID zoals bij de leverancier bekend is.",
+                max_length=64,
+                verbose_name="lediging ID",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="container",
+            name="public_container_id",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="De externe container-ID zoals bij de leverancier bekend is.",
+                max_length=64,
+                verbose_name="public container ID",
+            ),
+        ),
+    ]
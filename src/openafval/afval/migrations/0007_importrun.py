@@ -0,0 +1,97 @@
+# Generated by Django 5.2.15 on 2026-10-17 10:41
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("afval", "0006_external_ids"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportRun",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "aangemaakt_op",
+                    models.DateTimeField(auto_now_add=True, verbose_name="aangemaakt op"),
+                ),
+                (
+                    "gewijzigd_op",
+                    models.DateTimeField(auto_now=True, verbose_name="gewijzigd op"),
+                ),
+                (
+                    "bron",
+                    models.CharField(
+                        blank=True,
+                        help_text="Het geïmporteerde bestand, bijvoorbeeld een ftps:// URL.",
+                        max_length=500,
+                        verbose_name="bron",
+                    ),
+                ),
+                (
+                    "modus",
+                    models.CharField(
+                        help_text="De import modus.", max_length=20, verbose_name="modus"
+                    ),
+                ),
+                (
+                    "aantal_ledigingen",
+                    models.PositiveBigIntegerField(
+                        default=0,
+                        help_text="Het aantal geïmporteerde ledigingen.",
+                        verbose_name="aantal ledigingen",
+                    ),
+                ),
+                (
+                    "bestandsgrootte",
+                    models.BigIntegerField(
+                        blank=True,
+                        help_text=(
+                            "De grootte van het bestand in bytes, zoals gemeld door de server "
+                            "(SIZE)."
+                        ),
+                        null=True,
+                        verbose_name="bestandsgrootte",
+                    ),
+                ),
+                (
+                    "bestand_gewijzigd_op",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text=(
+                            "Het wijzigingstijdstip van het bestand, zoals gemeld door de "
+                            "server (MDTM)."
+                        ),
+                        null=True,
+                        verbose_name="bestand gewijzigd op",
+                    ),
+                ),
+                (
+                    "sha256",
+                    models.CharField(
+                        blank=True,
+                        help_text="De SHA-256 hash van de inhoud van het bestand.",
+                        max_length=64,
+                        verbose_name="SHA-256",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "import",
+                "verbose_name_plural": "imports",
+                "get_latest_by": "aangemaakt_op",
+            },
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 5.2.15 on 2026-10-17 14:05
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import privates.storages
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("afval", "0007_importrun"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "aangemaakt_op",
+                    models.DateTimeField(auto_now_add=True, verbose_name="aangemaakt op"),
+                ),
+                ("gewijzigd_op", models.DateTimeField(auto_now=True, verbose_name="gewijzigd op")),
+                (
+                    "bestand",
+                    models.FileField(
+                        blank=True,
+                        help_text="Het geüploade CSV bestand. Wordt verwijderd na de import.",
+                        storage=privates.storages.PrivateMediaFileSystemStorage(),
+                        upload_to="import_jobs/",
+                        verbose_name="bestand",
+                    ),
+                ),
+                (
+                    "bestandsnaam",
+                    models.CharField(
+                        help_text="De oorspronkelijke naam van het geüploade bestand.",
+                        max_length=255,
+                        verbose_name="bestandsnaam",
+                    ),
+                ),
+                (
+                    "bestandsgrootte",
+                    models.PositiveBigIntegerField(
+                        default=0,
+                        help_text="De grootte van het geüploade bestand in bytes.",
+                        verbose_name="bestandsgrootte",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "In wachtrij"),
+                            ("running", "Bezig"),
+                            ("succeeded", "Voltooid"),
+                            ("failed", "Mislukt"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "gestart_op",
+                    models.DateTimeField(blank=True, null=True, verbose_name="gestart op"),
+                ),
+                (
+                    "voltooid_op",
+                    models.DateTimeField(blank=True, null=True, verbose_name="voltooid op"),
+                ),
+                (
+                    "bytes_gelezen",
+                    models.PositiveBigIntegerField(
+                        default=0,
+                        help_text="Het aantal bytes van het bestand dat tot nu toe is gelezen.",
+                        verbose_name="bytes gelezen",
+                    ),
+                ),
+                (
+                    "rijen_gelezen",
+                    models.PositiveBigIntegerField(
+                        default=0,
+                        help_text="Het aantal geldige rijen dat tot nu toe is gelezen.",
+                        verbose_name="rijen gelezen",
+                    ),
+                ),
+                (
+                    "rijen_geimporteerd",
+                    models.PositiveBigIntegerField(
+                        default=0,
+                        help_text="Het aantal ledigingen dat tot nu toe is geïmporteerd.",
+                        verbose_name="rijen geïmporteerd",
+                    ),
+                ),
+                ("foutmelding", models.TextField(blank=True, verbose_name="foutmelding")),
+                (
+                    "aangemaakt_door",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="aangemaakt door",
+                    ),
+                ),
+                (
+                    "import_run",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="De import die deze taak heeft uitgevoerd.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="afval.importrun",
+                        verbose_name="import",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "import taak",
+                "verbose_name_plural": "import taken",
+            },
+        ),
+    ]
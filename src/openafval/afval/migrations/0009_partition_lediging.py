@@ -0,0 +1,94 @@
+# Generated by Django 5.2.15 on 2026-10-17 16:20
+
+from django.db import migrations
+
+TABLE = "afval_lediging"
+PREVIOUS_TABLE = "afval_lediging_previous"
+# Every column but the generated geleegd_op_datum
+COLUMNS = (
+    "id, aangemaakt_op, gewijzigd_op, lediging_id, container_location_id, klant_id, "
+    "container_id, gewicht, geleegd_op, kosten"
+)
+
+
+def _rebuild_table(schema_editor, partitioned: bool):
+    """Recreate the lediging table, (un)partitioned by year of ``geleegd_op``.
+
+    The model keeps ``id`` as its primary key. The primary key of a partitioned table
+    has to include the partition key, so in the database it becomes ``(id, geleegd_op)``.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('u', 'f', 'c')
+            ORDER BY contype = 'f', conname
+            """,
+            [TABLE],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT pg_get_indexdef(indexrelid)
+            FROM pg_index
+            WHERE indrelid = %s::regclass
+            AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = indexrelid)
+            """,
+            [TABLE],
+        )
+        indexes = [definition.replace(" ON ONLY ", " ON ", 1) for (definition,) in cursor]
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {PREVIOUS_TABLE}")
+        create_table = (
+            f"CREATE TABLE {TABLE} (LIKE {PREVIOUS_TABLE} INCLUDING DEFAULTS INCLUDING GENERATED)"
+        )
+        if partitioned:
+            cursor.execute(f"{create_table} PARTITION BY RANGE (geleegd_op)")
+            cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+            cursor.execute(
+                "SELECT DISTINCT extract(year FROM geleegd_op AT TIME ZONE 'UTC')::integer "
+                f"FROM {PREVIOUS_TABLE}"
+            )
+            for (year,) in cursor.fetchall():
+                cursor.execute(
+                    f"CREATE TABLE {TABLE}_y{year} PARTITION OF {TABLE} FOR VALUES "
+                    f"FROM ('{year:04d}-01-01 00:00:00+00') TO ('{year + 1:04d}-01-01 00:00:00+00')"
+                )
+            primary_key = "id, geleegd_op"
+        else:
+            cursor.execute(create_table)
+            primary_key = "id"
+
+        cursor.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {PREVIOUS_TABLE}")
+        # Frees the names of its constraints and indexes (and partitions)
+        cursor.execute(f"DROP TABLE {PREVIOUS_TABLE}")
+
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY ({primary_key})"
+        )
+        for name, definition in constraints:
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+        for definition in indexes:
+            cursor.execute(definition)
+
+
+def partition_lediging(apps, schema_editor):
+    _rebuild_table(schema_editor, partitioned=True)
+
+
+def unpartition_lediging(apps, schema_editor):
+    _rebuild_table(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("afval", "0008_importjob"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_lediging, reverse_code=unpartition_lediging),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.15 on 2026-10-17 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("afval", "0009_partition_lediging"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lediging",
+            index=models.Index(
+                fields=["klant", "-geleegd_op"],
+                include=(
+                    "id",
+                    "container",
+                    "container_location",
+                    "gewicht",
+                    "kosten",
+                    "geleegd_op_datum",
+                ),
+                name="afval_lediging_profiel_idx",
+            ),
+        ),
+    ]
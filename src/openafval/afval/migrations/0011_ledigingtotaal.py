@@ -0,0 +1,98 @@
+# Generated by Django 5.2.15 on 2026-10-17 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("afval", "0010_lediging_profiel_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedigingTotaal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "afval_type",
+                    models.CharField(
+                        choices=[
+                            ("gft", "Groente, Fruit en Tuin afval (GFT)"),
+                            ("restafval", "Rest afval (Rest)"),
+                            ("med", "Medisch afval"),
+                        ],
+                        help_text="Het type afval van de container.",
+                        max_length=20,
+                        verbose_name="afvaltype",
+                    ),
+                ),
+                (
+                    "maand",
+                    models.DateField(
+                        help_text="De eerste dag van de maand waarin geleegd is.",
+                        verbose_name="maand",
+                    ),
+                ),
+                (
+                    "aantal_ledigingen",
+                    models.PositiveIntegerField(verbose_name="aantal ledigingen"),
+                ),
+                ("totaal_gewicht", models.FloatField(verbose_name="totaal gewicht")),
+                (
+                    "totaal_kosten",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=14, verbose_name="totale kosten"
+                    ),
+                ),
+                (
+                    "container",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="afval.container",
+                        verbose_name="container",
+                    ),
+                ),
+                (
+                    "container_location",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="afval.containerlocation",
+                        verbose_name="container location",
+                    ),
+                ),
+                (
+                    "klant",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="afval.klant",
+                        verbose_name="klant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "ledigingtotaal",
+                "verbose_name_plural": "ledigingtotalen",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("klant", "maand", "container", "container_location"),
+                        name="afval_ledigingtotaal_unique",
+                    )
+                ],
+            },
+        ),
+    ]
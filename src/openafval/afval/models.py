@@ -1,25 +1,29 @@
 from __future__ import annotations
 
 import uuid
-from decimal import Decimal
-from typing import TYPE_CHECKING, assert_never
+from datetime import timedelta
+from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .profiel import AfvalProfiel
 
+from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import QuerySet, Sum
+from django.db.models import QuerySet
 from django.db.models.functions import TruncDate
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from privates.storages import private_media_storage
 from vng_api_common.fields import BSNField
 
-from .constants import AfvalTypeChoices
+from .constants import AfvalTypeChoices, ImportJobStatusChoices
 from .querysets import (
     ContainerLocationQuerySet,
     ContainerQuerySet,
     LedigingQuerySet,
+    LedigingTotaalQuerySet,
 )
 
 
@@ -35,6 +39,13 @@ class AfvalBaseModel(models.Model):
 
 
 class ContainerLocation(AfvalBaseModel):
+    object_id = models.CharField(
+        verbose_name=_("object ID"),
+        help_text=_("De externe object-ID zoals bij de leverancier bekend is."),
+        max_length=64,
+        blank=True,
+        db_index=True,
+    )
     adres = models.CharField(
         verbose_name=_("adres"),
         help_text=_("Het adres van een afval container."),
@@ -52,6 +63,13 @@ class ContainerLocation(AfvalBaseModel):
 
 
 class Klant(AfvalBaseModel):
+    subject_id = models.CharField(
+        verbose_name=_("subject ID"),
+        help_text=_("De externe subject-ID zoals bij de leverancier bekend is."),
+        max_length=64,
+        blank=True,
+        db_index=True,
+    )
     bsn = BSNField(
         verbose_name=_("bsn"),
         unique=True,
@@ -78,110 +96,24 @@ class Klant(AfvalBaseModel):
         einddatum: str | None = None,
         afval_type: str | None = None,
         container_locaties: QuerySet | list[uuid.UUID] | list[str] | None = None,
+        met_ledigingen: bool = True,
     ) -> AfvalProfiel:
-        from .profiel import (
-            AfvalProfiel,
-            ContainerLocatieProfiel,
-            ContainerProfiel,
-            KlantProfiel,
-            LedigingProfiel,
-        )
-
-        ledigingen_qs = Lediging.objects.for_klant(self)
-        if startdatum:
-            ledigingen_qs = ledigingen_qs.filter(geleegd_op_datum__gte=startdatum)
-        if einddatum:
-            ledigingen_qs = ledigingen_qs.filter(geleegd_op_datum__lte=einddatum)
-        if afval_type:
-            ledigingen_qs = ledigingen_qs.filter(container__afval_type=afval_type)
-
-        containers_qs = Container.objects.for_klant(self)
-        if afval_type:
-            containers_qs = containers_qs.filter(afval_type=afval_type)
-
-        match container_locaties:
-            case QuerySet():
-                container_locaties_qs = container_locaties
-                ledigingen_qs = ledigingen_qs.filter(container_location__in=container_locaties_qs)
-            case [uuid.UUID() as first, *_] | [str() as first, *_]:
-                field = "pk__in" if isinstance(first, uuid.UUID) else "adres__in"
-                container_locaties_qs = ContainerLocation.objects.for_klant(self).filter(
-                    **{field: container_locaties}
-                )
-                ledigingen_qs = ledigingen_qs.filter(container_location__in=container_locaties_qs)
-            case [] | None:
-                container_locaties_qs = ContainerLocation.objects.for_klant(self)
-            case _:
-                assert_never(container_locaties)
-
-        # Clear the default -geleegd_op ordering once; without this Django includes
-        # the ordering field in GROUP BY and returns one row per lediging instead of
-        # one row per container/location.
-        ledigingen_qs = ledigingen_qs.order_by()
-
-        container_totals = {
-            row["container_id"]: row
-            for row in ledigingen_qs.values("container_id").annotate(
-                totaal_gewicht=Sum("gewicht"),
-                totaal_kosten=Sum("kosten"),
-            )
-        }
-        location_totals = {
-            row["container_location_id"]: row
-            for row in ledigingen_qs.values("container_location_id").annotate(
-                totaal_gewicht=Sum("gewicht"),
-                totaal_kosten=Sum("kosten"),
-            )
-        }
-        klant_totaal_kosten = ledigingen_qs.aggregate(totaal=Sum("kosten"))["totaal"] or Decimal(
-            "0"
-        )
-
-        return AfvalProfiel(
-            klant=KlantProfiel(
-                id=self.id,
-                bsn=self.bsn,
-                naam=self.naam,
-                totaal_kosten=klant_totaal_kosten,
-            ),
-            containers=[
-                ContainerProfiel(
-                    id=c.id,
-                    public_container_id=c.public_container_id,
-                    afval_type=c.afval_type,
-                    is_verzamelcontainer=c.is_verzamelcontainer,
-                    heeft_sleutel=c.heeft_sleutel,
-                    totaal_gewicht=container_totals.get(c.id, {}).get("totaal_gewicht")
-                    or Decimal("0"),
-                    totaal_kosten=container_totals.get(c.id, {}).get("totaal_kosten")
-                    or Decimal("0"),
-                )
-                for c in containers_qs
-            ],
-            container_locaties=[
-                ContainerLocatieProfiel(
-                    id=loc.id,
-                    adres=loc.adres,
-                    totaal_gewicht=location_totals.get(loc.id, {}).get("totaal_gewicht")
-                    or Decimal("0"),
-                    totaal_kosten=location_totals.get(loc.id, {}).get("totaal_kosten")
-                    or Decimal("0"),
-                )
-                for loc in container_locaties_qs
-            ],
-            ledigingen=[
-                LedigingProfiel(
-                    id=led.id,
-                    container_location=led.container_location_id,
-                    klant=led.klant_id,
-                    container=led.container_id,
-                    gewicht=led.gewicht,
-                    geleegd_op=led.geleegd_op,
-                    kosten=led.kosten,
-                )
-                for led in ledigingen_qs.order_by("-geleegd_op")
-            ],
+        """Build the afval profiel of the klant.
+
+        Without ``met_ledigingen``, only the totals are computed (per container and
+        location, in the database) and the profiel has no ledigingen: these can be
+        paged through with :meth:`LedigingQuerySet.for_profiel` instead.
+        """
+        from .profiel import AfvalProfielBuilder
+
+        builder = AfvalProfielBuilder(
+            startdatum=startdatum,
+            einddatum=einddatum,
+            afval_type=afval_type,
+            container_locaties=container_locaties,
+            met_ledigingen=met_ledigingen,
         )
+        return builder.build(self, builder.rows([self]), builder.dimensions([self]))
 
 
 class Container(AfvalBaseModel):
@@ -190,6 +122,7 @@ class Container(AfvalBaseModel):
         help_text=_("De externe container-ID zoals bij de leverancier bekend is."),
         max_length=64,
         blank=True,
+        db_index=True,
     )
     afval_type = models.CharField(
         verbose_name=_("afvaltype"),
@@ -219,6 +152,13 @@ class Container(AfvalBaseModel):
 
 
 class Lediging(AfvalBaseModel):
+    lediging_id = models.CharField(
+        verbose_name=_("lediging ID"),
+        help_text=_("De externe lediging-ID zoals bij de leverancier bekend is."),
+        max_length=64,
+        blank=True,
+        db_index=True,
+    )
     container_location = models.ForeignKey(
         ContainerLocation,
         verbose_name=_("container location"),
@@ -267,9 +207,249 @@ class Lediging(AfvalBaseModel):
     class Meta:  # pyright: ignore
         verbose_name = _("lediging")
         verbose_name_plural = _("ledigingen")
+        indexes = [
+            # Serves the afval profiel (a klant's ledigingen, newest first)
+            # from index-only scans on PostgreSQL, which supports INCLUDE
+            models.Index(
+                fields=["klant", "-geleegd_op"],
+                include=[
+                    "id",
+                    "container",
+                    "container_location",
+                    "gewicht",
+                    "kosten",
+                    "geleegd_op_datum",
+                ],
+                name="afval_lediging_profiel_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return (
             f"Lediging {str(self.id)}: {str(self.container)} "
             f"emptied on {str(self.geleegd_op_datum)}"
         )
+
+
+class LedigingTotaal(models.Model):
+    """The totals of the ledigingen per klant, container, location and month.
+
+    Rebuilt from the ledigingen by every import (an incremental import only
+    rebuilds the months it changed), so reads of the totals of whole months don't
+    have to aggregate the raw ledigingen. Being derived data, the
+    table has no foreign key constraints: it doesn't get in the way of purging or
+    swapping the tables it refers to during an import. Its unique constraint
+    indexes the totals by klant and month.
+    """
+
+    klant = models.ForeignKey(
+        Klant,
+        verbose_name=_("klant"),
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+",
+    )
+    container = models.ForeignKey(
+        Container,
+        verbose_name=_("container"),
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+",
+    )
+    container_location = models.ForeignKey(
+        ContainerLocation,
+        verbose_name=_("container location"),
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name="+",
+    )
+    afval_type = models.CharField(
+        verbose_name=_("afvaltype"),
+        help_text=_("Het type afval van de container."),
+        max_length=20,
+        choices=AfvalTypeChoices.choices,
+    )
+    maand = models.DateField(
+        verbose_name=_("maand"),
+        help_text=_("De eerste dag van de maand waarin geleegd is."),
+    )
+    aantal_ledigingen = models.PositiveIntegerField(
+        verbose_name=_("aantal ledigingen"),
+    )
+    totaal_gewicht = models.FloatField(
+        verbose_name=_("totaal gewicht"),
+    )
+    totaal_kosten = models.DecimalField(
+        verbose_name=_("totale kosten"),
+        max_digits=14,
+        decimal_places=2,
+    )
+
+    objects = LedigingTotaalQuerySet.as_manager()
+
+    class Meta:  # pyright: ignore
+        verbose_name = _("ledigingtotaal")
+        verbose_name_plural = _("ledigingtotalen")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["klant", "maand", "container", "container_location"],
+                name="afval_ledigingtotaal_unique",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.klant_id} {self.maand:%Y-%m}: {self.totaal_kosten}"
+
+
+class ImportRun(AfvalBaseModel):
+    """A completed import, used to skip importing the same supplier file twice."""
+
+    bron = models.CharField(
+        verbose_name=_("bron"),
+        help_text=_("Het geïmporteerde bestand, bijvoorbeeld een ftps:// URL."),
+        max_length=500,
+        blank=True,
+    )
+    modus = models.CharField(
+        verbose_name=_("modus"),
+        help_text=_("De import modus."),
+        max_length=20,
+    )
+    aantal_ledigingen = models.PositiveBigIntegerField(
+        verbose_name=_("aantal ledigingen"),
+        help_text=_("Het aantal geïmporteerde ledigingen."),
+        default=0,
+    )
+    bestandsgrootte = models.BigIntegerField(
+        verbose_name=_("bestandsgrootte"),
+        help_text=_("De grootte van het bestand in bytes, zoals gemeld door de server (SIZE)."),
+        null=True,
+        blank=True,
+    )
+    bestand_gewijzigd_op = models.DateTimeField(
+        verbose_name=_("bestand gewijzigd op"),
+        help_text=_("Het wijzigingstijdstip van het bestand, zoals gemeld door de server (MDTM)."),
+        null=True,
+        blank=True,
+    )
+    sha256 = models.CharField(
+        verbose_name=_("SHA-256"),
+        help_text=_("De SHA-256 hash van de inhoud van het bestand."),
+        max_length=64,
+        blank=True,
+    )
+
+    class Meta:  # pyright: ignore
+        verbose_name = _("import")
+        verbose_name_plural = _("imports")
+        get_latest_by = "aangemaakt_op"
+
+    def __str__(self) -> str:
+        return f"{self.bron or _('upload')} ({self.aangemaakt_op:%Y-%m-%d %H:%M})"
+
+
+class ImportJob(AfvalBaseModel):
+    """A CSV upload from the admin, imported in the background by ``run_import_jobs``."""
+
+    bestand = models.FileField(
+        verbose_name=_("bestand"),
+        help_text=_("Het geüploade CSV bestand. Wordt verwijderd na de import."),
+        upload_to="import_jobs/",
+        # The export contains BSNs: never serve it from the public media
+        storage=private_media_storage,
+        blank=True,
+    )
+    bestandsnaam = models.CharField(
+        verbose_name=_("bestandsnaam"),
+        help_text=_("De oorspronkelijke naam van het geüploade bestand."),
+        max_length=255,
+    )
+    bestandsgrootte = models.PositiveBigIntegerField(
+        verbose_name=_("bestandsgrootte"),
+        help_text=_("De grootte van het geüploade bestand in bytes."),
+        default=0,
+    )
+    status = models.CharField(
+        verbose_name=_("status"),
+        max_length=20,
+        choices=ImportJobStatusChoices.choices,
+        default=ImportJobStatusChoices.PENDING,
+    )
+    aangemaakt_door = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name=_("aangemaakt door"),
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    gestart_op = models.DateTimeField(
+        verbose_name=_("gestart op"),
+        null=True,
+        blank=True,
+    )
+    voltooid_op = models.DateTimeField(
+        verbose_name=_("voltooid op"),
+        null=True,
+        blank=True,
+    )
+    bytes_gelezen = models.PositiveBigIntegerField(
+        verbose_name=_("bytes gelezen"),
+        help_text=_("Het aantal bytes van het bestand dat tot nu toe is gelezen."),
+        default=0,
+    )
+    rijen_gelezen = models.PositiveBigIntegerField(
+        verbose_name=_("rijen gelezen"),
+        help_text=_("Het aantal geldige rijen dat tot nu toe is gelezen."),
+        default=0,
+    )
+    rijen_geimporteerd = models.PositiveBigIntegerField(
+        verbose_name=_("rijen geïmporteerd"),
+        help_text=_("Het aantal ledigingen dat tot nu toe is geïmporteerd."),
+        default=0,
+    )
+    foutmelding = models.TextField(
+        verbose_name=_("foutmelding"),
+        blank=True,
+    )
+    import_run = models.ForeignKey(
+        ImportRun,
+        verbose_name=_("import"),
+        help_text=_("De import die deze taak heeft uitgevoerd."),
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    class Meta:  # pyright: ignore
+        verbose_name = _("import taak")
+        verbose_name_plural = _("import taken")
+
+    def __str__(self) -> str:
+        return f"{self.bestandsnaam} ({self.get_status_display()})"
+
+    @property
+    def voortgang(self) -> float:
+        """The fraction of the file read so far (between 0 and 1)."""
+        if self.status == ImportJobStatusChoices.SUCCEEDED:
+            return 1.0
+        if not self.bestandsgrootte:
+            return 0.0
+        return min(self.bytes_gelezen / self.bestandsgrootte, 1.0)
+
+    @property
+    def resterende_tijd(self) -> timedelta | None:
+        """The estimated time until the import is done, extrapolated from the bytes read."""
+        if (
+            self.status != ImportJobStatusChoices.RUNNING
+            or self.gestart_op is None
+            or not self.bytes_gelezen
+        ):
+            return None
+        elapsed = timezone.now() - self.gestart_op
+        remaining = max(self.bestandsgrootte - self.bytes_gelezen, 0)
+        return elapsed * (remaining / self.bytes_gelezen)
@@ -1,9 +1,23 @@
 from __future__ import annotations
 
 import uuid
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from itertools import groupby
+from operator import attrgetter
+from typing import TYPE_CHECKING, assert_never
+
+from django.db.models import QuerySet, Sum
+from django.utils.dateparse import parse_date
+
+from .models import Lediging, LedigingTotaal
+from .querysets import geleegd_tussen
+
+if TYPE_CHECKING:
+    from .models import Klant
 
 
 @dataclass
@@ -50,3 +64,229 @@ class AfvalProfiel:
     containers: list[ContainerProfiel]
     container_locaties: list[ContainerLocatieProfiel]
     ledigingen: list[LedigingProfiel]
+
+
+class AfvalProfielBuilder:
+    """Build afval profielen from the ledigingen of one or more klanten.
+
+    The containers and locations to report on are those of all of a klant's
+    ledigingen, the totals (and ledigingen) only count the ones in scope of the
+    filters. Without ``met_ledigingen``, only the totals are computed (per
+    container and location, in the database) and the profielen have no ledigingen.
+    """
+
+    def __init__(
+        self,
+        *,
+        startdatum: date | str | None = None,
+        einddatum: date | str | None = None,
+        afval_type: str | None = None,
+        container_locaties: QuerySet | list[uuid.UUID] | list[str] | None = None,
+        met_ledigingen: bool = True,
+    ):
+        self.start = parse_date(startdatum) if isinstance(startdatum, str) else startdatum
+        self.end = parse_date(einddatum) if isinstance(einddatum, str) else einddatum
+        self.afval_type = afval_type
+        self.met_ledigingen = met_ledigingen
+
+        # The locations to report on: the given ones, or those of the klant's
+        # ledigingen (optionally narrowed to the given IDs or addresses)
+        self.locaties: dict[uuid.UUID, str] = {}
+        self.location_ids: set[uuid.UUID] | None = None
+        self.adressen: set[str] | None = None
+        match container_locaties:
+            case QuerySet():
+                # In the order of the queryset
+                self.locaties = {loc.id: loc.adres for loc in container_locaties}
+                self.location_ids = set(self.locaties)
+            case [uuid.UUID(), *_]:
+                self.location_ids = set(container_locaties)
+            case [str(), *_]:
+                self.adressen = set(container_locaties)
+            case [] | None:
+                pass
+            case _:
+                assert_never(container_locaties)
+
+    def rows(self, klanten: Iterable[Klant]) -> QuerySet:
+        """Return the rows to count in the profielen of ``klanten``.
+
+        These are the ledigingen in the date range, per klant (or their totals per
+        container and location). The columns are all in the profiel index, and the
+        date range limits the scan to the partitions and index range it covers.
+
+        Totals over whole months are summed from the monthly totals of
+        :class:`LedigingTotaal` instead.
+        """
+        if not self.met_ledigingen and self.whole_months:
+            return (
+                LedigingTotaal.objects.filter(klant__in=klanten)
+                .in_maanden(self.start, self.end)
+                .order_by("klant")
+                .values("klant_id", "container_id", "container_location_id")
+                .annotate(gewicht=Sum("totaal_gewicht"), kosten=Sum("totaal_kosten"))
+                .values_list(
+                    "klant_id",
+                    "container_id",
+                    "container_location_id",
+                    "gewicht",
+                    "kosten",
+                    named=True,
+                )
+            )
+
+        ledigingen = Lediging.objects.filter(klant__in=klanten).filter(
+            geleegd_tussen(self.start, self.end)
+        )
+        if self.met_ledigingen:
+            return ledigingen.order_by("klant", "-geleegd_op").values_list(
+                "id",
+                "klant_id",
+                "container_location_id",
+                "container_id",
+                "gewicht",
+                "geleegd_op",
+                "kosten",
+                named=True,
+            )
+
+        return (
+            ledigingen.order_by("klant")
+            .values("klant_id", "container_id", "container_location_id")
+            .annotate(gewicht=Sum("gewicht"), kosten=Sum("kosten"))
+            .values_list(
+                "klant_id", "container_id", "container_location_id", "gewicht", "kosten", named=True
+            )
+        )
+
+    @property
+    def whole_months(self) -> bool:
+        """Whether the date range consists of whole months (or is unbounded)."""
+        return (self.start is None or self.start.day == 1) and (
+            self.end is None or (self.end + timedelta(days=1)).day == 1
+        )
+
+    def dimensions(self, klanten: Iterable[Klant]) -> QuerySet:
+        """Return the containers and locations of all of the ledigingen of ``klanten``.
+
+        The profielen report on these whatever the date range, so this covers the
+        whole history of the klanten, but only one row per container and location.
+        """
+        # The locations in the order of the profiel, as the database collates addresses
+        return (
+            Lediging.objects.filter(klant__in=klanten)
+            .order_by("klant", "container_location__adres", "container_location_id")
+            .values(
+                "klant_id",
+                "container_id",
+                "container__public_container_id",
+                "container__afval_type",
+                "container__is_verzamelcontainer",
+                "container__heeft_sleutel",
+                "container_location_id",
+                "container_location__adres",
+            )
+            .distinct()
+            .values_list(
+                "klant_id",
+                "container_id",
+                "container__public_container_id",
+                "container__afval_type",
+                "container__is_verzamelcontainer",
+                "container__heeft_sleutel",
+                "container_location_id",
+                "container_location__adres",
+                named=True,
+            )
+        )
+
+    def build_all(
+        self, klanten: Iterable[Klant], rows: Iterable, dimensions: Iterable
+    ) -> Iterator[AfvalProfiel]:
+        """Build the profielen of ``klanten`` from their ``rows``, in the order of the rows."""
+        klanten = {klant.id: klant for klant in klanten}
+        dimensions = {
+            klant_id: list(klant_dimensions)
+            for klant_id, klant_dimensions in groupby(dimensions, key=attrgetter("klant_id"))
+        }
+        for klant_id, klant_rows in groupby(rows, key=attrgetter("klant_id")):
+            yield self.build(klanten.pop(klant_id), klant_rows, dimensions.get(klant_id, []))
+        # Those without any ledigingen in the date range
+        for klant in klanten.values():
+            yield self.build(klant, [], dimensions.get(klant.id, []))
+
+    def build(self, klant: Klant, rows: Iterable, dimensions: Iterable) -> AfvalProfiel:
+        """Build the profiel of ``klant`` from its rows and dimensions."""
+        afval_type, location_ids, adressen = self.afval_type, self.location_ids, self.adressen
+
+        containers = {}
+        locaties = dict(self.locaties)
+        for dimension in dimensions:
+            if not afval_type or dimension.container__afval_type == afval_type:
+                containers.setdefault(dimension.container_id, dimension)
+            if location_ids is not None and dimension.container_location_id not in location_ids:
+                continue
+            if adressen is not None and dimension.container_location__adres not in adressen:
+                continue
+            locaties.setdefault(
+                dimension.container_location_id, dimension.container_location__adres
+            )
+
+        container_gewicht, container_kosten = defaultdict(float), defaultdict(Decimal)
+        location_gewicht, location_kosten = defaultdict(float), defaultdict(Decimal)
+        ledigingen: list[LedigingProfiel] = []
+        for row in rows:
+            # Only those of the containers and locations in scope of the filters count
+            if row.container_id not in containers or row.container_location_id not in locaties:
+                continue
+            container_gewicht[row.container_id] += row.gewicht
+            container_kosten[row.container_id] += row.kosten
+            location_gewicht[row.container_location_id] += row.gewicht
+            location_kosten[row.container_location_id] += row.kosten
+            if not self.met_ledigingen:
+                continue
+            ledigingen.append(
+                LedigingProfiel(
+                    id=row.id,
+                    container_location=row.container_location_id,
+                    klant=klant.id,
+                    container=row.container_id,
+                    gewicht=row.gewicht,
+                    geleegd_op=row.geleegd_op,
+                    kosten=row.kosten,
+                )
+            )
+
+        return AfvalProfiel(
+            klant=KlantProfiel(
+                id=klant.id,
+                bsn=klant.bsn,
+                naam=klant.naam,
+                totaal_kosten=sum(container_kosten.values(), Decimal("0")),
+            ),
+            containers=[
+                ContainerProfiel(
+                    id=c.container_id,
+                    public_container_id=c.container__public_container_id,
+                    afval_type=c.container__afval_type,
+                    is_verzamelcontainer=c.container__is_verzamelcontainer,
+                    heeft_sleutel=c.container__heeft_sleutel,
+                    totaal_gewicht=container_gewicht.get(c.container_id, Decimal("0")),
+                    totaal_kosten=container_kosten.get(c.container_id, Decimal("0")),
+                )
+                # Afval types and IDs sort the same in Python as in the database
+                for c in sorted(
+                    containers.values(), key=lambda c: (c.container__afval_type, c.container_id)
+                )
+            ],
+            container_locaties=[
+                ContainerLocatieProfiel(
+                    id=pk,
+                    adres=adres,
+                    totaal_gewicht=location_gewicht.get(pk, Decimal("0")),
+                    totaal_kosten=location_kosten.get(pk, Decimal("0")),
+                )
+                for pk, adres in locaties.items()
+            ],
+            ledigingen=ledigingen,
+        )
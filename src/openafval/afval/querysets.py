@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+from datetime import date, datetime, time, timedelta
 from typing import TYPE_CHECKING
 
 from django.db import models
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet, Sum
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
 
 if TYPE_CHECKING:
-    from .models import Container, ContainerLocation, Klant, Lediging
+    from .models import Container, ContainerLocation, Klant, Lediging, LedigingTotaal
 
 
 class ContainerQuerySet(models.QuerySet):
@@ -25,3 +28,88 @@ class LedigingQuerySet(models.QuerySet):
     def for_klant(self, klant: Klant) -> QuerySet[Lediging]:
         """Get ledigingen for a specific klant, ordered by geleegd_op descending."""
         return self.filter(klant=klant).order_by("-geleegd_op")
+
+    def geleegd_tussen(
+        self, startdatum: date | None = None, einddatum: date | None = None
+    ) -> QuerySet[Lediging]:
+        """Get ledigingen emptied from ``startdatum`` up to and including ``einddatum``.
+
+        Besides the (local) date of emptying, this filters on ``geleegd_op`` itself:
+        the table is partitioned on it, and PostgreSQL only scans the partitions of
+        the years in range if the query bounds the partition key.
+        """
+        return self.filter(geleegd_tussen(startdatum, einddatum))
+
+    def for_profiel(
+        self,
+        klant: Klant,
+        *,
+        startdatum: date | None = None,
+        einddatum: date | None = None,
+        afval_type: str | None = None,
+        adressen: list[str] | None = None,
+    ) -> QuerySet[Lediging]:
+        """Get the ledigingen of the afval profiel of a klant, with the same filters."""
+        queryset = self.filter(klant=klant).geleegd_tussen(startdatum, einddatum)
+        if afval_type:
+            queryset = queryset.filter(container__afval_type=afval_type)
+        if adressen:
+            queryset = queryset.filter(container_location__adres__in=adressen)
+        return queryset
+
+
+class LedigingTotaalQuerySet(models.QuerySet):
+    def for_klant(self, klant: Klant) -> QuerySet[LedigingTotaal]:
+        """Get the totals of a specific klant."""
+        return self.filter(klant=klant)
+
+    def in_maanden(
+        self, startmaand: date | None = None, eindmaand: date | None = None
+    ) -> QuerySet[LedigingTotaal]:
+        """Get the totals of the months from ``startmaand`` up to and including ``eindmaand``.
+
+        Only the year and month of the bounds count.
+        """
+        queryset = self
+        if startmaand:
+            queryset = queryset.filter(maand__gte=startmaand.replace(day=1))
+        if eindmaand:
+            queryset = queryset.filter(maand__lte=eindmaand.replace(day=1))
+        return queryset
+
+    def totalen(self, *fields: str) -> QuerySet:
+        """Sum the totals per value of ``fields``, e.g. ``"container"`` or ``"jaar"``."""
+        return (
+            self.annotate(jaar=ExtractYear("maand"))
+            .order_by(*fields)
+            .values(*fields)
+            .annotate(**_TOTALEN)
+        )
+
+    def totaal(self) -> dict:
+        """Sum all of the totals."""
+        return self.aggregate(**_TOTALEN)
+
+
+_TOTALEN = {
+    "aantal_ledigingen": Sum("aantal_ledigingen"),
+    "totaal_gewicht": Sum("totaal_gewicht"),
+    "totaal_kosten": Sum("totaal_kosten"),
+}
+
+
+def geleegd_tussen(startdatum: date | None = None, einddatum: date | None = None) -> Q:
+    """Return the condition of :meth:`LedigingQuerySet.geleegd_tussen`."""
+    condition = Q()
+    if startdatum:
+        condition &= Q(geleegd_op_datum__gte=startdatum, geleegd_op__gte=_start_of(startdatum))
+    if einddatum:
+        condition &= Q(
+            geleegd_op_datum__lte=einddatum,
+            geleegd_op__lt=_start_of(einddatum + timedelta(days=1)),
+        )
+    return condition
+
+
+def _start_of(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
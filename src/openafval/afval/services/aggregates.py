@@ -0,0 +1,169 @@
+"""Materializing the totals of the ledigingen, see :class:`LedigingTotaal`."""
+
+import logging
+import uuid
+from calendar import monthrange
+from datetime import date
+from functools import reduce
+from itertools import islice
+from operator import or_
+from typing import Any
+
+from django.db import connection
+from django.db.models import Count, F, Q, QuerySet, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from openafval.afval.models import Container, Lediging, LedigingTotaal
+from openafval.afval.querysets import geleegd_tussen
+
+from .postgres import truncate_tables
+
+logger = logging.getLogger(__name__)
+
+REFRESH_BATCH_SIZE = 500  # Months (of a klant) to refresh per query
+
+
+def refresh_lediging_totalen(
+    *, truncate: bool = False, tables: dict[str, str] | None = None
+) -> int:
+    """Rebuild the totals per klant, container, location and month.
+
+    The totals are aggregated and written by the database in a single
+    ``INSERT ... SELECT``, the ledigingen never leave it. Returns the number of
+    totals written.
+
+    Args:
+        truncate: Empty the totals with ``TRUNCATE`` rather than ``DELETE``
+            (PostgreSQL only). Readers of the totals wait until the transaction ends.
+        tables: Read and write other tables than those of the models, by the name of
+            the model's table, e.g. :attr:`ShadowTables.tables`. These are expected
+            to be empty of totals.
+    """
+    if tables is None:
+        if truncate:
+            truncate_tables([LedigingTotaal])
+        else:
+            LedigingTotaal.objects.all().delete()
+
+    count = _insert_totalen(Lediging.objects.all(), tables=tables or {})
+    logger.info("Refreshed %s lediging totals", f"{count:,}")
+    return count
+
+
+def _insert_totalen(ledigingen: QuerySet[Lediging], tables: dict[str, str]) -> int:
+    # The columns of the SELECT are in the order of the values, then the annotations
+    totalen = (
+        ledigingen.order_by()
+        .values("klant", "container", "container_location")
+        .annotate(
+            afval_type=F("container__afval_type"),
+            maand=TruncMonth("geleegd_op_datum"),
+            aantal_ledigingen=Count("pk"),
+            totaal_gewicht=Sum("gewicht"),
+            totaal_kosten=Sum("kosten"),
+        )
+    )
+    columns = [
+        LedigingTotaal._meta.get_field(name).column
+        for name in (
+            "klant",
+            "container",
+            "container_location",
+            "afval_type",
+            "maand",
+            "aantal_ledigingen",
+            "totaal_gewicht",
+            "totaal_kosten",
+        )
+    ]
+    sql, params = totalen.query.sql_with_params()
+
+    quote = connection.ops.quote_name
+    for table, other in tables.items():
+        # The compiler quotes every reference to a table (there are no aliases)
+        sql = sql.replace(quote(table), quote(other))
+    table = LedigingTotaal._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(tables.get(table, table))} "
+            f"({', '.join(quote(column) for column in columns)}) {sql}",
+            params,
+        )
+        return cursor.rowcount
+
+
+def _maand(geleegd_op) -> date:
+    # As the geleegd_op_datum of the lediging, in the current time zone
+    return timezone.localtime(geleegd_op).date().replace(day=1)
+
+
+def _laatste_dag(maand: date) -> date:
+    return maand.replace(day=monthrange(maand.year, maand.month)[1])
+
+
+class LedigingTotaalChanges:
+    """The months of the totals an incremental import changes, to refresh only those.
+
+    Pass :meth:`lediging_changed` and :meth:`container_changed` as ``on_change`` to
+    the upserts, and :meth:`ledigingen_deleted` to the deletion of the missing
+    ledigingen, then :meth:`refresh` the months they touched.
+    """
+
+    def __init__(self):
+        self.maanden: set[tuple[uuid.UUID, date]] = set()
+
+    def lediging_changed(self, lediging: Lediging | None, values: dict[str, Any]) -> None:
+        """Record a lediging before it is created (``None``) or updated with ``values``."""
+        if lediging is not None:
+            self.maanden.add((lediging.klant_id, _maand(lediging.geleegd_op)))
+        self.maanden.add((values["klant_id"], _maand(values["geleegd_op"])))
+
+    def container_changed(self, container: Container | None, values: dict[str, Any]) -> None:
+        """Record a container before it is created (``None``) or updated with ``values``."""
+        # Only the afval type is part of the totals
+        if container is not None and container.afval_type != values["afval_type"]:
+            self.maanden.update(
+                LedigingTotaal.objects.filter(container=container.pk).values_list(
+                    "klant_id", "maand"
+                )
+            )
+
+    def ledigingen_deleted(self, ledigingen: QuerySet[Lediging]) -> None:
+        """Record the ``ledigingen`` that are about to be deleted."""
+        self.maanden.update(
+            ledigingen.order_by()
+            .annotate(maand=TruncMonth("geleegd_op_datum"))
+            .values_list("klant_id", "maand")
+            .distinct()
+        )
+
+    def refresh(self) -> int:
+        """Rebuild the totals of the changed months of the klanten.
+
+        Returns the number of totals written.
+        """
+        count = 0
+        maanden = iter(sorted(self.maanden))
+        while batch := list(islice(maanden, REFRESH_BATCH_SIZE)):
+            LedigingTotaal.objects.filter(
+                reduce(or_, (Q(klant=klant_id, maand=maand) for klant_id, maand in batch))
+            ).delete()
+            count += _insert_totalen(
+                Lediging.objects.filter(
+                    reduce(
+                        or_,
+                        (
+                            Q(klant=klant_id) & geleegd_tussen(maand, _laatste_dag(maand))
+                            for klant_id, maand in batch
+                        ),
+                    )
+                ),
+                tables={},
+            )
+        logger.info(
+            "Refreshed %s lediging totals of %s months",
+            f"{count:,}",
+            f"{len(self.maanden):,}",
+        )
+        return count
@@ -0,0 +1,188 @@
+"""Running CSV uploads from the admin in the background.
+
+The admin only stores the upload as an :class:`ImportJob`; the ``run_import_jobs``
+management command claims pending jobs and streams their file from disk into
+:func:`import_from_csv_stream`, so a large upload doesn't tie up a web worker.
+"""
+
+import io
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from openafval.afval.constants import ImportJobStatusChoices
+from openafval.afval.models import ImportJob
+
+from . import telemetry
+from .exceptions import CSVImportError
+from .import_services import import_from_csv_stream
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 2  # Seconds between saving the progress of a running job
+# A running job whose progress wasn't saved for this long lost its worker
+STALE_JOB_TIMEOUT = timedelta(minutes=10)
+
+
+class _ProgressReporter:
+    """Save the progress of a running job every ``interval`` seconds.
+
+    The import runs in a single transaction, so progress saved by the importing
+    thread would only become visible once the import is done. The reporter saves
+    it from a thread of its own, which has its own database connection.
+
+    Every save also touches ``gewijzigd_op``, as a heartbeat: see :func:`fail_stale_jobs`.
+    """
+
+    def __init__(self, job: ImportJob, interval: float = PROGRESS_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self.progress = {"bytes_gelezen": 0, "rijen_gelezen": 0, "rijen_geimporteerd": 0}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"import-job-{job.pk}-progress", daemon=True
+        )
+
+    def __enter__(self) -> "_ProgressReporter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def update(self, bytes_read: int, rows_parsed: int, rows_imported: int) -> None:
+        with self._lock:
+            self.progress = {
+                "bytes_gelezen": bytes_read,
+                "rijen_gelezen": rows_parsed,
+                "rijen_geimporteerd": rows_imported,
+            }
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.wait(self.interval):
+                self._save()
+        finally:
+            # Only closes the connection of this thread
+            connections.close_all()
+
+    def _save(self) -> None:
+        with self._lock:
+            progress = dict(self.progress)
+        try:
+            ImportJob.objects.filter(pk=self.job.pk).update(**progress, gewijzigd_op=timezone.now())
+        except DatabaseError:
+            # Progress is informational, the import itself must carry on
+            logger.warning(
+                "Could not save the progress of import job %s", self.job.pk, exc_info=True
+            )
+
+
+def claim_next_job() -> ImportJob | None:
+    """Mark the oldest pending job as running and return it.
+
+    Locked jobs are skipped, so several workers can claim jobs side by side.
+    """
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ImportJobStatusChoices.PENDING)
+            .order_by("aangemaakt_op")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = ImportJobStatusChoices.RUNNING
+        job.gestart_op = timezone.now()
+        job.save(update_fields=["status", "gestart_op", "gewijzigd_op"])
+    return job
+
+
+def fail_stale_jobs(timeout: timedelta = STALE_JOB_TIMEOUT) -> list[ImportJob]:
+    """Mark the running jobs without a heartbeat for ``timeout`` as failed.
+
+    Their worker died without recording the outcome. The import ran in a single
+    transaction, so nothing of it was saved; the job fails rather than being claimed
+    again, as the file may well be what brought the worker down. Its file is deleted,
+    as :func:`run_import_job` would have.
+    """
+    with transaction.atomic():
+        jobs = list(
+            ImportJob.objects.select_for_update(skip_locked=True).filter(
+                status=ImportJobStatusChoices.RUNNING,
+                gewijzigd_op__lt=timezone.now() - timeout,
+            )
+        )
+        for job in jobs:
+            logger.error("Import job %s stopped running without finishing", job.pk)
+            job.status = ImportJobStatusChoices.FAILED
+            job.foutmelding = (
+                "The import stopped without finishing: its worker is no longer running"
+            )
+            job.voltooid_op = timezone.now()
+            job.bestand.delete(save=False)
+            job.save()
+    return jobs
+
+
+def run_import_job(
+    job: ImportJob,
+    chunk_size: int | None = None,
+    workers: int = 1,
+    progress_interval: float = PROGRESS_INTERVAL,
+) -> ImportJob:
+    """Import the uploaded file of a claimed job and record the outcome on the job.
+
+    The file is read from disk in chunks rather than loaded into memory, and is
+    deleted afterwards (whether the import succeeded or not): it contains BSNs.
+    """
+    logger.info("Running import job %s (%s)", job.pk, job.bestandsnaam)
+
+    reporter = _ProgressReporter(job, interval=progress_interval)
+    try:
+        with (
+            telemetry.tracer.start_as_current_span(
+                "import_job", attributes={"import.job": str(job.pk)}
+            ),
+            job.bestand.open("rb") as upload,
+            reporter,
+        ):
+            raw = upload.file
+            stream = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+            def progress(rows_parsed: int, rows_imported: int) -> None:
+                reporter.update(raw.tell(), rows_parsed, rows_imported)
+
+            import_run = import_from_csv_stream(
+                stream,
+                chunk_size=chunk_size,
+                source=job.bestandsnaam,
+                workers=workers,
+                progress=progress,
+            )
+    except CSVImportError as exc:
+        logger.exception("Import job %s failed", job.pk)
+        job.status = ImportJobStatusChoices.FAILED
+        job.foutmelding = exc.message
+    except Exception as exc:
+        logger.exception("Import job %s failed", job.pk)
+        job.status = ImportJobStatusChoices.FAILED
+        job.foutmelding = f"{type(exc).__name__}: {exc}"
+    else:
+        job.status = ImportJobStatusChoices.SUCCEEDED
+        job.import_run = import_run
+
+    for field, value in reporter.progress.items():
+        setattr(job, field, value)
+    if job.status == ImportJobStatusChoices.SUCCEEDED:
+        job.bytes_gelezen = job.bestandsgrootte
+    job.voltooid_op = timezone.now()
+    job.bestand.delete(save=False)
+    job.save()
+    return job
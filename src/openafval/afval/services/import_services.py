@@ -1,24 +1,62 @@
+import hashlib
+import io
 import logging
+import math
+import multiprocessing
 import os
+import queue
+import resource
 import signal
+import sys
 import tempfile
+import threading
 import time
+import uuid
 import zipfile
-from decimal import Decimal
-from ftplib import FTP, FTP_TLS
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from enum import StrEnum
+from ftplib import FTP, FTP_TLS, error_perm, error_reply, error_temp
+from itertools import islice
 from pathlib import Path
-from typing import IO, TypedDict, assert_never
+from typing import IO, Any, TypedDict, assert_never
 
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
 
 import pandas as pd
+from opentelemetry import context as otel_context, trace
 
-from openafval.afval.constants import AfvalTypeChoices
+from openafval.afval.cache import bump_import_generation
 from openafval.afval.models import (
+    AfvalBaseModel,
     Container,
     ContainerLocation,
+    ImportRun,
     Klant,
     Lediging,
+    LedigingTotaal,
+)
+
+from . import telemetry
+from .aggregates import LedigingTotaalChanges, refresh_lediging_totalen
+from .exceptions import CSVImportError
+from .key_index import KeyIndex
+from .loaders import CopyLedigingLoader, copy_to_table, get_lediging_loader
+from .postgres import DeferredIndexes, ShadowTables, YearlyPartitions, truncate_tables
+from .transforms import (
+    REQUIRED_COLUMNS,
+    iter_csv_blocks,
+    parse_and_prepare_block,
+    prepare_chunk,
+    read_csv,
+    to_datetimes,
+    to_decimals,
 )
 
 logger = logging.getLogger(__name__)
@@ -44,6 +82,19 @@ class _FTPSWithSessionReuse(FTP_TLS):
 BYTES_PER_MB = 1024 * 1024
 LOG_PROGRESS_EVERY_MB = 100
 FTP_CHUNK_SIZE = 8192  # Typical FTP chunk size in bytes
+STREAM_BUFFER_MB = 64  # Maximum amount of downloaded data waiting to be imported
+PENDING_CHUNKS_PER_WORKER = 2  # Chunks read ahead per worker process
+
+# Called with the number of rows parsed and ledigingen imported so far
+ProgressCallback = Callable[[int, int], None]
+
+# FTPS download retry constants
+FTP_MAX_RETRIES = 5
+FTP_RETRY_DELAY = 5  # Seconds before the first retry, doubled for every next retry
+FTP_MAX_RETRY_DELAY = 300
+# Errors after which the download is resumed. Permanent FTP errors (5xx replies such
+# as a missing file or a failed login) are not retried.
+FTP_TRANSIENT_ERRORS = (OSError, EOFError, error_temp, error_reply)
 
 
 class FTPSConfig(TypedDict):
@@ -55,280 +106,648 @@ class FTPSConfig(TypedDict):
     timeout: int  # in seconds
 
 
-DTYPE_MAPPING = {
-    "BSN": str,
-    "CONTAINER_ID": str,
-    "FRACTIE_ID": str,
-    "GEWICHT_ONVERDEELD": float,
-    "GEWICHT_VERDEELD": float,
-    "LEDIGING_ID": str,
-    "OBJECTADRES": str,
-    "OBJECT_ID": str,
-    "SLEUTELNUMMER": str,
-    "SUBJECT_ID": str,
-    "SUBJECTNAAM": str,
-    "VERZAMELCONTAINER_J_N": str,
-    "TOTAALKOSTEN_LEDIGING": float,
-}
-
-DATE_COLUMNS: list[str] = []
-
-DATETIME_COLUMNS = [
-    "LEDIGINGSMOMENT",
-]
-
-
-def _csv_boolean(value: str) -> bool:
-    # Handle missing/null values (pandas reads empty cells as NaN)
-    if pd.isnull(value):
-        return False
-
-    match value:
-        case "J":
-            return True
-        case "N":
-            return False
-        case _:  # pragma: no cover
-            assert_never(value)
+class ImportMode(StrEnum):
+    FULL = "full"
+    SHADOW = "shadow"
+    INCREMENTAL = "incremental"
 
 
-def _map_fractie_id_to_afval_type(fractie_id: str) -> str:
-    """
-    Map FRACTIEID from CSV (which contains waste type) to afval_type choices.
-    """
-    # Handle missing/null values (pandas reads empty cells as NaN/float)
-    if pd.isnull(fractie_id) or not isinstance(fractie_id, str):
-        return AfvalTypeChoices.RESTAFVAL.value
-
-    fractie_id_lower = fractie_id.lower()
-
-    if "gft" in fractie_id_lower or "groen" in fractie_id_lower:
-        return AfvalTypeChoices.GFT.value
-    elif "rest" in fractie_id_lower:
-        return AfvalTypeChoices.RESTAFVAL.value
-    elif "med" in fractie_id_lower:
-        return AfvalTypeChoices.MED.value
-    else:
-        logger.warning("Unknown FRACTIEID %r; defaulting to restafval", fractie_id)
-        return AfvalTypeChoices.RESTAFVAL.value
+def _comparable(value: Any) -> Any:
+    # A missing float is NaN, which never equals itself
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
 
 
-@transaction.atomic
-def import_from_csv_stream(stream: IO[str], chunk_size: int | None = None):
-    start_time = time.time()
+def _upsert_by_natural_key(
+    model: type[AfvalBaseModel],
+    key_field: str,
+    records: dict[str, dict[str, Any]],
+    batch_size: int = 1000,
+    on_change: Callable[[Any, dict[str, Any]], None] | None = None,
+) -> dict[str, uuid.UUID]:
+    """Insert or update ``records`` by their natural key.
 
-    if chunk_size is None:
-        chunk_size = 50_000
+    Existing rows are looked up by ``key_field`` and only updated when one of the
+    imported attributes differs, so unchanged rows are not rewritten. ``on_change``
+    is called with every row about to be updated (as it was) or ``None`` for a new
+    one, and the attributes it gets.
 
-    logger.info("Starting CSV import with chunk size: %s", f"{chunk_size:,}")
-
-    # First pass: collect unique entities across all chunks
-    unique_locations_dict: dict[str, str] = {}  # OBJECT_ID -> OBJECTADRES
-    unique_klanten_dict: dict[str, tuple[str, str]] = {}  # SUBJECT_ID -> (BSN, NAAM)
-    unique_containers_dict: dict[
-        str, tuple[str, bool, bool]
-    ] = {}  # CONTAINER_ID -> (afval_type, is_verzamelcontainer, heeft_sleutel)
-
-    # Process CSV in chunks for first pass
-    logger.info("First pass: collecting unique entities from CSV")
-    chunk_iterator = pd.read_csv(
-        stream,
-        sep=";",
-        dtype=DTYPE_MAPPING,
-        parse_dates=DATE_COLUMNS + DATETIME_COLUMNS,
-        chunksize=chunk_size,
+    Every record is still looked up, in batches of ``batch_size``, so the number of
+    reads grows with the size of the import rather than the number of changes.
+
+    Returns:
+        Mapping of natural key to primary key for every record
+    """
+    fields = list(next(iter(records.values())).keys()) if records else []
+    # Records may refer to foreign keys by attname (``klant_id``), while ``only``
+    # and ``bulk_update`` expect field names
+    field_names = [model._meta.get_field(field).name for field in fields]
+    pk_mapping: dict[str, uuid.UUID] = {}
+    to_update = []
+    now = timezone.now()
+
+    keys = list(records)
+    for batch_start in range(0, len(keys), batch_size):
+        batch_keys = keys[batch_start : batch_start + batch_size]
+        existing = model.objects.filter(**{f"{key_field}__in": batch_keys}).only(
+            "pk", key_field, *field_names
+        )
+        for instance in existing:
+            key = getattr(instance, key_field)
+            pk_mapping[key] = instance.pk
+            attrs = records[key]
+            if any(
+                _comparable(getattr(instance, field)) != _comparable(value)
+                for field, value in attrs.items()
+            ):
+                if on_change is not None:
+                    on_change(instance, attrs)
+                for field, value in attrs.items():
+                    setattr(instance, field, value)
+                instance.gewijzigd_op = now
+                to_update.append(instance)
+
+    to_create = [
+        model(**{key_field: key}, **attrs)
+        for key, attrs in records.items()
+        if key not in pk_mapping
+    ]
+    if on_change is not None:
+        for instance in to_create:
+            on_change(None, records[getattr(instance, key_field)])
+    model.objects.bulk_create(to_create, batch_size=batch_size)
+    model.objects.bulk_update(
+        to_update, fields=[*field_names, "gewijzigd_op"], batch_size=batch_size
     )
+    pk_mapping.update((getattr(instance, key_field), instance.pk) for instance in to_create)
 
-    _REQUIRED_COLUMNS = ["BSN", "LEDIGINGSMOMENT", "CONTAINER_ID", "OBJECT_ID", "SUBJECT_ID"]
+    logger.info(
+        "%s: %s created, %s updated, %s unchanged",
+        model.__name__,
+        f"{len(to_create):,}",
+        f"{len(to_update):,}",
+        f"{len(records) - len(to_create) - len(to_update):,}",
+    )
+    return pk_mapping
 
-    chunk_count = 0
-    total_rows_processed = 0
-    for chunk_df in chunk_iterator:
-        chunk_count += 1
-        chunk_df = chunk_df.dropna(subset=_REQUIRED_COLUMNS)
 
-        if len(chunk_df) == 0:
-            logger.debug("Chunk %s: skipping (no valid rows after filtering)", chunk_count)
-            continue
+def _delete_missing(
+    model: type[AfvalBaseModel],
+    key_field: str,
+    seen_keys: KeyIndex,
+    batch_size: int = 1000,
+    on_delete: Callable[[QuerySet], None] | None = None,
+) -> int:
+    """Delete all rows whose natural key did not occur in the import.
 
-        total_rows_processed += len(chunk_df)
-        logger.info(
-            "Processing chunk %d: %s rows (total processed: %s)",
-            chunk_count,
-            f"{len(chunk_df):,}",
-            f"{total_rows_processed:,}",
+    ``on_delete`` is called with every batch of rows about to be deleted.
+    """
+    missing_pks = []
+    rows = model.objects.values_list("pk", key_field).iterator(chunk_size=10_000)
+    while batch := list(islice(rows, 10_000)):
+        pks, keys = zip(*batch, strict=True)
+        missing_pks.extend(
+            pk for pk, seen in zip(pks, seen_keys.contains(keys), strict=True) if not seen
         )
+    for batch_start in range(0, len(missing_pks), batch_size):
+        missing = model.objects.filter(pk__in=missing_pks[batch_start : batch_start + batch_size])
+        if on_delete is not None:
+            on_delete(missing)
+        missing.delete()
 
-        # Pre-process columns
-        chunk_df["afval_type"] = chunk_df["FRACTIE_ID"].apply(_map_fractie_id_to_afval_type)
-        chunk_df["is_verzamelcontainer"] = chunk_df["VERZAMELCONTAINER_J_N"].apply(_csv_boolean)
-        chunk_df["heeft_sleutel"] = chunk_df["SLEUTELNUMMER"].notna() & (
-            chunk_df["SLEUTELNUMMER"] != ""
-        )
+    logger.info("%s: %s deleted (missing from import)", model.__name__, f"{len(missing_pks):,}")
+    return len(missing_pks)
 
-        # Collect unique entities from this chunk
-        for row in chunk_df[["OBJECT_ID", "OBJECTADRES"]].drop_duplicates().itertuples(index=False):
-            if row.OBJECT_ID not in unique_locations_dict:
-                unique_locations_dict[row.OBJECT_ID] = row.OBJECTADRES
 
-        for row in (
-            chunk_df[["SUBJECT_ID", "BSN", "SUBJECTNAAM"]].drop_duplicates().itertuples(index=False)
-        ):
-            if row.SUBJECT_ID not in unique_klanten_dict:
-                unique_klanten_dict[row.SUBJECT_ID] = (row.BSN, row.SUBJECTNAAM)
+def _create_by_natural_key(
+    model: type[AfvalBaseModel],
+    key_field: str,
+    records: dict[str, dict[str, Any]],
+    batch_size: int = 1000,
+) -> dict[str, uuid.UUID]:
+    """Create ``records`` without looking for existing rows.
 
-        for row in (
-            chunk_df[["CONTAINER_ID", "afval_type", "is_verzamelcontainer", "heeft_sleutel"]]
-            .drop_duplicates()
-            .itertuples(index=False)
-        ):
-            if row.CONTAINER_ID not in unique_containers_dict:
-                unique_containers_dict[row.CONTAINER_ID] = (
-                    row.afval_type,
-                    row.is_verzamelcontainer,
-                    row.heeft_sleutel,
-                )
+    Returns:
+        Mapping of natural key to primary key for every record
+    """
+    to_create = [model(**{key_field: key}, **attrs) for key, attrs in records.items()]
+    model.objects.bulk_create(to_create, batch_size=batch_size)
+    return {getattr(instance, key_field): instance.pk for instance in to_create}
 
-    logger.info(
-        "First pass complete: processed %d chunks, %s total rows",
-        chunk_count,
-        f"{total_rows_processed:,}",
-    )
-    logger.info(
-        "Found %s unique locations, %s unique klanten, %s unique containers",
-        f"{len(unique_locations_dict):,}",
-        f"{len(unique_klanten_dict):,}",
-        f"{len(unique_containers_dict):,}",
+
+def _copy_by_natural_key(
+    model: type[AfvalBaseModel],
+    key_field: str,
+    records: dict[str, dict[str, Any]],
+    table: str,
+) -> dict[str, uuid.UUID]:
+    """Write ``records`` to ``table`` with PostgreSQL ``COPY``.
+
+    Returns:
+        Mapping of natural key to (newly generated) primary key for every record
+    """
+    now = timezone.now()
+    frame = pd.DataFrame.from_dict(records, orient="index")
+    frame.index.name = key_field
+    frame = frame.reset_index()
+    frame.insert(0, "id", [uuid.uuid4() for _ in range(len(frame))])
+    frame["aangemaakt_op"] = now
+    frame["gewijzigd_op"] = now
+
+    copy_to_table(model, frame, table=table)
+    return dict(zip(frame[key_field], frame["id"], strict=True))
+
+
+def _new_dimension_records(
+    chunk_df: pd.DataFrame,
+    key_column: str,
+    columns: dict[str, str],
+    pk_index: KeyIndex,
+) -> dict[str, dict[str, Any]]:
+    """Collect the records of entities that are first seen in this chunk.
+
+    The first occurrence of a key in the CSV determines the entity's attributes.
+    """
+    first_seen = chunk_df.drop_duplicates(subset=key_column, keep="first")
+    first_seen = first_seen[~pk_index.contains(first_seen[key_column])]
+    return {
+        row[0]: {field: value for field, value in zip(columns.values(), row[1:], strict=True)}
+        for row in first_seen[[key_column, *columns]].itertuples(index=False)
+    }
+
+
+def _peak_rss_mb(children: bool = False) -> float:
+    """Return the peak resident set size of this process (or its largest child) in MB."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+    if sys.platform == "darwin":
+        return usage.ru_maxrss / BYTES_PER_MB
+    return usage.ru_maxrss * 1024 / BYTES_PER_MB
+
+
+def _prepared_chunks(
+    stream: IO[str], chunk_size: int, required_columns: list[str], workers: int
+) -> Iterator[pd.DataFrame]:
+    """Yield the CSV's chunks, parsed and prepared, in the order of the file.
+
+    With more than one worker, the chunks are parsed and prepared in a pool of worker
+    processes. At most ``PENDING_CHUNKS_PER_WORKER`` chunks per worker are read ahead,
+    which caps the memory used for chunks that are waiting to be written.
+    """
+    if workers <= 1:
+        for chunk_df in read_csv(stream, chunk_size=chunk_size):
+            yield prepare_chunk(chunk_df, required_columns)
+        return
+
+    # Worker processes are spawned rather than forked: they must not inherit the
+    # database connection or the lock state of other threads (like the download)
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
     )
+    pending: deque[Future[pd.DataFrame]] = deque()
+    try:
+        for block in iter_csv_blocks(stream, rows_per_block=chunk_size):
+            pending.append(executor.submit(parse_and_prepare_block, block, required_columns))
+            if len(pending) >= workers * PENDING_CHUNKS_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def import_from_csv_stream(
+    stream: IO[str],
+    chunk_size: int | None = None,
+    mode: ImportMode = ImportMode.FULL,
+    delete_missing: bool = False,
+    source: str = "",
+    workers: int = 1,
+    progress: ProgressCallback | None = None,
+    defer_indexes: bool = False,
+    truncate: bool = False,
+) -> ImportRun:
+    """Import ledigingen (and the klanten, containers and locations they refer to).
+
+    The CSV is read once: every chunk first creates (or updates) the klanten,
+    containers and locations it sees for the first time and then writes its
+    ledigingen. The stream does not need to be seekable.
 
-    # Create Django model instances from collected unique entities
-    container_locations_to_create = [
-        ContainerLocation(adres=adres) for adres in unique_locations_dict.values()
-    ]
-    klanten_to_create = [Klant(bsn=bsn, naam=naam) for bsn, naam in unique_klanten_dict.values()]
-    containers_to_create = [
-        Container(
-            public_container_id=containerid,
-            afval_type=afval_type,
-            is_verzamelcontainer=is_verzamel,
-            heeft_sleutel=heeft_sleutel,
+    Args:
+        stream: CSV text stream
+        chunk_size: Number of rows to process per chunk (default: 50,000)
+        mode: ``full`` purges all existing data and reloads it, ``shadow`` reloads
+            all data into shadow tables that replace the live tables at the end
+            (PostgreSQL only), ``incremental`` inserts new and updates changed rows,
+            matched on the supplier's IDs. It only writes what changed, but still
+            reads the existing row of every record in the CSV.
+        delete_missing: In incremental mode, delete rows that are no longer
+            present in the CSV
+        source: Description of where the CSV comes from, recorded in the import run
+        workers: Number of processes that parse and prepare chunks in parallel,
+            while this process writes them to the database
+        progress: Called after every chunk with the number of rows parsed and the
+            number of ledigingen imported so far
+        defer_indexes: In full mode, drop the foreign keys and secondary indexes
+            before the load and rebuild them afterwards (PostgreSQL only). Readers
+            of the tables wait until the import is done.
+        truncate: In full mode, purge the tables with ``TRUNCATE`` instead of
+            ``DELETE`` (PostgreSQL only). Readers of the tables wait until the
+            import is done.
+
+    Returns:
+        The :class:`ImportRun` recorded for this import
+    """
+    # On PostgreSQL, ledigingen are partitioned by the year they were emptied in
+    partitions = None
+    if mode != ImportMode.SHADOW:
+        partitions = YearlyPartitions.for_table(
+            Lediging._meta.db_table, column=Lediging._meta.get_field("geleegd_op").column
+        )
+    if partitions is not None:
+        # The partition of the ledigingen that usually come in, see _create_partitions
+        _create_partitions(partitions, years=[timezone.now().year])
+
+    with telemetry.tracer.start_as_current_span(
+        "import",
+        attributes={
+            "import.source": source,
+            "import.mode": str(mode),
+            "import.workers": workers,
+        },
+    ):
+        import_run = _import_from_csv_stream(
+            stream,
+            chunk_size=chunk_size,
+            mode=mode,
+            delete_missing=delete_missing,
+            source=source,
+            workers=workers,
+            progress=progress,
+            defer_indexes=defer_indexes,
+            truncate=truncate,
         )
-        for containerid, (afval_type, is_verzamel, heeft_sleutel) in unique_containers_dict.items()
-    ]
 
-    # Purge all existing data before import
-    # Delete in reverse FK order (Lediging references all others)
-    logger.info("Deleting existing data")
-    Lediging.objects.all().delete()
-    Container.objects.all().delete()
-    Klant.objects.all().delete()
-    ContainerLocation.objects.all().delete()
-
-    # Bulk create all unique objects
-    logger.info("Creating %s container locations", f"{len(container_locations_to_create):,}")
-    ContainerLocation.objects.bulk_create(container_locations_to_create, batch_size=1000)
-    logger.info("Creating %s klanten", f"{len(klanten_to_create):,}")
-    Klant.objects.bulk_create(klanten_to_create, batch_size=1000)
-    logger.info("Creating %s containers", f"{len(containers_to_create):,}")
-    Container.objects.bulk_create(containers_to_create, batch_size=1000)
-
-    # Build mappings from external ID to created objects
-    container_location_mapping = dict(
-        zip(unique_locations_dict.keys(), container_locations_to_create, strict=True)
-    )
-    klant_mapping = dict(zip(unique_klanten_dict.keys(), klanten_to_create, strict=True))
-    container_mapping = dict(zip(unique_containers_dict.keys(), containers_to_create, strict=True))
-
-    # Free memory
-    del (
-        unique_locations_dict,
-        unique_klanten_dict,
-        unique_containers_dict,
-        container_locations_to_create,
-        klanten_to_create,
-        containers_to_create,
-    )
+    if partitions is not None:
+        # Ledigingen of years without a partition were loaded into the default partition
+        transaction.on_commit(lambda: _create_partitions(partitions))
+    # Invalidates the cached profielen, once the imported data is visible to them
+    transaction.on_commit(bump_import_generation)
+    return import_run
+
+
+def _create_partitions(partitions: YearlyPartitions, years: list[int] | None = None) -> None:
+    """Create the partitions of ``years``, or else of the rows in the default partition.
+
+    Creating a partition locks the table exclusively until the transaction ends.
+    The import itself doesn't create the partitions of the live table, which would
+    block the profielen for as long as the import runs: they're created in a short
+    transaction before and after it instead.
+    """
+    with (
+        telemetry.tracer.start_as_current_span("import.create_partitions"),
+        transaction.atomic(),
+    ):
+        partitions.ensure(partitions.default_years() if years is None else years)
+
+
+@transaction.atomic
+def _import_from_csv_stream(
+    stream: IO[str],
+    chunk_size: int | None,
+    mode: ImportMode,
+    delete_missing: bool,
+    source: str,
+    workers: int,
+    progress: ProgressCallback | None,
+    defer_indexes: bool,
+    truncate: bool,
+) -> ImportRun:
+    start_time = time.time()
+
+    if chunk_size is None:
+        chunk_size = 50_000
 
-    # Second pass: create Lediging objects
-    # Re-open the stream for second pass
-    logger.info("Second pass: creating Lediging objects")
-    stream.seek(0)
-    chunk_iterator = pd.read_csv(
-        stream,
-        sep=";",
-        dtype=DTYPE_MAPPING,
-        parse_dates=DATE_COLUMNS + DATETIME_COLUMNS,
-        chunksize=chunk_size,
+    logger.info(
+        "Starting %s CSV import with chunk size: %s (%d workers)",
+        mode,
+        f"{chunk_size:,}",
+        workers,
     )
 
-    chunk_count = 0
-    total_ledigingen_created = 0
-    for chunk_df in chunk_iterator:
-        chunk_count += 1
-        chunk_df = chunk_df.dropna(subset=_REQUIRED_COLUMNS)
+    # Rows can only be matched on their natural key if it is present
+    required_columns = REQUIRED_COLUMNS
+    if mode == ImportMode.INCREMENTAL:
+        required_columns = [*REQUIRED_COLUMNS, "LEDIGING_ID"]
+
+    if defer_indexes and mode != ImportMode.FULL:
+        raise CSVImportError("Deferring indexes is only supported for full imports")
+    if defer_indexes and connection.vendor != "postgresql":
+        raise CSVImportError("Deferring indexes requires PostgreSQL")
+    if truncate and mode != ImportMode.FULL:
+        raise CSVImportError("Truncating is only supported for full imports")
+    if truncate and connection.vendor != "postgresql":
+        raise CSVImportError("Truncating requires PostgreSQL")
+
+    shadow_tables = None
+    deferred_indexes = None
+    loader = get_lediging_loader()
+    match mode:
+        case ImportMode.FULL:
+            if defer_indexes:
+                # Before the purge, which then doesn't need to check foreign keys either
+                deferred_indexes = DeferredIndexes([ContainerLocation, Klant, Container, Lediging])
+                with telemetry.tracer.start_as_current_span("import.drop_indexes"):
+                    deferred_indexes.drop()
+
+            # Purge all existing data before import
+            logger.info("Deleting existing data")
+            with telemetry.tracer.start_as_current_span(
+                "import.purge", attributes={"import.truncate": truncate}
+            ):
+                if truncate:
+                    truncate_tables([ContainerLocation, Klant, Container, Lediging])
+                else:
+                    # Delete in reverse FK order (Lediging references all others)
+                    Lediging.objects.all().delete()
+                    Container.objects.all().delete()
+                    Klant.objects.all().delete()
+                    ContainerLocation.objects.all().delete()
+            save_dimension = _create_by_natural_key
+        case ImportMode.SHADOW:
+            if connection.vendor != "postgresql":
+                raise CSVImportError("Shadow table imports require PostgreSQL")
+
+            # Readers keep using the live tables until the shadow tables are swapped in
+            shadow_tables = ShadowTables(
+                [ContainerLocation, Klant, Container, Lediging, LedigingTotaal]
+            )
+            with telemetry.tracer.start_as_current_span("import.create_shadow_tables"):
+                shadow_tables.create()
 
-        if len(chunk_df) == 0:
-            logger.debug("Chunk %s: skipping (no valid rows after filtering)", chunk_count)
-            continue
+            def save_dimension(model, key_field, records):
+                return _copy_by_natural_key(
+                    model, key_field, records, table=shadow_tables.table(model)
+                )
 
-        logger.info(
-            "Processing chunk %d: creating %s ledigingen",
-            chunk_count,
-            f"{len(chunk_df):,}",
-        )
+            loader = CopyLedigingLoader(table=shadow_tables.table(Lediging))
+        case ImportMode.INCREMENTAL:
+            # Only the totals of the months with changed ledigingen are refreshed
+            totalen_changes = LedigingTotaalChanges()
+
+            def save_dimension(model, key_field, records):
+                return _upsert_by_natural_key(
+                    model,
+                    key_field,
+                    records,
+                    on_change=totalen_changes.container_changed if model is Container else None,
+                )
+        case _:  # pragma: no cover
+            assert_never(mode)
 
-        # Convert timestamps
-        chunk_df["geleegd_op_utc"] = pd.to_datetime(chunk_df["LEDIGINGSMOMENT"]).dt.tz_localize(
-            "UTC"
+    # Only the shadow table isn't read during the import, see _create_partitions
+    partitions = (
+        YearlyPartitions.for_table(
+            shadow_tables.table(Lediging),
+            column=Lediging._meta.get_field("geleegd_op").column,
         )
+        if shadow_tables
+        else None
+    )
+
+    # Mappings from external ID to primary key of every entity seen so far
+    container_location_index = KeyIndex()
+    klant_index = KeyIndex()
+    container_index = KeyIndex()
+
+    # The entities every chunk refers to: (CSV key column, CSV columns to save,
+    # model, natural key field, index)
+    dimensions = [
+        (
+            "OBJECT_ID",
+            {"OBJECTADRES": "adres"},
+            ContainerLocation,
+            "object_id",
+            container_location_index,
+        ),
+        ("SUBJECT_ID", {"BSN": "bsn", "SUBJECTNAAM": "naam"}, Klant, "subject_id", klant_index),
+        (
+            "CONTAINER_ID",
+            {
+                "afval_type": "afval_type",
+                "is_verzamelcontainer": "is_verzamelcontainer",
+                "heeft_sleutel": "heeft_sleutel",
+            },
+            Container,
+            "public_container_id",
+            container_index,
+        ),
+    ]
 
-        chunk_df["TOTAALKOSTEN_LEDIGING"] = chunk_df["TOTAALKOSTEN_LEDIGING"].fillna(0)
-
-        # Create Lediging objects for this chunk
-        ledigingen_batch = [
-            Lediging(
-                container_location=container_location_mapping[row.OBJECT_ID],
-                klant=klant_mapping[row.SUBJECT_ID],
-                container=container_mapping[row.CONTAINER_ID],
-                gewicht=row.GEWICHT_VERDEELD,
-                geleegd_op=row.geleegd_op_utc,
-                kosten=Decimal(str(row.TOTAALKOSTEN_LEDIGING)),
+    logger.info("Loading ledigingen with %s", type(loader).__name__)
+
+    metric_attributes = {"import.mode": str(mode)}
+    chunk_count = 0
+    total_rows_parsed = 0
+    total_ledigingen_created = 0
+    seen_lediging_ids = KeyIndex(with_pks=False)
+    with telemetry.tracer.start_as_current_span("import.first_pass"):
+        for chunk_df in _prepared_chunks(stream, chunk_size, required_columns, workers):
+            chunk_count += 1
+            total_rows_parsed += len(chunk_df)
+
+            if len(chunk_df) == 0:
+                logger.debug("Chunk %s: skipping (no valid rows after filtering)", chunk_count)
+                continue
+
+            logger.info(
+                "Processing chunk %d: %s rows",
+                chunk_count,
+                f"{len(chunk_df):,}",
             )
-            for row in chunk_df[
-                [
-                    "OBJECT_ID",
-                    "SUBJECT_ID",
-                    "CONTAINER_ID",
-                    "GEWICHT_VERDEELD",
-                    "geleegd_op_utc",
-                    "TOTAALKOSTEN_LEDIGING",
-                ]
-            ].itertuples(index=False)
-        ]
-
-        # Bulk create this chunk's ledigingen
-        Lediging.objects.bulk_create(ledigingen_batch, batch_size=1000)
-        total_ledigingen_created += len(ledigingen_batch)
-        logger.info(
-            "Chunk %d complete: %s ledigingen created (total: %s)",
-            chunk_count,
-            f"{len(ledigingen_batch):,}",
-            f"{total_ledigingen_created:,}",
-        )
 
-        # Clear to free memory
-        del ledigingen_batch
+            chunk_start = time.perf_counter()
+            with telemetry.tracer.start_as_current_span(
+                "import.chunk",
+                attributes={"import.chunk": chunk_count, "import.rows": len(chunk_df)},
+            ):
+                # Save the entities this chunk refers to for the first time
+                for key_column, columns, model, key_field, index in dimensions:
+                    if records := _new_dimension_records(chunk_df, key_column, columns, index):
+                        with telemetry.tracer.start_as_current_span(
+                            "import.bulk_create",
+                            attributes={
+                                "import.model": model.__name__,
+                                "import.rows": len(records),
+                            },
+                        ):
+                            index.update(save_dimension(model, key_field, records))
+
+                if partitions is not None:
+                    partitions.ensure(chunk_df["geleegd_op_utc"].dt.year.unique().tolist())
+
+                with telemetry.tracer.start_as_current_span(
+                    "import.bulk_create",
+                    attributes={"import.model": Lediging.__name__, "import.rows": len(chunk_df)},
+                ):
+                    if mode != ImportMode.INCREMENTAL:
+                        ledigingen_df = pd.DataFrame(
+                            {
+                                "lediging_id": chunk_df["LEDIGING_ID"],
+                                "container_location_id": container_location_index.lookup(
+                                    chunk_df["OBJECT_ID"]
+                                ),
+                                "klant_id": klant_index.lookup(chunk_df["SUBJECT_ID"]),
+                                "container_id": container_index.lookup(chunk_df["CONTAINER_ID"]),
+                                "gewicht": chunk_df["GEWICHT_VERDEELD"],
+                                "geleegd_op": chunk_df["geleegd_op_utc"],
+                                "kosten": chunk_df["TOTAALKOSTEN_LEDIGING"],
+                            }
+                        )
+
+                        # Load this chunk's ledigingen
+                        chunk_ledigingen = loader.load(ledigingen_df)
+
+                        # Clear to free memory
+                        del ledigingen_df
+                    else:
+                        lediging_records = {
+                            lediging_id: {
+                                "container_location_id": container_location_id,
+                                "klant_id": klant_id,
+                                "container_id": container_id,
+                                "gewicht": gewicht,
+                                "geleegd_op": geleegd_op,
+                                "kosten": kosten,
+                            }
+                            for (
+                                lediging_id,
+                                container_location_id,
+                                klant_id,
+                                container_id,
+                                gewicht,
+                                geleegd_op,
+                                kosten,
+                            ) in zip(
+                                chunk_df["LEDIGING_ID"].tolist(),
+                                container_location_index.lookup_uuids(chunk_df["OBJECT_ID"]),
+                                klant_index.lookup_uuids(chunk_df["SUBJECT_ID"]),
+                                container_index.lookup_uuids(chunk_df["CONTAINER_ID"]),
+                                chunk_df["GEWICHT_VERDEELD"].tolist(),
+                                to_datetimes(chunk_df["geleegd_op_utc"]),
+                                to_decimals(chunk_df["TOTAALKOSTEN_LEDIGING"]),
+                                strict=True,
+                            )
+                        }
+                        _upsert_by_natural_key(
+                            Lediging,
+                            "lediging_id",
+                            lediging_records,
+                            on_change=totalen_changes.lediging_changed,
+                        )
+                        chunk_ledigingen = len(lediging_records)
+                        if delete_missing:
+                            seen_lediging_ids.add(lediging_records)
+
+                        del lediging_records
+
+            telemetry.import_metrics.chunk_duration.record(
+                time.perf_counter() - chunk_start, metric_attributes
+            )
+            telemetry.import_metrics.rows.add(chunk_ledigingen, metric_attributes)
+            total_ledigingen_created += chunk_ledigingen
+            logger.info(
+                "Chunk %d complete: %s ledigingen imported (total: %s)",
+                chunk_count,
+                f"{chunk_ledigingen:,}",
+                f"{total_ledigingen_created:,}",
+            )
+            if progress is not None:
+                progress(total_rows_parsed, total_ledigingen_created)
+
+    if deferred_indexes is not None:
+        with telemetry.tracer.start_as_current_span("import.rebuild_indexes"):
+            deferred_indexes.rebuild()
+
+    if shadow_tables is not None:
+        with telemetry.tracer.start_as_current_span("import.refresh_totalen"):
+            refresh_lediging_totalen(tables=shadow_tables.tables)
+        with telemetry.tracer.start_as_current_span("import.swap_shadow_tables"):
+            shadow_tables.build_constraints_and_indexes()
+            shadow_tables.swap()
+
+    if mode == ImportMode.INCREMENTAL and delete_missing:
+        # Delete in FK order: a lediging still in the CSV only refers to
+        # entities that are also still in the CSV
+        with telemetry.tracer.start_as_current_span("import.delete_missing"):
+            _delete_missing(
+                Lediging,
+                "lediging_id",
+                seen_lediging_ids,
+                on_delete=totalen_changes.ledigingen_deleted,
+            )
+            _delete_missing(Container, "public_container_id", container_index)
+            _delete_missing(Klant, "subject_id", klant_index)
+            _delete_missing(ContainerLocation, "object_id", container_location_index)
+
+    match mode:
+        case ImportMode.FULL:
+            with telemetry.tracer.start_as_current_span("import.refresh_totalen"):
+                refresh_lediging_totalen(truncate=truncate)
+        case ImportMode.INCREMENTAL:
+            with telemetry.tracer.start_as_current_span("import.refresh_totalen"):
+                totalen_changes.refresh()
+        case ImportMode.SHADOW:
+            pass  # Built in the shadow table
+
+    import_run = ImportRun.objects.create(
+        bron=source, modus=mode, aantal_ledigingen=total_ledigingen_created
+    )
 
     end_time = time.time()
     duration_seconds = end_time - start_time
     duration_minutes = duration_seconds / 60
     duration_hours = duration_seconds / 3600
 
+    span = trace.get_current_span()
+    span.set_attribute("import.chunks", chunk_count)
+    span.set_attribute("import.rows", total_ledigingen_created)
+    if duration_seconds > 0:
+        telemetry.import_metrics.rows_per_second.record(
+            total_ledigingen_created / duration_seconds, metric_attributes
+        )
+
     logger.info(
-        "Import complete: %s ledigingen created from %d chunks",
+        "Import complete: %s ledigingen imported from %d chunks",
         f"{total_ledigingen_created:,}",
         chunk_count,
     )
+    logger.info(
+        "Imported %s unique locations, %s unique klanten, %s unique containers",
+        f"{len(container_location_index):,}",
+        f"{len(klant_index):,}",
+        f"{len(container_index):,}",
+    )
+    peak_rss_mb = _peak_rss_mb()
+    telemetry.import_metrics.peak_memory.set(
+        peak_rss_mb * BYTES_PER_MB, {**metric_attributes, "process": "import"}
+    )
+    logger.info(
+        "Key indexes: %.1f MB, peak memory usage (RSS): %.1f MB",
+        sum(
+            index.nbytes
+            for index in (container_location_index, klant_index, container_index, seen_lediging_ids)
+        )
+        / BYTES_PER_MB,
+        peak_rss_mb,
+    )
+    if workers > 1:
+        worker_peak_rss_mb = _peak_rss_mb(children=True)
+        telemetry.import_metrics.peak_memory.set(
+            worker_peak_rss_mb * BYTES_PER_MB, {**metric_attributes, "process": "worker"}
+        )
+        logger.info("Peak memory usage (RSS) per worker process: %.1f MB", worker_peak_rss_mb)
 
     # Format duration based on length
     if duration_seconds < 60:
@@ -346,11 +765,36 @@ def import_from_csv_stream(stream: IO[str], chunk_size: int | None = None):
             duration_minutes,
         )
 
+    return import_run
+
 
-def import_from_file(file: Path | str, chunk_size: int | None = None):
+def import_from_file(
+    file: Path | str,
+    chunk_size: int | None = None,
+    mode: ImportMode = ImportMode.FULL,
+    delete_missing: bool = False,
+    workers: int = 1,
+    defer_indexes: bool = False,
+    truncate: bool = False,
+) -> ImportRun:
     file_path = Path(file) if isinstance(file, str) else file
-    with file_path.open() as f:
-        import_from_csv_stream(f, chunk_size=chunk_size)
+    opener = _open_csv_from_zip if file_path.suffix.lower() == ".zip" else Path.open
+    with (
+        telemetry.tracer.start_as_current_span(
+            "import_from_file", attributes={"import.source": str(file_path)}
+        ),
+        opener(file_path) as f,
+    ):
+        return import_from_csv_stream(
+            f,
+            chunk_size=chunk_size,
+            mode=mode,
+            delete_missing=delete_missing,
+            source=str(file_path),
+            workers=workers,
+            defer_indexes=defer_indexes,
+            truncate=truncate,
+        )
 
 
 def _secure_delete_file(file_path: str) -> None:
@@ -363,56 +807,54 @@ def _secure_delete_file(file_path: str) -> None:
             logger.error("Failed to delete temporary file %s: %s", file_path, e)
 
 
-def _extract_csv_from_zip(zip_path: str) -> tempfile._TemporaryFileWrapper:
-    """Extract CSV file from ZIP archive to a temporary file.
+@contextmanager
+def _open_csv_from_zip(zip_path: str | Path) -> Iterator[IO[str]]:
+    """Open the CSV file in a ZIP archive as a text stream.
+
+    The CSV member is decompressed while it is read, so it is never written to
+    disk.
 
     Args:
         zip_path: Path to ZIP archive
 
-    Returns:
-        NamedTemporaryFile containing the extracted CSV (caller must manage)
+    Yields:
+        Text stream of the CSV file
 
     Raises:
         ValueError: If archive contains no CSV files or multiple CSV files
     """
     with zipfile.ZipFile(zip_path) as zip_file:
-        # Find first CSV file in the archive
-        csv_files = [name for name in zip_file.namelist() if name.endswith(".csv")]
-
-        if not csv_files:
-            raise ValueError("No CSV files found in ZIP archive")
+        # The CSV is decompressed while the import reads it, so that time is part of
+        # the import's spans. This span records what was found in the archive.
+        with telemetry.tracer.start_as_current_span("import.unzip") as span:
+            # Find first CSV file in the archive
+            csv_files = [name for name in zip_file.namelist() if name.endswith(".csv")]
+
+            if not csv_files:
+                raise ValueError("No CSV files found in ZIP archive")
+
+            if len(csv_files) > 1:
+                raise ValueError(
+                    f"ZIP archive contains multiple CSV files: {csv_files}. "
+                    "Expected exactly one CSV file."
+                )
 
-        if len(csv_files) > 1:
-            raise ValueError(
-                f"ZIP archive contains multiple CSV files: {csv_files}. "
-                "Expected exactly one CSV file."
+            csv_filename = csv_files[0]
+            member = zip_file.getinfo(csv_filename)
+            span.set_attributes(
+                {
+                    "import.unzip.member": csv_filename,
+                    "import.unzip.compressed_bytes": member.compress_size,
+                    "import.unzip.bytes": member.file_size,
+                }
             )
-
-        csv_filename = csv_files[0]
         logger.info("Found CSV file in archive: %s", csv_filename)
 
-        # Extract CSV to temporary file for chunked processing
-        csv_tmp = tempfile.NamedTemporaryFile(
-            mode="w+b",
-            delete=True,
-            suffix=".csv",
-            prefix="sensitive_extracted_",
-        )
-        os.chmod(csv_tmp.name, 0o600)
-        logger.info("Created temporary CSV file: %s", csv_tmp.name)
-
-        logger.info("Extracting CSV to temporary file")
-        with zip_file.open(csv_filename) as csv_source:
-            # Extract in 1MB chunks to avoid memory issues
-            chunk_size = BYTES_PER_MB
-            while True:
-                chunk = csv_source.read(chunk_size)
-                if not chunk:
-                    break
-                csv_tmp.write(chunk)
-
-        csv_tmp.flush()
-        return csv_tmp
+        with (
+            zip_file.open(csv_filename) as csv_source,
+            io.TextIOWrapper(csv_source, encoding="utf-8") as text_file,
+        ):
+            yield text_file
 
 
 def _setup_signal_handlers_for_file_cleanup(cleanup_paths: list[str]):
@@ -459,104 +901,495 @@ def _setup_signal_handlers_for_file_cleanup(cleanup_paths: list[str]):
     return original_handlers
 
 
+def _remote_size(ftps: FTP, remote_path: str) -> int | None:
+    """Return the size of the remote file, or ``None`` if the server doesn't say."""
+    try:
+        # SIZE reports the transfer size, which depends on the transfer type
+        ftps.voidcmd("TYPE I")
+        return ftps.size(remote_path)
+    except error_perm:
+        logger.warning("FTPS server does not report the size of %s", remote_path)
+        return None
+
+
 def _download_from_ftps(
     ftps_config: FTPSConfig,
     remote_path: str,
     local_file: IO[bytes],
+    max_retries: int = FTP_MAX_RETRIES,
 ) -> int:
     """Download a file from FTPS with progress logging.
 
+    When the connection drops, the download is retried with exponential backoff and
+    resumed at the number of bytes received so far (FTP ``REST``), so data is only
+    ever appended to ``local_file``. The result is verified against the size the
+    server reports for the file.
+
     Args:
         ftps_config: FTPS connection configuration
         remote_path: Remote file path
         local_file: Local file object to write to (binary mode)
+        max_retries: Number of times to reconnect after a transient error
 
     Returns:
         Number of bytes downloaded
+
+    Raises:
+        CSVImportError: If the remote file changed during the download or the
+            downloaded size does not match the remote size
     """
     logger.info("Downloading from FTPS: %s", remote_path)
-    bytes_downloaded = 0
+    with telemetry.tracer.start_as_current_span(
+        "import.download", attributes={"ftps.path": remote_path}
+    ) as span:
+        start = time.perf_counter()
+        bytes_downloaded = 0
+        expected_size: int | None = None
+
+        def write_with_progress(data):
+            nonlocal bytes_downloaded
+            local_file.write(data)
+            bytes_downloaded += len(data)
+            telemetry.import_metrics.bytes_downloaded.add(len(data))
+
+            # Log progress periodically
+            if bytes_downloaded % (LOG_PROGRESS_EVERY_MB * BYTES_PER_MB) < FTP_CHUNK_SIZE:
+                mb_downloaded = bytes_downloaded / BYTES_PER_MB
+                logger.info("Downloaded %.1f MB...", mb_downloaded)
+
+        for attempt in range(max_retries + 1):
+            try:
+                with _FTPSWithSessionReuse(
+                    ftps_config["host"], timeout=ftps_config["timeout"]
+                ) as ftps:
+                    ftps.login(ftps_config["user"], ftps_config["password"])
+                    ftps.prot_p()  # Enable encryption
+
+                    remote_size = _remote_size(ftps, remote_path)
+                    if attempt == 0:
+                        expected_size = remote_size
+                    elif remote_size != expected_size:
+                        raise CSVImportError(
+                            f"Remote file {remote_path} changed during the download "
+                            f"({expected_size} bytes before, {remote_size} bytes now)"
+                        )
+
+                    if bytes_downloaded and bytes_downloaded == expected_size:
+                        # The connection dropped after the last byte was received
+                        break
+                    if bytes_downloaded:
+                        logger.info("Resuming download at %.1f MB", bytes_downloaded / BYTES_PER_MB)
+                    ftps.retrbinary(
+                        f"RETR {remote_path}",
+                        write_with_progress,
+                        rest=bytes_downloaded or None,
+                    )
+            except FTP_TRANSIENT_ERRORS as exc:
+                if attempt == max_retries:
+                    logger.error("Download of %s failed after %d retries", remote_path, attempt)
+                    raise
+                delay = min(FTP_RETRY_DELAY * 2**attempt, FTP_MAX_RETRY_DELAY)
+                logger.warning(
+                    "Download of %s interrupted at %d bytes (%s), retrying in %d seconds",
+                    remote_path,
+                    bytes_downloaded,
+                    exc,
+                    delay,
+                )
+                span.add_event(
+                    "retry",
+                    {
+                        "ftps.attempt": attempt + 1,
+                        "ftps.bytes": bytes_downloaded,
+                        "error": str(exc),
+                    },
+                )
+                time.sleep(delay)
+                continue
+
+            if expected_size is None or bytes_downloaded >= expected_size:
+                break
+            # The server closed the data connection early without an error, resume
+            if attempt == max_retries:
+                break
+            logger.warning(
+                "Download of %s ended at %d of %d bytes, resuming",
+                remote_path,
+                bytes_downloaded,
+                expected_size,
+            )
+
+        if expected_size is not None and bytes_downloaded != expected_size:
+            raise CSVImportError(
+                f"Downloaded {bytes_downloaded} bytes of {remote_path}, "
+                f"but the server reports {expected_size} bytes"
+            )
+
+        duration_seconds = time.perf_counter() - start
+        span.set_attribute("ftps.bytes", bytes_downloaded)
+        if duration_seconds > 0:
+            telemetry.import_metrics.bytes_per_second.record(bytes_downloaded / duration_seconds)
+
+        mb_total = bytes_downloaded / BYTES_PER_MB
+        logger.info("Download complete: %.1f MB", mb_total)
+
+    return bytes_downloaded
+
+
+@dataclass
+class RemoteFile:
+    """What the FTPS server reports about a file, used to recognise a new export."""
 
-    def write_with_progress(data):
-        nonlocal bytes_downloaded
-        local_file.write(data)
-        bytes_downloaded += len(data)
+    size: int | None
+    modified: datetime | None
+
+    def matches(self, import_run: ImportRun) -> bool:
+        if self.size is None or self.modified is None:
+            return False
+        return (
+            self.size == import_run.bestandsgrootte
+            and self.modified == import_run.bestand_gewijzigd_op
+        )
 
-        # Log progress periodically
-        if bytes_downloaded % (LOG_PROGRESS_EVERY_MB * BYTES_PER_MB) < FTP_CHUNK_SIZE:
-            mb_downloaded = bytes_downloaded / BYTES_PER_MB
-            logger.info("Downloaded %.1f MB...", mb_downloaded)
 
+def _parse_mdtm(response: str) -> datetime:
+    # "213 YYYYMMDDHHMMSS[.sss]", always in UTC (RFC 3659)
+    timestamp = response.split()[-1].split(".")[0]
+    return datetime.strptime(timestamp, "%Y%m%d%H%M%S").replace(tzinfo=UTC)
+
+
+def _get_remote_file(ftps_config: FTPSConfig, remote_path: str) -> RemoteFile:
     with _FTPSWithSessionReuse(ftps_config["host"], timeout=ftps_config["timeout"]) as ftps:
         ftps.login(ftps_config["user"], ftps_config["password"])
-        ftps.prot_p()  # Enable encryption
+        size = _remote_size(ftps, remote_path)
+        try:
+            modified = _parse_mdtm(ftps.voidcmd(f"MDTM {remote_path}"))
+        except (error_perm, ValueError):
+            logger.warning("FTPS server does not report the modification time of %s", remote_path)
+            modified = None
+    return RemoteFile(size=size, modified=modified)
 
-        ftps.retrbinary(f"RETR {remote_path}", write_with_progress)
 
-        mb_total = bytes_downloaded / BYTES_PER_MB
-        logger.info("Download complete: %.1f MB", mb_total)
+def _last_import_run(source: str, mode: ImportMode) -> ImportRun | None:
+    """Return the latest import run if the current data was imported from ``source``.
 
-    return bytes_downloaded
+    Any other import since then (for example an upload in the admin) replaced the
+    data, so the file has to be imported again even if it didn't change. The same
+    goes for a full import after an incremental one, which may have kept rows that
+    are no longer in the file.
+    """
+    last_run = ImportRun.objects.order_by("-aangemaakt_op").first()
+    if last_run is None or last_run.bron != source:
+        return None
+    if last_run.modus == ImportMode.INCREMENTAL and mode != ImportMode.INCREMENTAL:
+        return None
+    return last_run
+
+
+def _record_remote_file(import_run: ImportRun, remote_file: RemoteFile, sha256: str) -> None:
+    import_run.bestandsgrootte = remote_file.size
+    import_run.bestand_gewijzigd_op = remote_file.modified
+    import_run.sha256 = sha256
+    import_run.save(update_fields=["bestandsgrootte", "bestand_gewijzigd_op", "sha256"])
+
+
+class _DownloadAborted(Exception):
+    """Raised in the download thread when the reading side stopped consuming."""
+
+
+_END_OF_DOWNLOAD = object()
+
+
+class _DownloadPipe:
+    """Bounded buffer between an FTPS download thread and the CSV reader.
 
+    The download thread writes the received chunks, the import reads them through
+    :meth:`reader`. The writer blocks when the buffer is full, so memory use is
+    capped at about ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_bytes // FTP_CHUNK_SIZE))
+        self._aborted = threading.Event()
+
+    def _put(self, item) -> None:
+        while not self._aborted.is_set():
+            try:
+                self._queue.put(item, timeout=1)
+            except queue.Full:
+                continue
+            else:
+                return
+        raise _DownloadAborted
+
+    def write(self, data: bytes) -> None:
+        self._put(bytes(data))
+
+    def close(self, error: BaseException | None = None) -> None:
+        """Signal the end of the download, or the error that ended it."""
+        self._put(error or _END_OF_DOWNLOAD)
+
+    def abort(self) -> None:
+        """Stop the download thread, called when the reading side is done."""
+        self._aborted.set()
+
+    def reader(self) -> io.BufferedReader:
+        return io.BufferedReader(_DownloadPipeReader(self._queue))
+
+
+class _DownloadPipeReader(io.RawIOBase):
+    def __init__(self, chunks: queue.Queue):
+        self._chunks = chunks
+        self._pending = memoryview(b"")
+        self._finished = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._pending:
+            if self._finished:
+                return 0
+            item = self._chunks.get()
+            if item is _END_OF_DOWNLOAD:
+                self._finished = True
+                return 0
+            if isinstance(item, BaseException):
+                self._finished = True
+                raise item
+            self._pending = memoryview(item)
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class _HashingWriter:
+    """Write to ``file`` while computing the SHA-256 hash of everything written."""
+
+    def __init__(self, file: IO[bytes] | _DownloadPipe):
+        self.file = file
+        self.hash = hashlib.sha256()
+
+    def write(self, data: bytes) -> None:
+        self.hash.update(data)
+        self.file.write(data)
+
+
+def _import_from_ftps_stream(
+    ftps_config: FTPSConfig,
+    remote_path: str,
+    chunk_size: int | None,
+    mode: ImportMode,
+    delete_missing: bool,
+    source: str,
+    workers: int,
+    defer_indexes: bool,
+    truncate: bool,
+) -> tuple[ImportRun, str]:
+    """Import a CSV file while it is being downloaded from FTPS.
+
+    The download runs in a separate thread and feeds a bounded buffer that the
+    (single-pass) import reads from, so the network transfer and the import
+    overlap. Nothing is written to disk.
+
+    Returns:
+        The import run and the SHA-256 hash of the downloaded file
+    """
+    pipe = _DownloadPipe(max_bytes=STREAM_BUFFER_MB * BYTES_PER_MB)
+    writer = _HashingWriter(pipe)
+    # Trace the download in the same trace as the import
+    trace_context = otel_context.get_current()
+
+    def download():
+        error = None
+        token = otel_context.attach(trace_context)
+        try:
+            _download_from_ftps(ftps_config, remote_path, writer)
+        except _DownloadAborted:
+            logger.warning("Download of %s aborted, import stopped", remote_path)
+            return
+        except BaseException as exc:  # re-raised on the reading side
+            error = exc
+        finally:
+            otel_context.detach(token)
+
+        with suppress(_DownloadAborted):
+            pipe.close(error)
+
+    download_thread = threading.Thread(target=download, name="ftps-download", daemon=True)
+    download_thread.start()
+    try:
+        with io.TextIOWrapper(pipe.reader(), encoding="utf-8") as text_file:
+            logger.info("Processing CSV while downloading")
+            import_run = import_from_csv_stream(
+                text_file,
+                chunk_size=chunk_size,
+                mode=mode,
+                delete_missing=delete_missing,
+                source=source,
+                workers=workers,
+                defer_indexes=defer_indexes,
+                truncate=truncate,
+            )
+    finally:
+        pipe.abort()
+        download_thread.join()
 
-def import_from_ftps_path(ftps_config: FTPSConfig, remote_path: str, chunk_size: int | None = None):
+    return import_run, writer.hash.hexdigest()
+
+
+def import_from_ftps_path(
+    ftps_config: FTPSConfig,
+    remote_path: str,
+    chunk_size: int | None = None,
+    mode: ImportMode = ImportMode.FULL,
+    delete_missing: bool = False,
+    streaming: bool = False,
+    force: bool = False,
+    workers: int = 1,
+    defer_indexes: bool = False,
+    truncate: bool = False,
+) -> ImportRun | None:
     """Download and process a CSV file (or ZIP containing CSV) from FTPS.
 
     The file is downloaded to a secure temporary location with restricted
     permissions and automatically deleted even if the process is interrupted.
     If the file is a ZIP archive, it must contain exactly one CSV file, which
-    will be extracted and processed.
+    is read directly from the archive without extracting it.
+
+    With ``streaming``, a CSV file is imported while it is being downloaded
+    instead. ZIP archives can't be read before they are complete, so they are
+    always downloaded to a temporary file first.
+
+    Every import is recorded as an :class:`ImportRun` with the size, modification
+    time and content hash of the file. If the data was last imported from the same
+    file and the server reports the same size and modification time, the import is
+    skipped without downloading anything. If the file was published again with the
+    same content, the (non-streaming) import is skipped after the download.
 
     Args:
         ftps_config: FTPS connection configuration with 'host', 'user', 'password'
         remote_path: Remote path to the CSV or ZIP file
         chunk_size: Number of rows to process per chunk (default: 50,000)
+        mode: Import mode, see :func:`import_from_csv_stream`
+        delete_missing: In incremental mode, delete rows missing from the CSV
+        streaming: Import a CSV file while downloading it
+        force: Import the file even if it has been imported before
+        workers: Number of processes that parse and prepare chunks in parallel
+        defer_indexes: Rebuild indexes and foreign keys after a full import, see
+            :func:`import_from_csv_stream`
+        truncate: Purge the tables with ``TRUNCATE`` in a full import, see
+            :func:`import_from_csv_stream`
+
+    Returns:
+        The recorded import run, or ``None`` if the file was skipped
 
     Raises:
         ValueError: If ZIP contains no CSV files or multiple CSV files
     """
     is_zip = remote_path.lower().endswith(".zip")
     suffix = ".zip" if is_zip else ".csv"
-
-    with tempfile.NamedTemporaryFile(
-        mode="w+b",
-        delete=True,
-        suffix=suffix,
-        prefix="sensitive_",
-    ) as downloaded_file:
-        # Setup secure permissions and signal handlers
-        os.chmod(downloaded_file.name, 0o600)
-        logger.info("Created temporary file: %s", downloaded_file.name)
-
-        cleanup_paths = [downloaded_file.name]
-        original_handlers = _setup_signal_handlers_for_file_cleanup(cleanup_paths)
-
-        try:
-            # Download file
-            bytes_downloaded = _download_from_ftps(ftps_config, remote_path, downloaded_file)
-            downloaded_file.flush()  # Ensure all data is written to disk
-
-            # Verify file was downloaded
-            file_size = os.path.getsize(downloaded_file.name)
+    source = f"ftps://{ftps_config['host']}/{remote_path}"
+
+    with telemetry.tracer.start_as_current_span(
+        "import_from_ftps", attributes={"import.source": source}
+    ) as span:
+        remote_file = _get_remote_file(ftps_config, remote_path)
+        last_run = None if force else _last_import_run(source, mode)
+        if last_run is not None and remote_file.matches(last_run):
             logger.info(
-                "Downloaded file size: %d bytes (reported: %d)",
-                file_size,
-                bytes_downloaded,
+                "%s has not changed since the import of %s, skipping",
+                source,
+                last_run.aangemaakt_op,
+            )
+            span.set_attribute("import.skipped", True)
+            return None
+
+        if streaming and not is_zip:
+            import_run, sha256 = _import_from_ftps_stream(
+                ftps_config,
+                remote_path,
+                chunk_size=chunk_size,
+                mode=mode,
+                delete_missing=delete_missing,
+                source=source,
+                workers=workers,
+                defer_indexes=defer_indexes,
+                truncate=truncate,
             )
+            _record_remote_file(import_run, remote_file, sha256)
+            return import_run
+        if streaming:
+            logger.info("ZIP archives can't be streamed, downloading to a temporary file")
 
-            # Get CSV file path (either direct or extracted from ZIP)
-            if is_zip:
-                logger.info("Extracting ZIP archive from: %s", downloaded_file.name)
-                with _extract_csv_from_zip(downloaded_file.name) as csv_file:
-                    cleanup_paths.append(csv_file.name)
-                    logger.info("Processing extracted CSV")
-                    with open(csv_file.name, encoding="utf-8") as text_file:
-                        import_from_csv_stream(text_file, chunk_size=chunk_size)
-            else:
-                logger.info("Processing CSV file")
-                with open(downloaded_file.name, encoding="utf-8") as text_file:
-                    import_from_csv_stream(text_file, chunk_size=chunk_size)
-        finally:
-            # Restore original signal handlers
-            for sig, handler in original_handlers.items():
-                signal.signal(sig, handler)
+        with tempfile.NamedTemporaryFile(
+            mode="w+b",
+            delete=True,
+            suffix=suffix,
+            prefix="sensitive_",
+        ) as downloaded_file:
+            # Setup secure permissions and signal handlers
+            os.chmod(downloaded_file.name, 0o600)
+            logger.info("Created temporary file: %s", downloaded_file.name)
+
+            cleanup_paths = [downloaded_file.name]
+            original_handlers = _setup_signal_handlers_for_file_cleanup(cleanup_paths)
+
+            try:
+                # Download file
+                writer = _HashingWriter(downloaded_file)
+                bytes_downloaded = _download_from_ftps(ftps_config, remote_path, writer)
+                downloaded_file.flush()  # Ensure all data is written to disk
+                sha256 = writer.hash.hexdigest()
+
+                # Verify file was downloaded
+                file_size = os.path.getsize(downloaded_file.name)
+                logger.info(
+                    "Downloaded file size: %d bytes (reported: %d)",
+                    file_size,
+                    bytes_downloaded,
+                )
+
+                if last_run is not None and last_run.sha256 == sha256:
+                    logger.info("%s was published again with the same content, skipping", source)
+                    # Recognise the new upload by its size and modification time next time
+                    _record_remote_file(last_run, remote_file, sha256)
+                    span.set_attribute("import.skipped", True)
+                    return None
+
+                # Read the CSV (either directly or from the ZIP archive)
+                if is_zip:
+                    logger.info("Processing CSV from ZIP archive: %s", downloaded_file.name)
+                    with _open_csv_from_zip(downloaded_file.name) as text_file:
+                        import_run = import_from_csv_stream(
+                            text_file,
+                            chunk_size=chunk_size,
+                            mode=mode,
+                            delete_missing=delete_missing,
+                            source=source,
+                            workers=workers,
+                            defer_indexes=defer_indexes,
+                            truncate=truncate,
+                        )
+                else:
+                    logger.info("Processing CSV file")
+                    with open(downloaded_file.name, encoding="utf-8") as text_file:
+                        import_run = import_from_csv_stream(
+                            text_file,
+                            chunk_size=chunk_size,
+                            mode=mode,
+                            delete_missing=delete_missing,
+                            source=source,
+                            workers=workers,
+                            defer_indexes=defer_indexes,
+                            truncate=truncate,
+                        )
+            finally:
+                # Restore original signal handlers
+                for sig, handler in original_handlers.items():
+                    signal.signal(sig, handler)
+
+        _record_remote_file(import_run, remote_file, sha256)
+        return import_run
@@ -0,0 +1,113 @@
+"""Compact lookup of primary keys by the supplier's (natural) keys during the import.
+
+An export can refer to millions of klanten, containers and locations. A ``dict`` of
+``str`` to :class:`uuid.UUID` costs a few hundred bytes per entry, while
+:class:`KeyIndex` stores the keys as a sorted array of UTF-8 bytes and the primary
+keys as 16 raw bytes each, and looks up whole columns at once.
+"""
+
+import uuid
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+# Hexadecimal notation of every byte value, to format primary keys without a loop
+_HEX_BYTES = np.array([f"{value:02x}" for value in range(256)])
+
+
+def _encode(keys: pd.Series | Iterable[str]) -> np.ndarray:
+    if not isinstance(keys, pd.Series):
+        keys = pd.Series(list(keys), dtype=object)
+    if keys.empty:
+        return np.array([], dtype="S1")
+    return keys.str.encode("utf-8").to_numpy().astype("S")
+
+
+class KeyIndex:
+    """Mapping of natural keys to UUID primary keys, or a set of keys without them.
+
+    Entries are added in batches (one per chunk) as sorted segments. Segments of
+    similar size are merged, so a lookup only needs a few binary searches.
+    """
+
+    def __init__(self, with_pks: bool = True):
+        self.with_pks = with_pks
+        self._keys: list[np.ndarray] = []
+        self._pks: list[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self._keys)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in [*self._keys, *self._pks])
+
+    def add(self, keys: Iterable[str], pks: Iterable[uuid.UUID] | None = None) -> None:
+        """Add keys that are not in the index yet (with their primary keys)."""
+        encoded = _encode(keys)
+        if not len(encoded):
+            return
+
+        order = np.argsort(encoded, kind="stable")
+        self._keys.append(encoded[order])
+        if self.with_pks:
+            if pks is None:
+                raise ValueError("Primary keys are required for this index")
+            raw = np.frombuffer(b"".join(pk.bytes for pk in pks), dtype=np.uint8)
+            self._pks.append(raw.reshape(-1, 16)[order])
+
+        # Merge the last segment into the previous one while that one isn't larger,
+        # which keeps the number of segments logarithmic (like a binary counter)
+        while len(self._keys) > 1 and len(self._keys[-2]) <= len(self._keys[-1]):
+            self._merge_last_segments()
+
+    def update(self, mapping: dict[str, uuid.UUID]) -> None:
+        self.add(mapping.keys(), mapping.values())
+
+    def _merge_last_segments(self) -> None:
+        keys = np.concatenate(self._keys[-2:])
+        order = np.argsort(keys, kind="stable")
+        self._keys[-2:] = [keys[order]]
+        if self.with_pks:
+            self._pks[-2:] = [np.concatenate(self._pks[-2:])[order]]
+
+    def _find(self, encoded: np.ndarray) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        """Yield ``(segment, found, positions)`` for every segment."""
+        for segment, keys in enumerate(self._keys):
+            positions = np.searchsorted(keys, encoded)
+            positions[positions == len(keys)] = 0
+            found = keys[positions] == encoded
+            yield segment, found, positions
+
+    def contains(self, keys: pd.Series | Iterable[str]) -> np.ndarray:
+        """Return for every key whether it is in the index."""
+        encoded = _encode(keys)
+        result = np.zeros(len(encoded), dtype=bool)
+        for _, found, _ in self._find(encoded):
+            result |= found
+        return result
+
+    def lookup(self, keys: pd.Series) -> pd.Series:
+        """Return the primary keys (in hexadecimal notation) of a column of keys.
+
+        Raises:
+            KeyError: If one of the keys is not in the index
+        """
+        encoded = _encode(keys)
+        pks = np.zeros((len(encoded), 16), dtype=np.uint8)
+        result = np.zeros(len(encoded), dtype=bool)
+        for segment, found, positions in self._find(encoded):
+            pks[found] = self._pks[segment][positions[found]]
+            result |= found
+
+        if not result.all():
+            raise KeyError(keys[~result].iloc[0])
+        return pd.Series(
+            _HEX_BYTES[pks].view("<U32").ravel() if len(pks) else [],
+            index=keys.index,
+            dtype=object,
+        )
+
+    def lookup_uuids(self, keys: pd.Series) -> list[uuid.UUID]:
+        return [uuid.UUID(hex=pk) for pk in self.lookup(keys)]
@@ -0,0 +1,160 @@
+"""Backends that write prepared lediging rows to the database.
+
+The import pipeline turns every CSV chunk into a :class:`pandas.DataFrame` with the
+columns in :data:`LEDIGING_COLUMNS`, with foreign keys already resolved to primary
+keys. A loader then writes that frame in one go.
+"""
+
+import io
+import logging
+import uuid
+from abc import ABC, abstractmethod
+
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.utils import timezone
+
+import pandas as pd
+
+from openafval.afval.models import Lediging
+
+from .transforms import to_datetimes, to_decimals
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_SIZE = 1024 * 1024  # Size of the pieces written to COPY, in bytes
+
+LEDIGING_COLUMNS = [
+    "lediging_id",
+    "container_location_id",
+    "klant_id",
+    "container_id",
+    "gewicht",
+    "geleegd_op",
+    "kosten",
+]
+
+
+class LedigingLoader(ABC):
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+
+    @abstractmethod
+    def load(self, ledigingen: pd.DataFrame) -> int:
+        """Insert the ledigingen and return the number of rows written."""
+
+
+class OrmLedigingLoader(LedigingLoader):
+    """Insert ledigingen through ``bulk_create``. Works on every database backend."""
+
+    batch_size = 1000
+
+    def load(self, ledigingen: pd.DataFrame) -> int:
+        instances = [
+            Lediging(
+                lediging_id=lediging_id,
+                container_location_id=container_location_id,
+                klant_id=klant_id,
+                container_id=container_id,
+                gewicht=gewicht,
+                geleegd_op=geleegd_op,
+                kosten=kosten,
+            )
+            for (
+                lediging_id,
+                container_location_id,
+                klant_id,
+                container_id,
+                gewicht,
+                geleegd_op,
+                kosten,
+            ) in zip(
+                ledigingen["lediging_id"].tolist(),
+                ledigingen["container_location_id"].tolist(),
+                ledigingen["klant_id"].tolist(),
+                ledigingen["container_id"].tolist(),
+                ledigingen["gewicht"].tolist(),
+                to_datetimes(ledigingen["geleegd_op"]),
+                to_decimals(ledigingen["kosten"]),
+                strict=True,
+            )
+        ]
+        Lediging.objects.using(self.using).bulk_create(instances, batch_size=self.batch_size)
+        return len(instances)
+
+
+class CopyLedigingLoader(LedigingLoader):
+    """Stream ledigingen into PostgreSQL with ``COPY ... FROM STDIN``.
+
+    Primary keys and audit timestamps are generated up front, so no model instances
+    are built and no INSERT parameters need to be bound.
+    """
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS, table: str | None = None):
+        super().__init__(using)
+        self.table = table
+
+    def load(self, ledigingen: pd.DataFrame) -> int:
+        if ledigingen.empty:
+            return 0
+
+        now = timezone.now()
+        frame = ledigingen[LEDIGING_COLUMNS].assign(
+            id=[uuid.uuid4() for _ in range(len(ledigingen))],
+            aangemaakt_op=now,
+            gewijzigd_op=now,
+        )
+        return copy_to_table(Lediging, frame, table=self.table, using=self.using)
+
+
+def copy_to_table(
+    model: type[models.Model],
+    frame: pd.DataFrame,
+    table: str | None = None,
+    using: str = DEFAULT_DB_ALIAS,
+) -> int:
+    """Write ``frame`` to the model's table (or ``table``) with PostgreSQL ``COPY``.
+
+    The frame's column names must be database column names of ``model``.
+    """
+    connection = connections[using]
+
+    # Missing numbers are written as empty strings, which COPY reads as NULL. Through
+    # the ORM, a missing float is stored as NaN instead, so write that
+    for field in model._meta.concrete_fields:
+        if isinstance(field, models.FloatField) and field.column in frame:
+            column = frame[field.column]
+            if column.isna().any():
+                frame = frame.assign(
+                    **{field.column: column.astype(object).where(column.notna(), "NaN")}
+                )
+
+    buffer = io.StringIO()
+    frame.to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+
+    # Empty strings in CSV are read as NULL, which is never what we want for the
+    # (non-nullable) text columns
+    text_columns = [
+        field.column
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.CharField) and not field.null and field.column in frame
+    ]
+    options = "FORMAT csv"
+    if text_columns:
+        options += f", FORCE_NOT_NULL ({', '.join(text_columns)})"
+
+    table = connection.ops.quote_name(table or model._meta.db_table)
+    columns = ", ".join(frame.columns)
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY {table} ({columns}) FROM STDIN WITH ({options})") as copy:
+            while data := buffer.read(COPY_BUFFER_SIZE):
+                copy.write(data)
+
+    return len(frame)
+
+
+def get_lediging_loader(using: str = DEFAULT_DB_ALIAS) -> LedigingLoader:
+    """Return the fastest loader supported by the database backend."""
+    if connections[using].vendor == "postgresql":
+        return CopyLedigingLoader(using)
+    return OrmLedigingLoader(using)
@@ -0,0 +1,499 @@
+"""PostgreSQL specific table maintenance used by the import."""
+
+import logging
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from django.db import DEFAULT_DB_ALIAS, connections, models
+
+logger = logging.getLogger(__name__)
+
+_INDEX_DEF_RE = re.compile(
+    r"^(?P<create>CREATE (?:UNIQUE )?INDEX )(?P<name>\S+)(?P<on> ON (?:ONLY )?)(?P<table>\S+)"
+    r"(?P<rest> .*)$"
+)
+_REFERENCES_RE = re.compile(r"REFERENCES (?P<table>[^\s(]+)\(")
+
+PARALLEL_MAINTENANCE_WORKERS = 4  # Parallel workers per index build
+DEFAULT_PARTITION_SUFFIX = "_default"
+
+
+@dataclass
+class ConstraintDefinition:
+    name: str
+    type: str  # pg_constraint.contype: p(rimary key), f(oreign key), u(nique), c(heck)
+    definition: str
+
+
+@dataclass
+class IndexDefinition:
+    name: str
+    definition: str
+
+
+def get_constraint_definitions(
+    table: str, using: str = DEFAULT_DB_ALIAS
+) -> list[ConstraintDefinition]:
+    """Return the table's primary key, unique, foreign key and check constraints."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT conname, contype, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f', 'c')
+            ORDER BY contype = 'f', conname
+            """,
+            [table],
+        )
+        return [ConstraintDefinition(*row) for row in cursor.fetchall()]
+
+
+def get_index_definitions(table: str, using: str = DEFAULT_DB_ALIAS) -> list[IndexDefinition]:
+    """Return the table's indexes that don't back a (primary key or unique) constraint.
+
+    The index of a partitioned table is defined ``ON ONLY`` the table itself. The
+    definitions leave out ``ONLY``, so they create the index on every partition too.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT index_class.relname, pg_get_indexdef(pg_index.indexrelid)
+            FROM pg_index
+            JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+            WHERE pg_index.indrelid = %s::regclass
+            AND NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE pg_constraint.conrelid = pg_index.indrelid
+                AND pg_constraint.conindid = pg_index.indexrelid
+            )
+            ORDER BY index_class.relname
+            """,
+            [table],
+        )
+        return [
+            IndexDefinition(name, definition.replace(" ON ONLY ", " ON ", 1))
+            for name, definition in cursor.fetchall()
+        ]
+
+
+def get_partition_key(table: str, using: str = DEFAULT_DB_ALIAS) -> str | None:
+    """Return the partition key of a partitioned table, e.g. ``RANGE (geleegd_op)``."""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT pg_get_partkeydef(%s::regclass)", [table])
+        (partition_key,) = cursor.fetchone()
+    return partition_key
+
+
+def get_partitions(table: str, using: str = DEFAULT_DB_ALIAS) -> list[str]:
+    """Return the names of the partitions of a partitioned table."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT pg_class.relname
+            FROM pg_inherits
+            JOIN pg_class ON pg_class.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            ORDER BY pg_class.relname
+            """,
+            [table],
+        )
+        return [name for (name,) in cursor.fetchall()]
+
+
+def rewrite_index_definition(definition: str, name: str, table: str) -> str:
+    """Point a ``pg_get_indexdef`` statement at another index name and table."""
+    match = _INDEX_DEF_RE.match(definition)
+    if match is None:  # pragma: no cover
+        raise ValueError(f"Unexpected index definition: {definition}")
+    return f"{match['create']}{name}{match['on']}{table}{match['rest']}"
+
+
+def rewrite_references(definition: str, tables: dict[str, str]) -> str:
+    """Point the ``REFERENCES`` of a foreign key definition at other tables."""
+    return _REFERENCES_RE.sub(
+        lambda match: f"REFERENCES {tables.get(match['table'], match['table'])}(",
+        definition,
+    )
+
+
+def run_pending_constraint_checks(using: str = DEFAULT_DB_ALIAS) -> None:
+    """Check the deferred constraints of the rows written so far in the transaction.
+
+    Django creates foreign keys as ``DEFERRABLE INITIALLY DEFERRED``. A table can't
+    be altered or truncated while such checks are pending.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+
+
+def truncate_tables(models_: list[type[models.Model]], using: str = DEFAULT_DB_ALIAS) -> None:
+    """Empty the tables of ``models_`` with a single ``TRUNCATE``.
+
+    Unlike ``DELETE``, this doesn't visit (or write WAL for) every row. Tables that
+    refer to each other must be truncated together; a table outside ``models_`` that
+    refers to one of them makes the statement fail rather than being emptied as well
+    (no ``CASCADE``).
+
+    ``TRUNCATE`` locks the tables exclusively until the transaction ends.
+    """
+    connection = connections[using]
+    tables = ", ".join(connection.ops.quote_name(model._meta.db_table) for model in models_)
+    run_pending_constraint_checks(using=using)
+    logger.info("Truncating %s", tables)
+    with connection.cursor() as cursor:
+        cursor.execute(f"TRUNCATE TABLE {tables}")
+
+
+def _temporary_name(name: str, suffix: str) -> str:
+    # Identifiers are truncated to 63 bytes by PostgreSQL
+    return f"{name[: 63 - len(suffix)]}{suffix}"
+
+
+class ShadowTables:
+    """Empty copies of a set of tables that replace the live tables in one go.
+
+    Data is loaded into the shadow tables while readers keep using the live tables.
+    The constraints and indexes of the live tables are only built on the shadow
+    tables after loading, and :meth:`swap` then replaces the live tables by renaming
+    them. The rename only needs a short exclusive lock at the end of the import.
+
+    All of this has to happen in one transaction: if the import fails, the shadow
+    tables are rolled back and the live tables are left untouched.
+    """
+
+    suffix = "_shadow"
+
+    def __init__(self, models_: list[type[models.Model]], using: str = DEFAULT_DB_ALIAS):
+        self.models = models_
+        self.using = using
+        self.connection = connections[using]
+        self.tables = {
+            model._meta.db_table: _temporary_name(model._meta.db_table, self.suffix)
+            for model in models_
+        }
+        self._constraints: dict[str, list[ConstraintDefinition]] = {}
+        self._indexes: dict[str, list[IndexDefinition]] = {}
+
+    def table(self, model: type[models.Model]) -> str:
+        """Return the name of the model's shadow table."""
+        return self.tables[model._meta.db_table]
+
+    def _execute(self, sql: str) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql)
+
+    def create(self) -> None:
+        """Create the shadow tables, without constraints and indexes."""
+        quote = self.connection.ops.quote_name
+        for table, shadow in self.tables.items():
+            self._constraints[table] = get_constraint_definitions(table, using=self.using)
+            self._indexes[table] = get_index_definitions(table, using=self.using)
+            logger.info("Creating shadow table %s", shadow)
+            self._execute(f"DROP TABLE IF EXISTS {quote(shadow)}")
+            create_table = (
+                f"CREATE TABLE {quote(shadow)} "
+                f"(LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING IDENTITY)"
+            )
+            if partition_key := get_partition_key(table, using=self.using):
+                # The partitions themselves are created while loading, see YearlyPartitions
+                self._execute(f"{create_table} PARTITION BY {partition_key}")
+                self._execute(
+                    f"CREATE TABLE {quote(_temporary_name(shadow, DEFAULT_PARTITION_SUFFIX))} "
+                    f"PARTITION OF {quote(shadow)} DEFAULT"
+                )
+            else:
+                self._execute(create_table)
+
+    def build_constraints_and_indexes(self) -> None:
+        """Add the live tables' constraints and indexes to the loaded shadow tables."""
+        quote = self.connection.ops.quote_name
+        # Primary keys and unique constraints first, foreign keys need them
+        for table, shadow in self.tables.items():
+            for constraint in self._constraints[table]:
+                if constraint.type == "f":
+                    continue
+                logger.info("Adding constraint %s to %s", constraint.name, shadow)
+                self._execute(
+                    f"ALTER TABLE {quote(shadow)} ADD CONSTRAINT "
+                    f"{quote(_temporary_name(constraint.name, self.suffix))} "
+                    f"{constraint.definition}"
+                )
+
+        for table, shadow in self.tables.items():
+            for constraint in self._constraints[table]:
+                if constraint.type != "f":
+                    continue
+                logger.info("Adding constraint %s to %s", constraint.name, shadow)
+                self._execute(
+                    f"ALTER TABLE {quote(shadow)} ADD CONSTRAINT "
+                    f"{quote(_temporary_name(constraint.name, self.suffix))} "
+                    f"{rewrite_references(constraint.definition, self.tables)}"
+                )
+
+            for index in self._indexes[table]:
+                logger.info("Creating index %s on %s", index.name, shadow)
+                self._execute(
+                    rewrite_index_definition(
+                        index.definition,
+                        name=quote(_temporary_name(index.name, self.suffix)),
+                        table=quote(shadow),
+                    )
+                )
+
+            self._execute(f"ANALYZE {quote(shadow)}")
+
+    def swap(self) -> None:
+        """Replace the live tables by the shadow tables."""
+        quote = self.connection.ops.quote_name
+        live_tables = ", ".join(quote(table) for table in self.tables)
+
+        logger.info("Swapping shadow tables into place")
+        self._execute(f"LOCK TABLE {live_tables} IN ACCESS EXCLUSIVE MODE")
+        self._execute(f"DROP TABLE {live_tables}")
+
+        for table, shadow in self.tables.items():
+            self._execute(f"ALTER TABLE {quote(shadow)} RENAME TO {quote(table)}")
+            for partition in get_partitions(table, using=self.using):
+                if partition.startswith(shadow):
+                    live_partition = _temporary_name(table, partition[len(shadow) :])
+                    self._execute(
+                        f"ALTER TABLE {quote(partition)} RENAME TO {quote(live_partition)}"
+                    )
+            for constraint in self._constraints[table]:
+                self._execute(
+                    f"ALTER TABLE {quote(table)} RENAME CONSTRAINT "
+                    f"{quote(_temporary_name(constraint.name, self.suffix))} "
+                    f"TO {quote(constraint.name)}"
+                )
+            for index in self._indexes[table]:
+                self._execute(
+                    f"ALTER INDEX {quote(_temporary_name(index.name, self.suffix))} "
+                    f"RENAME TO {quote(index.name)}"
+                )
+
+
+class DeferredIndexes:
+    """Drop the foreign keys and secondary indexes of a set of tables during a bulk load.
+
+    While they exist, every inserted row updates each index and checks each foreign
+    key on its own. :meth:`rebuild` creates every index in a single (parallel) sort
+    of the loaded rows, validates each foreign key with a single query and refreshes
+    the planner statistics with ``ANALYZE``.
+
+    Primary keys and unique constraints are kept, the import relies on them. Dropping
+    an index takes an exclusive lock on its table until the transaction ends, so
+    readers of the tables wait for the import to finish.
+    """
+
+    def __init__(
+        self,
+        models_: list[type[models.Model]],
+        using: str = DEFAULT_DB_ALIAS,
+        parallel_workers: int = PARALLEL_MAINTENANCE_WORKERS,
+    ):
+        self.tables = [model._meta.db_table for model in models_]
+        self.using = using
+        self.connection = connections[using]
+        self.parallel_workers = parallel_workers
+        self._foreign_keys: dict[str, list[ConstraintDefinition]] = {}
+        self._indexes: dict[str, list[IndexDefinition]] = {}
+
+    def _execute(self, sql: str, params: list | None = None) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def drop(self) -> None:
+        """Drop the foreign keys and secondary indexes of the tables."""
+        quote = self.connection.ops.quote_name
+        run_pending_constraint_checks(using=self.using)
+        for table in self.tables:
+            self._foreign_keys[table] = [
+                constraint
+                for constraint in get_constraint_definitions(table, using=self.using)
+                if constraint.type == "f"
+            ]
+            self._indexes[table] = get_index_definitions(table, using=self.using)
+
+            for constraint in self._foreign_keys[table]:
+                logger.info("Dropping constraint %s of %s", constraint.name, table)
+                self._execute(
+                    f"ALTER TABLE {quote(table)} DROP CONSTRAINT {quote(constraint.name)}"
+                )
+            for index in self._indexes[table]:
+                logger.info("Dropping index %s of %s", index.name, table)
+                self._execute(f"DROP INDEX {quote(index.name)}")
+
+    def rebuild(self) -> None:
+        """Recreate the dropped indexes and foreign keys and ``ANALYZE`` the tables."""
+        quote = self.connection.ops.quote_name
+        # PostgreSQL builds (B-tree) indexes with parallel workers, within the limits
+        # of max_worker_processes and max_parallel_workers
+        self._execute(
+            "SELECT set_config('max_parallel_maintenance_workers', %s, true)",
+            [str(self.parallel_workers)],
+        )
+
+        for table in self.tables:
+            for index in self._indexes[table]:
+                logger.info("Creating index %s on %s", index.name, table)
+                self._execute(index.definition)
+
+        for table in self.tables:
+            for constraint in self._foreign_keys[table]:
+                logger.info("Adding constraint %s to %s", constraint.name, table)
+                self._execute(
+                    f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(constraint.name)} "
+                    f"{constraint.definition}"
+                )
+
+        for table in self.tables:
+            self._execute(f"ANALYZE {quote(table)}")
+
+
+class YearlyPartitions:
+    """The yearly partitions of a table that is partitioned by range of a timestamp.
+
+    Each year has a partition named ``<table>_y<year>``, which runs from the start
+    of the year (in UTC) to the start of the next. Rows of a year without a partition
+    end up in the ``<table>_default`` partition. :meth:`ensure` creates the partitions
+    of the years that are about to be loaded, so the default partition stays empty.
+
+    Creating a partition locks the whole table exclusively until the transaction
+    ends, so on a table that is being read it should be done in a short transaction
+    of its own.
+
+    A year's rows can be removed by detaching its partition, which leaves them in a
+    table of their own (to archive or drop) without deleting them row by row.
+    """
+
+    def __init__(self, table: str, column: str, using: str = DEFAULT_DB_ALIAS):
+        self.table = table
+        self.column = column
+        self.using = using
+        self.connection = connections[using]
+        self.default = _temporary_name(table, DEFAULT_PARTITION_SUFFIX)
+        self._partitions: set[str] | None = None
+
+    @classmethod
+    def for_table(
+        cls, table: str, column: str, using: str = DEFAULT_DB_ALIAS
+    ) -> "YearlyPartitions | None":
+        """Return the partitions of ``table``, or ``None`` if it isn't partitioned."""
+        if connections[using].vendor != "postgresql":
+            return None
+        if get_partition_key(table, using=using) is None:
+            return None
+        return cls(table, column, using=using)
+
+    def name(self, year: int) -> str:
+        return _temporary_name(self.table, f"_y{year}")
+
+    @property
+    def partitions(self) -> set[str]:
+        if self._partitions is None:
+            self._partitions = set(get_partitions(self.table, using=self.using))
+        return self._partitions
+
+    def years(self) -> list[int]:
+        """Return the years that have a partition of their own."""
+        pattern = re.compile(rf"{re.escape(self.table)}_y(?P<year>\d{{4}})")
+        return sorted(
+            int(match["year"])
+            for partition in self.partitions
+            if (match := pattern.fullmatch(partition))
+        )
+
+    def _execute(self, sql: str) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql)
+
+    def _range(self, year: int) -> tuple[str, str]:
+        return f"'{year:04d}-01-01 00:00:00+00'", f"'{year + 1:04d}-01-01 00:00:00+00'"
+
+    def default_years(self) -> list[int]:
+        """Return the years of the rows in the default partition."""
+        if self.default not in self.partitions:
+            return []
+        quote = self.connection.ops.quote_name
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT DISTINCT EXTRACT(YEAR FROM {quote(self.column)} AT TIME ZONE 'UTC')"
+                f"::integer FROM {quote(self.default)} ORDER BY 1"
+            )
+            return [year for (year,) in cursor.fetchall()]
+
+    def ensure(self, years: Iterable[int]) -> None:
+        """Create the partitions of ``years`` that don't exist yet."""
+        for year in sorted(set(years)):
+            if self.name(year) not in self.partitions:
+                self.create(year)
+
+    def create(self, year: int) -> None:
+        """Create the partition of ``year``.
+
+        If the default partition holds rows of that year, they are moved into the
+        new partition.
+        """
+        quote = self.connection.ops.quote_name
+        table, partition, default = quote(self.table), quote(self.name(year)), quote(self.default)
+        start, end = self._range(year)
+        in_range = f"{quote(self.column)} >= {start} AND {quote(self.column)} < {end}"
+
+        # A table can't be altered while deferred constraint checks are pending
+        run_pending_constraint_checks(using=self.using)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})"
+                if self.default in self.partitions
+                else "SELECT false"
+            )
+            (default_has_rows,) = cursor.fetchone()
+
+        logger.info("Creating partition %s of %s", self.name(year), self.table)
+        create = (
+            f"CREATE TABLE {partition} PARTITION OF {table} FOR VALUES FROM ({start}) TO ({end})"
+        )
+        if not default_has_rows:
+            self._execute(create)
+        else:
+            logger.info("Moving the rows of %s out of %s", year, self.default)
+            columns = ", ".join(quote(column) for column in self._stored_columns())
+            self._execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+            self._execute(create)
+            self._execute(
+                f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {default} WHERE {in_range}"
+            )
+            self._execute(f"DELETE FROM {default} WHERE {in_range}")
+            self._execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+
+        self.partitions.add(self.name(year))
+
+    def detach(self, year: int) -> str:
+        """Detach the partition of ``year`` and return the name of the table it leaves."""
+        quote = self.connection.ops.quote_name
+        name = self.name(year)
+        if name not in self.partitions:
+            raise ValueError(f"{self.table} has no partition for {year}")
+
+        run_pending_constraint_checks(using=self.using)
+        logger.info("Detaching partition %s of %s", name, self.table)
+        self._execute(f"ALTER TABLE {quote(self.table)} DETACH PARTITION {quote(name)}")
+        self.partitions.discard(name)
+        return name
+
+    def _stored_columns(self) -> list[str]:
+        # Generated columns are computed by the table itself and can't be inserted
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT attname FROM pg_attribute
+                WHERE attrelid = %s::regclass
+                AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+                ORDER BY attnum
+                """,
+                [self.table],
+            )
+            return [name for (name,) in cursor.fetchall()]
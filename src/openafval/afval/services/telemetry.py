@@ -0,0 +1,53 @@
+"""OpenTelemetry spans and metrics of the import.
+
+The SDK is configured by ``setup_otel`` (see :mod:`openafval.setup`). When it is
+disabled, the API falls back to no-op implementations that cost next to nothing.
+"""
+
+from opentelemetry import metrics, trace
+from opentelemetry.metrics import Meter
+
+tracer = trace.get_tracer("openafval.afval.import")
+
+
+class ImportMetrics:
+    """The instruments the import records its throughput and resource usage with.
+
+    Rates (rows or bytes per second over time) follow from the counters, the
+    throughput histograms hold the average rate of every import or download.
+    """
+
+    def __init__(self, meter: Meter):
+        self.rows = meter.create_counter(
+            "openafval.import.rows",
+            unit="{row}",
+            description="Number of ledigingen imported.",
+        )
+        self.bytes_downloaded = meter.create_counter(
+            "openafval.import.download.bytes",
+            unit="By",
+            description="Number of bytes downloaded from FTPS.",
+        )
+        self.rows_per_second = meter.create_histogram(
+            "openafval.import.throughput",
+            unit="{row}/s",
+            description="Average number of ledigingen imported per second, per import.",
+        )
+        self.bytes_per_second = meter.create_histogram(
+            "openafval.import.download.throughput",
+            unit="By/s",
+            description="Average number of bytes downloaded per second, per download.",
+        )
+        self.chunk_duration = meter.create_histogram(
+            "openafval.import.chunk.duration",
+            unit="s",
+            description="Time taken to write a chunk of the CSV to the database.",
+        )
+        self.peak_memory = meter.create_gauge(
+            "openafval.import.memory.peak",
+            unit="By",
+            description="Peak resident set size (RSS) of the import, per process kind.",
+        )
+
+
+import_metrics = ImportMetrics(metrics.get_meter("openafval.afval.import"))
@@ -0,0 +1,175 @@
+"""Parsing and preparing CSV chunks for the import.
+
+Everything in here works on plain text and :class:`pandas.DataFrame` objects and
+does not touch the database, so chunks can be prepared in worker processes while
+the importing process writes the previous chunks.
+"""
+
+import io
+import logging
+from collections.abc import Iterator
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import IO
+
+import pandas as pd
+
+from openafval.afval.constants import AfvalTypeChoices
+
+logger = logging.getLogger(__name__)
+
+DTYPE_MAPPING = {
+    "BSN": str,
+    "CONTAINER_ID": str,
+    "FRACTIE_ID": str,
+    "GEWICHT_ONVERDEELD": float,
+    "GEWICHT_VERDEELD": float,
+    "LEDIGING_ID": str,
+    "OBJECTADRES": str,
+    "OBJECT_ID": str,
+    "SLEUTELNUMMER": str,
+    "SUBJECT_ID": str,
+    "SUBJECTNAAM": str,
+    "VERZAMELCONTAINER_J_N": str,
+    "TOTAALKOSTEN_LEDIGING": float,
+}
+
+DATE_COLUMNS: list[str] = []
+
+DATETIME_COLUMNS = [
+    "LEDIGINGSMOMENT",
+]
+
+REQUIRED_COLUMNS = ["BSN", "LEDIGINGSMOMENT", "CONTAINER_ID", "OBJECT_ID", "SUBJECT_ID"]
+
+
+def _map_fractie_id_to_afval_type(fractie_id: str) -> str:
+    """
+    Map FRACTIEID from CSV (which contains waste type) to afval_type choices.
+    """
+    # Handle missing/null values (pandas reads empty cells as NaN/float)
+    if pd.isnull(fractie_id) or not isinstance(fractie_id, str):
+        return AfvalTypeChoices.RESTAFVAL.value
+
+    fractie_id_lower = fractie_id.lower()
+
+    if "gft" in fractie_id_lower or "groen" in fractie_id_lower:
+        return AfvalTypeChoices.GFT.value
+    elif "rest" in fractie_id_lower:
+        return AfvalTypeChoices.RESTAFVAL.value
+    elif "med" in fractie_id_lower:
+        return AfvalTypeChoices.MED.value
+    else:
+        logger.warning("Unknown FRACTIEID %r; defaulting to restafval", fractie_id)
+        return AfvalTypeChoices.RESTAFVAL.value
+
+
+def _map_fractie_ids_to_afval_types(fractie_ids: pd.Series) -> pd.Series:
+    # An export only contains a handful of distinct fracties: map each of them once
+    # and look the whole column up in the result
+    afval_types = {
+        fractie_id: _map_fractie_id_to_afval_type(fractie_id)
+        for fractie_id in fractie_ids.dropna().unique()
+    }
+    return fractie_ids.map(afval_types).fillna(AfvalTypeChoices.RESTAFVAL.value)
+
+
+def _csv_booleans(values: pd.Series) -> pd.Series:
+    # Missing values (NaN) are False
+    unexpected = values.notna() & ~values.isin(["J", "N"])
+    if unexpected.any():
+        raise ValueError(f"Expected J or N, got: {sorted(values[unexpected].unique())}")
+    return values.eq("J")
+
+
+def to_decimals(values: pd.Series, decimal_places: int = 2) -> list[Decimal]:
+    """Convert a float column to :class:`~decimal.Decimal` values with ``decimal_places``.
+
+    Values are rounded half up from their shortest representation, as the database
+    rounds ``Decimal(str(value))``. Only the distinct values are converted, which are
+    few compared to the rows for columns such as kosten.
+    """
+    exponent = Decimal(1).scaleb(-decimal_places)
+    decimals = {
+        value: Decimal(str(value)).quantize(exponent, ROUND_HALF_UP)
+        for value in values.unique().tolist()
+    }
+    return [decimals[value] for value in values.tolist()]
+
+
+def to_datetimes(values: pd.Series) -> list[datetime]:
+    """Convert a datetime column to :class:`~datetime.datetime` objects in one go."""
+    return list(values.array.to_pydatetime())
+
+
+def read_csv(stream: IO[str], chunk_size: int | None = None):
+    """Read the CSV, in chunks of ``chunk_size`` rows if given."""
+    return pd.read_csv(
+        stream,
+        sep=";",
+        dtype=DTYPE_MAPPING,
+        parse_dates=DATE_COLUMNS + DATETIME_COLUMNS,
+        chunksize=chunk_size,
+    )
+
+
+def iter_csv_blocks(stream: IO[str], rows_per_block: int) -> Iterator[str]:
+    """Split the CSV text into blocks of ``rows_per_block`` rows, each with the header.
+
+    Every block is a complete CSV file that can be parsed on its own. A quoted value
+    can contain line breaks, so a row only ends at a line break outside quotes.
+    """
+    header = stream.readline()
+    if not header:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+
+    lines: list[str] = []
+    rows = 0
+    in_quotes = False
+    for line in stream:
+        lines.append(line)
+        if line.count('"') % 2:
+            in_quotes = not in_quotes
+        if in_quotes:
+            continue
+
+        rows += 1
+        if rows == rows_per_block:
+            yield header + "".join(lines)
+            lines = []
+            rows = 0
+
+    if lines:
+        yield header + "".join(lines)
+
+
+def prepare_chunk(chunk_df: pd.DataFrame, required_columns: list[str]) -> pd.DataFrame:
+    """Drop incomplete rows and derive the columns the import writes.
+
+    The chunk is modified in place (and returned for convenience).
+    """
+    chunk_df.dropna(subset=required_columns, inplace=True)
+    if len(chunk_df) == 0:
+        return chunk_df
+
+    # All transforms work on whole columns
+    chunk_df["afval_type"] = _map_fractie_ids_to_afval_types(chunk_df["FRACTIE_ID"])
+    chunk_df["is_verzamelcontainer"] = _csv_booleans(chunk_df["VERZAMELCONTAINER_J_N"])
+    chunk_df["heeft_sleutel"] = chunk_df["SLEUTELNUMMER"].notna() & (
+        chunk_df["SLEUTELNUMMER"] != ""
+    )
+    chunk_df["OBJECTADRES"] = chunk_df["OBJECTADRES"].fillna("")
+    chunk_df["SUBJECTNAAM"] = chunk_df["SUBJECTNAAM"].fillna("")
+
+    # Convert timestamps
+    chunk_df["geleegd_op_utc"] = pd.to_datetime(chunk_df["LEDIGINGSMOMENT"]).dt.tz_localize("UTC")
+
+    # Left unrounded, the database rounds kosten to two decimals as it stores them
+    chunk_df["TOTAALKOSTEN_LEDIGING"] = chunk_df["TOTAALKOSTEN_LEDIGING"].fillna(0)
+    chunk_df["LEDIGING_ID"] = chunk_df["LEDIGING_ID"].fillna("")
+    return chunk_df
+
+
+def parse_and_prepare_block(block: str, required_columns: list[str]) -> pd.DataFrame:
+    """Parse a block from :func:`iter_csv_blocks` and prepare it, in a worker process."""
+    return prepare_chunk(read_csv(io.StringIO(block)), required_columns)
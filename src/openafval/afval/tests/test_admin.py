@@ -1,10 +1,12 @@
+import tempfile
 import uuid
 from datetime import datetime
 from decimal import Decimal
 from zoneinfo import ZoneInfo
 
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.db import connection
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
@@ -12,7 +14,8 @@ from maykin_2fa.test import disable_admin_mfa
 
 from openafval.accounts.tests.factories import UserFactory
 from openafval.afval.admin import KlantAdmin
-from openafval.afval.models import Klant
+from openafval.afval.constants import ImportJobStatusChoices
+from openafval.afval.models import ImportJob, Klant, Lediging
 from openafval.afval.profiel_display import format_afval_profiel
 
 from .factories import (
@@ -194,6 +197,68 @@ class AfvalProfielViewTest(TestCase):
         self.assertEqual(response.status_code, 403)
 
 
+@disable_admin_mfa()
+class ImportCSVViewTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        private_media = tempfile.TemporaryDirectory()
+        self.addCleanup(private_media.cleanup)
+        settings_override = override_settings(PRIVATE_MEDIA_ROOT=private_media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.superuser = UserFactory.create(superuser=True)
+        self.client.force_login(self.superuser)
+
+    def test_upload_schedules_an_import_job(self):
+        csv_file = SimpleUploadedFile("export.csv", b"SUBJECT_ID;BSN\n", content_type="text/csv")
+
+        response = self.client.post(
+            reverse("admin:afval_lediging_import_csv"), {"csv_file": csv_file}
+        )
+
+        job = ImportJob.objects.get()
+        self.assertRedirects(response, reverse("admin:afval_importjob_change", args=[job.pk]))
+        self.assertEqual(job.status, ImportJobStatusChoices.PENDING)
+        self.assertEqual(job.bestandsnaam, "export.csv")
+        self.assertEqual(job.bestandsgrootte, 15)
+        self.assertEqual(job.aangemaakt_door, self.superuser)
+        # The import itself is left to the run_import_jobs worker
+        self.assertFalse(Lediging.objects.exists())
+
+    def test_job_page_polls_its_progress(self):
+        job = ImportJob.objects.create(
+            bestandsnaam="export.csv",
+            bestandsgrootte=1000,
+            status=ImportJobStatusChoices.RUNNING,
+            gestart_op=datetime(2026, 1, 15, 10, 30, tzinfo=TZ),
+            bytes_gelezen=500,
+            rijen_gelezen=20,
+            rijen_geimporteerd=10,
+        )
+        progress_url = reverse("admin:afval_importjob_progress", args=[job.pk])
+
+        page = self.client.get(reverse("admin:afval_importjob_change", args=[job.pk]))
+        response = self.client.get(progress_url)
+
+        self.assertContains(page, progress_url)
+        self.assertEqual(response.status_code, 200)
+        progress = response.json()
+        self.assertEqual(progress["status"], "running")
+        self.assertEqual(progress["rijen_gelezen"], 20)
+        self.assertEqual(progress["rijen_geimporteerd"], 10)
+        self.assertEqual(progress["voortgang"], 0.5)
+        self.assertIsNotNone(progress["resterende_seconden"])
+
+    def test_progress_requires_view_permission(self):
+        job = ImportJob.objects.create(bestandsnaam="export.csv")
+        self.client.force_login(UserFactory.create(is_staff=True))
+
+        response = self.client.get(reverse("admin:afval_importjob_progress", args=[job.pk]))
+
+        self.assertEqual(response.status_code, 403)
+
+
 class FormatAfvalProfielTest(TestCase):
     def test_groups_by_location_then_container_with_totals(self):
         klant = KlantFactory.create()
@@ -1,11 +1,49 @@
+import dataclasses
 from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.html import escape
 
+import orjson
+from djangorestframework_camel_case.render import (
+    CamelCaseBrowsableAPIRenderer,
+    CamelCaseJSONRenderer,
+)
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 
+from openafval.afval.api.pagination import LedigingCursorPagination
+from openafval.afval.api.renderers import (
+    AfvalProfielJSONRenderer,
+    render_afval_profiel,
+    stream_afval_profiel,
+)
+from openafval.afval.api.serializers import (
+    AfvalProfielSerializer,
+    PaginatedAfvalProfielSerializer,
+)
+from openafval.afval.api.views import AfvalProfielAPIView
+from openafval.afval.cache import (
+    afval_profiel_cache_key,
+    bump_import_generation,
+    get_import_generation,
+)
+from openafval.afval.management.commands.benchmark_profiel_rendering import (
+    synthetic_afval_profiel,
+)
+from openafval.afval.services.aggregates import refresh_lediging_totalen
+from openafval.afval.services.import_services import import_from_csv_stream
+from openafval.api.tests.factories import TokenAuthFactory
 from openafval.api.tests.mixins import TokenAuthMixin
 
 from .factories import (
@@ -14,11 +52,16 @@ from .factories import (
     KlantFactory,
     LedigingFactory,
 )
+from .test_import import CSV_HEADER
 
 TZ_LOCAL = "Europe/Amsterdam"
 
 
 class AfvalProfielAPITest(TokenAuthMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(cache.clear)
+
     def test_missing_credentials(self):
         self.client.credentials(HTTP_AUTHORIZATION="")
         response = self.client.get(reverse("api:afval-profiel", kwargs={"bsn": "123456789"}))
@@ -629,6 +672,7 @@ class AfvalProfielAPITest(TokenAuthMixin, APITestCase):
 class AfvalProfielFilterValidationTest(TokenAuthMixin, APITestCase):
     def setUp(self):
         super().setUp()
+        self.addCleanup(cache.clear)
         self.klant = KlantFactory.create(bsn="123456789")
         self.url = reverse("api:afval-profiel", kwargs={"bsn": "123456789"})
 
@@ -647,6 +691,14 @@ class AfvalProfielFilterValidationTest(TokenAuthMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("afval-type", response.json())
 
+    def test_unknown_klant_with_invalid_params_is_not_found(self):
+        url = reverse("api:afval-profiel", kwargs={"bsn": "999999999"})
+        for params in [{"startdatum": "notadate"}, {"pageSize": "0"}, {"stream": "maybe"}]:
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_multiple_invalid_params_all_reported(self):
         response = self.client.get(
             self.url, {"startdatum": "bad", "einddatum": "alsobad", "afval-type": "plastic"}
@@ -663,3 +715,633 @@ class AfvalProfielFilterValidationTest(TokenAuthMixin, APITestCase):
             {"startdatum": "2026-01-01", "einddatum": "2026-12-31", "afval-type": "gft"},
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class AfvalProfielCacheTest(TokenAuthMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(cache.clear)
+        self.klant = KlantFactory.create(bsn="123456789")
+        LedigingFactory.create(klant=self.klant, container__afval_type="gft")
+        self.url = reverse("api:afval-profiel", kwargs={"bsn": "123456789"})
+
+    def test_profiel_is_served_from_the_cache(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.json()["ledigingen"]), 1)
+        LedigingFactory.create(klant=self.klant)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["ledigingen"]), 1)
+        self.assertFalse(
+            any("afval_lediging" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_new_import_generation_invalidates_the_cache(self):
+        self.client.get(self.url)
+        LedigingFactory.create(klant=self.klant)
+
+        bump_import_generation()
+        response = self.client.get(self.url)
+
+        self.assertEqual(len(response.json()["ledigingen"]), 2)
+
+    def test_filters_are_part_of_the_cache_key(self):
+        self.client.get(self.url)
+
+        response = self.client.get(self.url, {"afval-type": "med"})
+
+        self.assertEqual(response.json()["containers"], [])
+
+    def test_cache_key_is_normalized(self):
+        self.assertEqual(
+            afval_profiel_cache_key("123456789", adressen=["Straat 1", "Laan 2", "Laan 2"]),
+            afval_profiel_cache_key("123456789", adressen=["Laan 2", "Straat 1"]),
+        )
+        self.assertEqual(
+            afval_profiel_cache_key("123456789", startdatum="2026-1-5", afval_type=""),
+            afval_profiel_cache_key("123456789", startdatum="2026-01-05"),
+        )
+        self.assertNotEqual(
+            afval_profiel_cache_key("123456789"), afval_profiel_cache_key("987654321")
+        )
+        self.assertNotIn("123456789", afval_profiel_cache_key("123456789"))
+
+    def test_import_starts_a_new_generation_on_commit(self):
+        generation = get_import_generation()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            import_from_csv_stream(StringIO(CSV_HEADER))
+            self.assertEqual(get_import_generation(), generation)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertGreater(get_import_generation(), generation)
+
+    def test_lost_generation_starts_a_new_one(self):
+        generation = get_import_generation()
+        self.assertEqual(get_import_generation(), generation)
+
+        cache.clear()
+
+        self.assertNotEqual(get_import_generation(), generation)
+
+
+class AfvalProfielConditionalRequestTest(TokenAuthMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(cache.clear)
+        klant = KlantFactory.create(bsn="123456789")
+        LedigingFactory.create(klant=klant)
+        self.url = reverse("api:afval-profiel", kwargs={"bsn": "123456789"})
+
+    def test_response_has_validators(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.headers["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response.headers)
+        self.assertIn("no-cache", response.headers["Cache-Control"])
+        self.assertIn("private", response.headers["Cache-Control"])
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get(self.url).headers["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        self.assertFalse(
+            any(
+                "afval_lediging" in query["sql"] or "afval_klant" in query["sql"]
+                for query in queries.captured_queries
+            )
+        )
+
+    def test_unmodified_since_last_modified(self):
+        last_modified = self.client.get(self.url).headers["Last-Modified"]
+
+        response = self.client.get(self.url, headers={"if-modified-since": last_modified})
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_depends_on_the_filters(self):
+        etag = self.client.get(self.url).headers["ETag"]
+
+        response = self.client.get(
+            self.url, {"startdatum": "2026-01-01"}, headers={"if-none-match": etag}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_import_changes_the_etag(self):
+        etag = self.client.get(self.url).headers["ETag"]
+
+        bump_import_generation()
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_unknown_klant_is_not_found(self):
+        response = self.client.get(
+            reverse("api:afval-profiel", kwargs={"bsn": "999999999"}),
+            headers={"if-none-match": "*"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AfvalProfielPaginationTest(TokenAuthMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(cache.clear)
+        self.klant = KlantFactory.create(bsn="123456789")
+        self.container = ContainerFactory.create(afval_type="gft")
+        self.location = ContainerLocationFactory.create(adres="Straat 1")
+        tz = ZoneInfo(TZ_LOCAL)
+        # Two pairs emptied at the same moment, to page through ties
+        self.ledigingen = [
+            LedigingFactory.create(
+                klant=self.klant,
+                container=self.container,
+                container_location=self.location,
+                geleegd_op=datetime(2026, 1, day, 8, 0, tzinfo=tz),
+                kosten=1,
+            )
+            for day in (1, 2, 2, 3, 3)
+        ]
+        # As the import would
+        refresh_lediging_totalen()
+        self.url = reverse("api:afval-profiel", kwargs={"bsn": "123456789"})
+        self.ledigingen_url = reverse("api:afval-profiel-ledigingen", kwargs={"bsn": "123456789"})
+
+    def _ordered_ids(self):
+        ledigingen = sorted(self.ledigingen, key=lambda led: (led.geleegd_op, led.id), reverse=True)
+        return [str(lediging.id) for lediging in ledigingen]
+
+    def _page_through(self, url, params=None):
+        ids = []
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [lediging["id"] for lediging in response.json()["results"]]
+            url, params = response.json()["next"], None
+        return ids
+
+    def test_profiel_without_page_size_has_all_ledigingen(self):
+        data = self.client.get(self.url).json()
+
+        self.assertEqual(len(data["ledigingen"]), 5)
+        self.assertNotIn("ledigingenNext", data)
+
+    def test_profiel_with_page_size_has_the_first_page(self):
+        response = self.client.get(self.url, {"page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["klant"]["totaalKosten"], 5.0)
+        self.assertEqual(data["containers"][0]["totaalKosten"], 5.0)
+        self.assertEqual(data["containerLocaties"][0]["totaalKosten"], 5.0)
+        self.assertEqual(
+            [lediging["id"] for lediging in data["ledigingen"]], self._ordered_ids()[:2]
+        )
+        self.assertIn(self.ledigingen_url, data["ledigingenNext"])
+
+    def test_profiel_pages_through_all_ledigingen(self):
+        data = self.client.get(self.url, {"page_size": 2}).json()
+
+        ids = [lediging["id"] for lediging in data["ledigingen"]]
+        ids += self._page_through(data["ledigingenNext"])
+
+        self.assertEqual(ids, self._ordered_ids())
+
+    def test_ledigingen_pages_through_all_ledigingen(self):
+        for page_size in (1, 2, 3, 5, 10):
+            with self.subTest(page_size=page_size):
+                ids = self._page_through(self.ledigingen_url, {"page_size": page_size})
+
+                self.assertEqual(ids, self._ordered_ids())
+
+    def test_ledigingen_are_filtered_like_the_profiel(self):
+        LedigingFactory.create(klant=self.klant, container__afval_type="restafval")
+        LedigingFactory.create(klant=self.klant, container=self.container)
+        LedigingFactory.create(
+            klant=self.klant,
+            container=self.container,
+            container_location=self.location,
+            geleegd_op=datetime(2025, 12, 31, 8, 0, tzinfo=ZoneInfo(TZ_LOCAL)),
+        )
+        LedigingFactory.create(container=self.container, container_location=self.location)
+
+        ids = self._page_through(
+            self.ledigingen_url,
+            {"page_size": 2, "afval-type": "gft", "adres": "Straat 1", "startdatum": "2026-01-01"},
+        )
+
+        self.assertEqual(ids, self._ordered_ids())
+
+    def test_next_link_keeps_the_filters(self):
+        data = self.client.get(self.url, {"page_size": 2, "afval-type": "gft"}).json()
+
+        self.assertIn("afval-type=gft", data["ledigingenNext"])
+
+    def test_page_size_is_part_of_the_cache_key(self):
+        self.client.get(self.url, {"page_size": 2})
+
+        data = self.client.get(self.url, {"page_size": 3}).json()
+
+        self.assertEqual(len(data["ledigingen"]), 3)
+
+    @override_settings(ALLOWED_HOSTS=["api.example.com", "intern.example.com"])
+    def test_next_link_is_cached_per_host(self):
+        for host in ("api.example.com", "intern.example.com"):
+            with self.subTest(host=host):
+                data = self.client.get(self.url, {"page_size": 2}, HTTP_HOST=host).json()
+
+                self.assertTrue(data["ledigingenNext"].startswith(f"http://{host}/"))
+
+    def test_invalid_page_size_returns_400(self):
+        for url in (self.url, self.ledigingen_url):
+            for page_size in ("0", "-1", "veel", ""):
+                with self.subTest(url=url, page_size=page_size):
+                    response = self.client.get(url, {"page_size": page_size})
+
+                    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                    self.assertIn("pageSize", response.json())
+
+    def test_page_size_is_at_most_the_maximum(self):
+        with patch.object(LedigingCursorPagination, "max_page_size", 2):
+            for url, key in ((self.url, "ledigingen"), (self.ledigingen_url, "results")):
+                with self.subTest(url=url):
+                    data = self.client.get(url, {"page_size": 3}).json()
+
+                    self.assertEqual(len(data[key]), 2)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(self.ledigingen_url, {"cursor": "nonsense"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_ledigingen_of_unknown_klant_not_found(self):
+        response = self.client.get(
+            reverse("api:afval-profiel-ledigingen", kwargs={"bsn": "999999999"})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RenderAfvalProfielTest(SimpleTestCase):
+    def _profiel(self, **lediging):
+        profiel = synthetic_afval_profiel(50)
+        profiel.ledigingen[0] = dataclasses.replace(profiel.ledigingen[0], **lediging)
+        return profiel
+
+    def _render_with_serializer(self, serializer):
+        return CamelCaseJSONRenderer().render(serializer.data)
+
+    def test_renders_as_the_serializers(self):
+        profiel = synthetic_afval_profiel(200)
+
+        self.assertEqual(
+            render_afval_profiel(profiel),
+            self._render_with_serializer(AfvalProfielSerializer(profiel)),
+        )
+
+    def test_renders_as_the_serializers_with_edge_cases(self):
+        tz = ZoneInfo(TZ_LOCAL)
+        cases = {
+            "utc": {"geleegd_op": datetime(2026, 1, 1, 8, 0, tzinfo=ZoneInfo("UTC"))},
+            "summer time": {"geleegd_op": datetime(2026, 7, 1, 8, 0, tzinfo=tz)},
+            "microseconds": {"geleegd_op": datetime(2026, 1, 1, 8, 0, 0, 5, tzinfo=tz)},
+            "zero": {"gewicht": 0.0, "kosten": Decimal("0")},
+            "many decimals": {"kosten": Decimal("1.005")},
+            "integer gewicht": {"gewicht": 12},
+            "tiny gewicht": {"gewicht": 0.00001},
+            "huge gewicht": {"gewicht": 1e17},
+        }
+        for label, lediging in cases.items():
+            with self.subTest(label):
+                profiel = self._profiel(**lediging)
+
+                self.assertEqual(
+                    render_afval_profiel(profiel),
+                    self._render_with_serializer(AfvalProfielSerializer(profiel)),
+                )
+
+    def test_renders_text_as_the_serializers(self):
+        profiel = synthetic_afval_profiel(1)
+        profiel.klant.naam = 'Klant "\\ \x01\n\u2028\u2029 é 😀'
+        profiel.container_locaties[0].adres = "Straat 1"
+
+        self.assertEqual(
+            render_afval_profiel(profiel),
+            self._render_with_serializer(AfvalProfielSerializer(profiel)),
+        )
+
+    def test_renders_a_page_as_the_serializers(self):
+        profiel = synthetic_afval_profiel(10)
+
+        for ledigingen_next in ("https://example.com/?cursor=abc", None):
+            with self.subTest(ledigingen_next=ledigingen_next):
+                self.assertEqual(
+                    render_afval_profiel(profiel, ledigingen_next=ledigingen_next),
+                    self._render_with_serializer(
+                        PaginatedAfvalProfielSerializer(
+                            {**dataclasses.asdict(profiel), "ledigingen_next": ledigingen_next}
+                        )
+                    ),
+                )
+
+    def test_streams_as_rendered(self):
+        profiel = self._profiel(gewicht=0.00001)
+        ledigingen = profiel.ledigingen
+
+        for chunks in ([], [ledigingen], [ledigingen[:1], [], ledigingen[1:20], ledigingen[20:]]):
+            with self.subTest(chunks=len(chunks)):
+                expected = render_afval_profiel(
+                    dataclasses.replace(profiel, ledigingen=[led for c in chunks for led in c])
+                )
+
+                self.assertEqual(b"".join(stream_afval_profiel(profiel, chunks)), expected)
+
+    def test_benchmark_command(self):
+        stdout = StringIO()
+
+        call_command("benchmark_profiel_rendering", "--ledigingen", "100", stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertIn("serializers:", output)
+        self.assertIn("direct:", output)
+        self.assertIn("faster", output)
+
+
+class AfvalProfielStreamingTest(TokenAuthMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(cache.clear)
+        self.klant = KlantFactory.create(bsn="123456789")
+        tz = ZoneInfo(TZ_LOCAL)
+        for day in range(1, 8):
+            LedigingFactory.create(klant=self.klant, geleegd_op=datetime(2026, 1, day, tzinfo=tz))
+        refresh_lediging_totalen()
+        self.url = reverse("api:afval-profiel", kwargs={"bsn": "123456789"})
+
+    def test_streams_the_same_content(self):
+        for params in [{}, {"afval-type": "gft"}, {"startdatum": "2026-01-03"}]:
+            with self.subTest(params=params):
+                expected = self.client.get(self.url, params).content
+                cache.clear()
+
+                response = self.client.get(self.url, {**params, "stream": "true"})
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertTrue(response.streaming)
+                self.assertEqual(b"".join(response.streaming_content), expected)
+
+    @patch("openafval.afval.api.views.STREAM_CHUNK_SIZE", 3)
+    def test_streams_the_ledigingen_in_chunks(self):
+        expected = self.client.get(self.url).content
+        cache.clear()
+
+        response = self.client.get(self.url, {"stream": "true"})
+
+        chunks = list(response.streaming_content)
+        # The profiel, three chunks of ledigingen and the end
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(b"".join(chunks), expected)
+
+    def test_streamed_profiel_is_not_cached(self):
+        response = self.client.get(self.url, {"stream": "true"})
+        b"".join(response.streaming_content)
+        LedigingFactory.create(klant=self.klant)
+
+        data = self.client.get(self.url).json()
+
+        self.assertEqual(len(data["ledigingen"]), 8)
+
+    def test_cached_profiel_is_served_instead(self):
+        expected = self.client.get(self.url).content
+
+        response = self.client.get(self.url, {"stream": "true"})
+
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content, expected)
+
+    def test_streamed_profiel_has_validators(self):
+        etag = self.client.get(self.url).headers["ETag"]
+        cache.delete(afval_profiel_cache_key("123456789"))
+
+        response = self.client.get(self.url, {"stream": "true"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response.headers["ETag"], etag)
+
+        response = self.client.get(self.url, {"stream": "true"}, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_stream_with_page_size_returns_400(self):
+        response = self.client.get(self.url, {"stream": "true", "page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("stream", response.json())
+
+    def test_stream_false_with_page_size_is_accepted(self):
+        response = self.client.get(self.url, {"stream": "false", "page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["ledigingen"]), 2)
+
+    def test_invalid_stream_returns_400(self):
+        response = self.client.get(self.url, {"stream": "misschien"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AfvalProfielenAPITest(TokenAuthMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(cache.clear)
+        self.url = reverse("api:afval-profielen")
+        self.klanten = [KlantFactory.create(bsn=bsn) for bsn in ("111111111", "222222222")]
+        location = ContainerLocationFactory.create(adres="Straat 1")
+        for klant in self.klanten:
+            for afval_type in ("gft", "restafval"):
+                LedigingFactory.create_batch(
+                    2, klant=klant, container__afval_type=afval_type, container_location=location
+                )
+        self.zonder_ledigingen = KlantFactory.create(bsn="333333333")
+
+    def _profielen(self, response) -> dict[str, bytes]:
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.headers["Content-Type"], "application/x-ndjson")
+        content = b"".join(response.streaming_content)
+        self.assertTrue(content.endswith(b"\n"))
+        lines = content.splitlines(keepends=True)
+        return {orjson.loads(line)["klant"]["bsn"]: line for line in lines}
+
+    def _profiel(self, bsn: str, params=None) -> bytes:
+        cache.clear()
+        return self.client.get(reverse("api:afval-profiel", kwargs={"bsn": bsn}), params).content
+
+    def test_returns_the_profielen_as_ndjson(self):
+        response = self.client.post(
+            self.url, {"bsns": ["111111111", "222222222", "333333333"]}, format="json"
+        )
+
+        profielen = self._profielen(response)
+        self.assertEqual(set(profielen), {"111111111", "222222222", "333333333"})
+        for bsn, line in profielen.items():
+            with self.subTest(bsn=bsn):
+                self.assertEqual(line, self._profiel(bsn) + b"\n")
+
+    def test_filters_the_profielen(self):
+        response = self.client.post(
+            self.url,
+            {
+                "bsns": ["111111111", "222222222"],
+                "afvalType": "gft",
+                "adressen": ["Straat 1"],
+                "startdatum": "2000-01-01",
+                "einddatum": "2100-12-31",
+            },
+            format="json",
+        )
+
+        profielen = self._profielen(response)
+        params = {
+            "afval-type": "gft",
+            "adres": "Straat 1",
+            "startdatum": "2000-01-01",
+            "einddatum": "2100-12-31",
+        }
+        for bsn, line in profielen.items():
+            with self.subTest(bsn=bsn):
+                self.assertEqual(line, self._profiel(bsn, params) + b"\n")
+
+    def test_unknown_and_duplicate_bsns(self):
+        response = self.client.post(
+            self.url, {"bsns": ["111111111", "999999999", "111111111"]}, format="json"
+        )
+
+        self.assertEqual(list(self._profielen(response)), ["111111111"])
+
+    @patch("openafval.afval.api.views.BULK_BATCH_SIZE", 2)
+    def test_profielen_are_built_per_batch(self):
+        response = self.client.post(
+            self.url, {"bsns": ["111111111", "222222222", "333333333"]}, format="json"
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            profielen = self._profielen(response)
+
+        self.assertEqual(len(profielen), 3)
+        # The klanten, their containers and locations and their ledigingen, per batch
+        self.assertEqual(len(queries), 6)
+
+    def test_invalid_request_returns_400(self):
+        for body in [
+            {},
+            {"bsns": []},
+            {"bsns": ["12345"]},
+            {"bsns": ["111111111"], "afvalType": "papier"},
+            {"bsns": ["111111111"], "startdatum": "gisteren"},
+        ]:
+            with self.subTest(body=body):
+                response = self.client.post(self.url, body, format="json")
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_missing_credentials(self):
+        self.client.credentials(HTTP_AUTHORIZATION="")
+
+        response = self.client.post(self.url, {"bsns": ["111111111"]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@skipUnless(connection.vendor == "postgresql", "Snapshots are only checked on PostgreSQL")
+class AfvalProfielStreamingSnapshotTest(APITransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        token_auth = TokenAuthFactory.create()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token_auth.token}")
+        self.addCleanup(cache.clear)
+        self.klant = KlantFactory.create(bsn="123456789")
+        self.ledigingen = LedigingFactory.create_batch(3, klant=self.klant)
+        refresh_lediging_totalen()
+        self.url = reverse("api:afval-profiel", kwargs={"bsn": "123456789"})
+
+    def test_streams_the_totals_and_ledigingen_of_one_snapshot(self):
+        response = self.client.get(self.url, {"stream": "true"})
+        chunks = iter(response.streaming_content)
+        # The totals come first
+        content = next(chunks)
+
+        # An import commits while the ledigingen are still to be streamed
+        other = connection.get_new_connection(connection.get_connection_params())
+        try:
+            other.execute("DELETE FROM afval_lediging WHERE id = %s", [self.ledigingen[0].pk])
+            other.commit()
+        finally:
+            other.close()
+
+        data = orjson.loads(content + b"".join(chunks))
+        self.assertEqual(len(data["ledigingen"]), 3)
+        self.assertEqual(
+            data["klant"]["totaalKosten"],
+            float(sum(lediging.kosten for lediging in self.ledigingen)),
+        )
+
+
+class AfvalProfielContentNegotiationTest(TokenAuthMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(cache.clear)
+        self.klant = KlantFactory.create(bsn="123456789")
+        LedigingFactory.create_batch(3, klant=self.klant)
+        refresh_lediging_totalen()
+        self.url = reverse("api:afval-profiel", kwargs={"bsn": "123456789"})
+
+    def test_json_format_is_rendered_as_is(self):
+        expected = self.client.get(self.url).content
+
+        for params in [{}, {"stream": "true"}]:
+            with self.subTest(params=params):
+                response = self.client.get(self.url, {**params, "format": "json"})
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.headers["Content-Type"], "application/json")
+                self.assertEqual(response.content, expected)
+
+    def test_unknown_format_is_not_found(self):
+        response = self.client.get(self.url, {"format": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unacceptable_media_type(self):
+        response = self.client.get(self.url, headers={"accept": "application/xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+    @patch.object(
+        AfvalProfielAPIView,
+        "renderer_classes",
+        [AfvalProfielJSONRenderer, CamelCaseBrowsableAPIRenderer],
+    )
+    def test_browsable_api_renders_the_whole_profiel(self):
+        data = self.client.get(self.url).json()
+        cache.clear()
+
+        response = self.client.get(self.url, {"stream": "true"}, headers={"accept": "text/html"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.streaming)
+        self.assertTrue(response.headers["Content-Type"].startswith("text/html"))
+        content = response.content.decode()
+        self.assertIn(escape('"totaalKosten": {}'.format(data["klant"]["totaalKosten"])), content)
+        for lediging in data["ledigingen"]:
+            self.assertIn(escape('"id": "{}"'.format(lediging["id"])), content)
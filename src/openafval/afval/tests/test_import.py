@@ -1,15 +1,85 @@
+import hashlib
+import math
 import os
 import tempfile
-from io import StringIO
+import uuid
+import zipfile
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from ftplib import error_perm
+from io import BytesIO, StringIO, UnsupportedOperation
 from pathlib import Path
+from unittest import skipIf, skipUnless
 from unittest.mock import patch
 
 from django.core.management import call_command
 from django.core.management.base import CommandError
-from django.test import TestCase
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
 
-from openafval.afval.models import Container, ContainerLocation, Klant, Lediging
-from openafval.afval.services.import_services import import_from_csv_stream
+import numpy as np
+import pandas as pd
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from openafval.afval.cache import get_import_generation
+from openafval.afval.models import (
+    Container,
+    ContainerLocation,
+    ImportRun,
+    Klant,
+    Lediging,
+    LedigingTotaal,
+)
+from openafval.afval.services import telemetry
+from openafval.afval.services.exceptions import CSVImportError
+from openafval.afval.services.import_services import (
+    FTP_MAX_RETRIES,
+    ImportMode,
+    _open_csv_from_zip,
+    import_from_csv_stream,
+    import_from_file,
+    import_from_ftps_path,
+)
+from openafval.afval.services.key_index import KeyIndex
+from openafval.afval.services.loaders import (
+    CopyLedigingLoader,
+    LedigingLoader,
+    OrmLedigingLoader,
+    get_lediging_loader,
+)
+from openafval.afval.services.postgres import (
+    ShadowTables,
+    YearlyPartitions,
+    get_constraint_definitions,
+    get_index_definitions,
+    get_partitions,
+)
+from openafval.afval.services.transforms import (
+    REQUIRED_COLUMNS,
+    iter_csv_blocks,
+    prepare_chunk,
+    read_csv,
+    to_datetimes,
+    to_decimals,
+)
+
+from .factories import (
+    ContainerFactory,
+    ContainerLocationFactory,
+    KlantFactory,
+    LedigingFactory,
+)
+
+CSV_HEADER = (
+    "SUBJECT_ID;BSN;SUBJECTNAAM;OBJECT_ID;OBJECTADRES;CONTAINER_ID;"
+    "SLEUTELNUMMER;VERZAMELCONTAINER_J_N;FRACTIE_ID;LEDIGING_ID;"
+    "GEWICHT_ONVERDEELD;GEWICHT_VERDEELD;LEDIGINGSMOMENT;TOTAALKOSTEN_LEDIGING"
+)
 
 
 class ImportFromCSVStreamTest(TestCase):
@@ -137,6 +207,67 @@ class ImportFromCSVStreamTest(TestCase):
         self.assertEqual(lediging.container_location, location)
         self.assertEqual(lediging.container, container)
 
+    def test_import_from_non_seekable_stream(self):
+        """The CSV is read in a single pass, so pipes and HTTP bodies can be imported."""
+
+        class NonSeekableStream(StringIO):
+            def seekable(self):
+                return False
+
+            def seek(self, *args):
+                raise UnsupportedOperation("seek")
+
+        csv_rows = [
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+            "SUBJ002;987654321;Piet Pietersen;OBJ002;Laan 2;CONT002;;"
+            "J;Restafval;LED002;20.0;20.0;2024-01-16 14:45:00;7.00",
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT003;KEY002;"
+            "N;GFT;LED003;15.0;15.0;2024-01-17 09:00:00;5.25",
+        ]
+
+        import_from_csv_stream(NonSeekableStream("\n".join([CSV_HEADER, *csv_rows])), chunk_size=1)
+
+        self.assertEqual(Klant.objects.count(), 2)
+        self.assertEqual(ContainerLocation.objects.count(), 2)
+        self.assertEqual(Container.objects.count(), 3)
+        self.assertEqual(Lediging.objects.count(), 3)
+        self.assertEqual(Lediging.objects.filter(klant__subject_id="SUBJ001").count(), 2)
+
+    def test_first_occurrence_determines_entity_attributes(self):
+        csv_rows = [
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+            "SUBJ001;123456782;J. Jansen;OBJ001;Straat 1a;CONT001;;"
+            "J;Restafval;LED002;20.0;20.0;2024-01-16 14:45:00;7.00",
+        ]
+
+        for chunk_size in (1, 10):
+            with self.subTest(chunk_size=chunk_size):
+                import_from_csv_stream(
+                    StringIO("\n".join([CSV_HEADER, *csv_rows])), chunk_size=chunk_size
+                )
+
+                self.assertEqual(Klant.objects.get().naam, "Jan Jansen")
+                self.assertEqual(ContainerLocation.objects.get().adres, "Straat 1")
+                container = Container.objects.get()
+                self.assertEqual(container.afval_type, "gft")
+                self.assertTrue(container.heeft_sleutel)
+
+    def test_import_reports_peak_memory_usage(self):
+        csv_data = "\n".join(
+            [
+                CSV_HEADER,
+                "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+                "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+            ]
+        )
+
+        with self.assertLogs("openafval.afval.services.import_services", "INFO") as logs:
+            import_from_csv_stream(StringIO(csv_data))
+
+        self.assertTrue(any("peak memory usage (RSS)" in line for line in logs.output))
+
     def test_import_missing_kosten_defaults_to_zero(self):
         """Test that rows with a missing TOTAALKOSTEN_LEDIGING value default to 0."""
         csv_header = (
@@ -156,6 +287,1286 @@ class ImportFromCSVStreamTest(TestCase):
         self.assertEqual(lediging.kosten, 0)
 
 
+class IncrementalImportTest(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        rows = [
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+            "SUBJ002;987654321;Piet Pietersen;OBJ002;Laan 2;CONT002;;"
+            "J;Restafval;LED002;20.0;20.0;2024-01-16 14:45:00;7.00",
+        ]
+        import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *rows])))
+
+    def test_full_import_stores_external_ids(self):
+        self.assertCountEqual(
+            Klant.objects.values_list("subject_id", flat=True), ["SUBJ001", "SUBJ002"]
+        )
+        self.assertCountEqual(
+            ContainerLocation.objects.values_list("object_id", flat=True), ["OBJ001", "OBJ002"]
+        )
+        self.assertCountEqual(
+            Lediging.objects.values_list("lediging_id", flat=True), ["LED001", "LED002"]
+        )
+
+    def test_incremental_import_inserts_new_and_updates_changed_rows(self):
+        unchanged = Lediging.objects.get(lediging_id="LED001")
+        changed = Lediging.objects.get(lediging_id="LED002")
+        klant_pk = Klant.objects.get(subject_id="SUBJ002").pk
+
+        rows = [
+            # unchanged
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+            # changed weight, cost and klant name
+            "SUBJ002;987654321;Piet Pieterse;OBJ002;Laan 2;CONT002;;"
+            "J;Restafval;LED002;22.0;22.0;2024-01-16 14:45:00;7.70",
+            # new lediging for a new container
+            "SUBJ002;987654321;Piet Pieterse;OBJ002;Laan 2;CONT003;;"
+            "N;GFT;LED003;5.0;5.0;2024-01-17 09:00:00;1.25",
+        ]
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *rows])), mode=ImportMode.INCREMENTAL
+        )
+
+        self.assertEqual(Lediging.objects.count(), 3)
+        self.assertEqual(Container.objects.count(), 3)
+        self.assertEqual(Klant.objects.count(), 2)
+
+        # Existing rows keep their primary keys
+        klant = Klant.objects.get(subject_id="SUBJ002")
+        self.assertEqual(klant.pk, klant_pk)
+        self.assertEqual(klant.naam, "Piet Pieterse")
+
+        unchanged.refresh_from_db()
+        self.assertEqual(unchanged.gewicht, 10.5)
+        changed_gewijzigd_op = changed.gewijzigd_op
+        changed.refresh_from_db()
+        self.assertEqual(changed.gewicht, 22.0)
+        self.assertEqual(changed.kosten, Decimal("7.70"))
+        self.assertGreater(changed.gewijzigd_op, changed_gewijzigd_op)
+
+        new = Lediging.objects.get(lediging_id="LED003")
+        self.assertEqual(new.klant, klant)
+        self.assertEqual(new.container.public_container_id, "CONT003")
+
+    def test_incremental_import_keeps_missing_rows_by_default(self):
+        rows = [
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+        ]
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *rows])), mode=ImportMode.INCREMENTAL
+        )
+
+        self.assertEqual(Lediging.objects.count(), 2)
+        self.assertEqual(Klant.objects.count(), 2)
+
+    def test_incremental_import_deletes_missing_rows(self):
+        rows = [
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+        ]
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *rows])),
+            mode=ImportMode.INCREMENTAL,
+            delete_missing=True,
+        )
+
+        self.assertQuerySetEqual(Lediging.objects.values_list("lediging_id", flat=True), ["LED001"])
+        self.assertQuerySetEqual(Klant.objects.values_list("subject_id", flat=True), ["SUBJ001"])
+        self.assertQuerySetEqual(
+            Container.objects.values_list("public_container_id", flat=True), ["CONT001"]
+        )
+        self.assertQuerySetEqual(
+            ContainerLocation.objects.values_list("object_id", flat=True), ["OBJ001"]
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "A missing gewicht is stored as NaN")
+    def test_incremental_import_leaves_a_missing_gewicht_alone(self):
+        rows = [
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED001;10.5;;2024-01-15 10:30:00;3.50",
+        ]
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *rows])), mode=ImportMode.INCREMENTAL
+        )
+        lediging = Lediging.objects.get(lediging_id="LED001")
+        self.assertTrue(math.isnan(lediging.gewicht))
+
+        with self.assertLogs("openafval.afval.services.import_services", "INFO") as logs:
+            import_from_csv_stream(
+                StringIO("\n".join([CSV_HEADER, *rows])), mode=ImportMode.INCREMENTAL
+            )
+
+        self.assertIn("Lediging: 0 created, 0 updated, 1 unchanged", "\n".join(logs.output))
+        gewijzigd_op = lediging.gewijzigd_op
+        lediging.refresh_from_db()
+        self.assertEqual(lediging.gewijzigd_op, gewijzigd_op)
+
+    def test_incremental_import_skips_rows_without_lediging_id(self):
+        rows = [
+            "SUBJ003;111111110;Maria Meijer;OBJ003;Plein 3;CONT003;;"
+            "N;GFT;;15.0;15.0;2024-01-17 09:00:00;5.25",
+        ]
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *rows])), mode=ImportMode.INCREMENTAL
+        )
+
+        self.assertEqual(Lediging.objects.count(), 2)
+        self.assertFalse(Klant.objects.filter(subject_id="SUBJ003").exists())
+
+
+class ShadowImportTest(TestCase):
+    csv_rows = [
+        "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+        "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+        "SUBJ002;987654321;Piet Pietersen;OBJ002;Laan 2;CONT002;;"
+        "J;Restafval;LED002;20.0;20.0;2024-01-16 14:45:00;7.00",
+    ]
+
+    @skipUnless(connection.vendor == "postgresql", "Shadow tables require PostgreSQL")
+    def test_shadow_import_replaces_live_tables(self):
+        old_lediging = LedigingFactory.create()
+        constraints = {
+            model: get_constraint_definitions(model._meta.db_table)
+            for model in (ContainerLocation, Klant, Container, Lediging)
+        }
+        indexes = {
+            model: get_index_definitions(model._meta.db_table)
+            for model in (ContainerLocation, Klant, Container, Lediging)
+        }
+
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *self.csv_rows])),
+            chunk_size=1,
+            mode=ImportMode.SHADOW,
+        )
+
+        self.assertFalse(Lediging.objects.filter(pk=old_lediging.pk).exists())
+        self.assertCountEqual(
+            Lediging.objects.values_list(
+                "lediging_id", "klant__subject_id", "container__afval_type"
+            ),
+            [("LED001", "SUBJ001", "gft"), ("LED002", "SUBJ002", "restafval")],
+        )
+        self.assertEqual(Klant.objects.get(subject_id="SUBJ001").naam, "Jan Jansen")
+        self.assertEqual(ContainerLocation.objects.get(object_id="OBJ002").adres, "Laan 2")
+
+        # The swapped-in tables have the same constraints and indexes as before
+        for model in constraints:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    get_constraint_definitions(model._meta.db_table), constraints[model]
+                )
+                self.assertEqual(get_index_definitions(model._meta.db_table), indexes[model])
+
+    @skipUnless(connection.vendor == "postgresql", "Shadow tables require PostgreSQL")
+    def test_failed_shadow_import_leaves_live_tables_untouched(self):
+        lediging = LedigingFactory.create()
+        csv_rows = [
+            *self.csv_rows,
+            # Duplicate BSN for another subject violates the unique constraint
+            "SUBJ003;123456782;Jan Jansen;OBJ003;Plein 3;CONT003;;"
+            "N;GFT;LED003;15.0;15.0;2024-01-17 09:00:00;5.25",
+        ]
+
+        with self.assertRaises(IntegrityError):
+            import_from_csv_stream(
+                StringIO("\n".join([CSV_HEADER, *csv_rows])), mode=ImportMode.SHADOW
+            )
+
+        self.assertQuerySetEqual(Lediging.objects.all(), [lediging])
+
+    @skipIf(connection.vendor == "postgresql", "Shadow tables are supported on PostgreSQL")
+    def test_shadow_import_requires_postgresql(self):
+        with self.assertRaisesMessage(CSVImportError, "Shadow table imports require PostgreSQL"):
+            import_from_csv_stream(
+                StringIO("\n".join([CSV_HEADER, *self.csv_rows])), mode=ImportMode.SHADOW
+            )
+
+
+class DeferredIndexesImportTest(TestCase):
+    csv_rows = ShadowImportTest.csv_rows
+    models = (ContainerLocation, Klant, Container, Lediging)
+
+    @skipUnless(connection.vendor == "postgresql", "Deferring indexes requires PostgreSQL")
+    def test_indexes_and_foreign_keys_are_rebuilt(self):
+        LedigingFactory.create()
+        constraints = {
+            model: get_constraint_definitions(model._meta.db_table) for model in self.models
+        }
+        indexes = {model: get_index_definitions(model._meta.db_table) for model in self.models}
+        self.assertTrue(indexes[Lediging])
+
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *self.csv_rows])), chunk_size=1, defer_indexes=True
+        )
+
+        self.assertCountEqual(
+            Lediging.objects.values_list("lediging_id", "klant__subject_id"),
+            [("LED001", "SUBJ001"), ("LED002", "SUBJ002")],
+        )
+        for model in self.models:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    get_constraint_definitions(model._meta.db_table), constraints[model]
+                )
+                self.assertEqual(get_index_definitions(model._meta.db_table), indexes[model])
+
+    @skipUnless(connection.vendor == "postgresql", "Deferring indexes requires PostgreSQL")
+    def test_tables_are_analyzed(self):
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *self.csv_rows])), defer_indexes=True
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [Lediging._meta.db_table],
+            )
+            (reltuples,) = cursor.fetchone()
+        self.assertEqual(reltuples, 2)
+
+    @skipIf(connection.vendor == "postgresql", "Deferring indexes is supported on PostgreSQL")
+    def test_deferring_indexes_requires_postgresql(self):
+        with self.assertRaisesMessage(CSVImportError, "Deferring indexes requires PostgreSQL"):
+            import_from_csv_stream(
+                StringIO("\n".join([CSV_HEADER, *self.csv_rows])), defer_indexes=True
+            )
+
+    def test_deferring_indexes_requires_full_mode(self):
+        with self.assertRaisesMessage(
+            CSVImportError, "Deferring indexes is only supported for full imports"
+        ):
+            import_from_csv_stream(
+                StringIO("\n".join([CSV_HEADER, *self.csv_rows])),
+                mode=ImportMode.INCREMENTAL,
+                defer_indexes=True,
+            )
+
+
+class TruncateImportTest(TestCase):
+    csv_rows = ShadowImportTest.csv_rows
+
+    @skipUnless(connection.vendor == "postgresql", "Truncating requires PostgreSQL")
+    def test_full_import_truncates_existing_data(self):
+        old_lediging = LedigingFactory.create()
+
+        with CaptureQueriesContext(connection) as queries:
+            import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *self.csv_rows])), truncate=True)
+
+        self.assertFalse(Lediging.objects.filter(pk=old_lediging.pk).exists())
+        self.assertFalse(Klant.objects.filter(pk=old_lediging.klant_id).exists())
+        self.assertEqual(Lediging.objects.count(), 2)
+        statements = [query["sql"] for query in queries.captured_queries]
+        self.assertTrue(any(sql.startswith("TRUNCATE TABLE") for sql in statements))
+        self.assertFalse(any(sql.startswith("DELETE") for sql in statements))
+
+    @skipIf(connection.vendor == "postgresql", "Truncating is supported on PostgreSQL")
+    def test_truncating_requires_postgresql(self):
+        with self.assertRaisesMessage(CSVImportError, "Truncating requires PostgreSQL"):
+            import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *self.csv_rows])), truncate=True)
+
+    def test_truncating_requires_full_mode(self):
+        with self.assertRaisesMessage(
+            CSVImportError, "Truncating is only supported for full imports"
+        ):
+            import_from_csv_stream(
+                StringIO("\n".join([CSV_HEADER, *self.csv_rows])),
+                mode=ImportMode.INCREMENTAL,
+                truncate=True,
+            )
+
+
+class PartitionedImportTest(TestCase):
+    csv_rows = [
+        "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+        "N;GFT;LED001;10.5;10.5;2023-12-30 10:00:00;3.50",
+        "SUBJ002;987654321;Piet Pietersen;OBJ002;Laan 2;CONT002;;"
+        "J;Restafval;LED002;20.0;20.0;2024-01-16 14:45:00;7.00",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        if connection.vendor != "postgresql":
+            self.skipTest("Ledigingen are only partitioned on PostgreSQL")
+        # The import creates the partition of the current year beforehand
+        now = patch(
+            "openafval.afval.services.import_services.timezone.now",
+            return_value=datetime(2024, 3, 1, tzinfo=UTC),
+        )
+        now.start()
+        self.addCleanup(now.stop)
+
+    def _partitions(self) -> YearlyPartitions:
+        return YearlyPartitions(Lediging._meta.db_table, column="geleegd_op")
+
+    def _count(self, table: str) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {connection.ops.quote_name(table)}")
+            (count,) = cursor.fetchone()
+        return count
+
+    def test_import_creates_the_partitions_of_the_imported_years(self):
+        for mode in ImportMode:
+            with self.subTest(mode=mode), self.captureOnCommitCallbacks(execute=True):
+                import_from_csv_stream(
+                    StringIO("\n".join([CSV_HEADER, *self.csv_rows])), chunk_size=1, mode=mode
+                )
+
+                partitions = self._partitions()
+                self.assertEqual(partitions.years(), [2023, 2024])
+                self.assertEqual(self._count(partitions.name(2023)), 1)
+                self.assertEqual(self._count(partitions.name(2024)), 1)
+                self.assertEqual(self._count(partitions.default), 0)
+
+    def test_import_creates_the_partitions_of_the_live_table_outside_the_import(self):
+        partitions = self._partitions()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *self.csv_rows])))
+
+        # Only the partition of the current year was created before the import
+        self.assertEqual(self._partitions().years(), [2024])
+        self.assertEqual(self._count(partitions.default), 1)
+
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self._partitions().years(), [2023, 2024])
+        self.assertEqual(self._count(partitions.default), 0)
+        self.assertEqual(Lediging.objects.count(), 2)
+
+    def test_shadow_import_swaps_in_the_partitions(self):
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *self.csv_rows])), mode=ImportMode.SHADOW
+        )
+
+        self.assertEqual(
+            get_partitions(Lediging._meta.db_table),
+            ["afval_lediging_default", "afval_lediging_y2023", "afval_lediging_y2024"],
+        )
+        self.assertEqual(Lediging.objects.count(), 2)
+
+    def test_rows_in_the_default_partition_are_moved_into_a_new_partition(self):
+        lediging = LedigingFactory.create(geleegd_op=datetime(2019, 6, 1, tzinfo=UTC))
+        partitions = self._partitions()
+        self.assertEqual(self._count(partitions.default), 1)
+
+        partitions.ensure([2019])
+
+        self.assertEqual(self._count(partitions.name(2019)), 1)
+        self.assertEqual(self._count(partitions.default), 0)
+        self.assertQuerySetEqual(Lediging.objects.all(), [lediging])
+
+    def test_date_bounded_queries_only_scan_the_partitions_in_range(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *self.csv_rows])))
+        queryset = Lediging.objects.geleegd_tussen(
+            startdatum=date(2024, 1, 1), einddatum=date(2024, 1, 31)
+        )
+
+        plan = queryset.explain()
+
+        self.assertIn("afval_lediging_y2024", plan)
+        self.assertNotIn("afval_lediging_y2023", plan)
+        self.assertEqual(queryset.get().lediging_id, "LED002")
+
+    def test_detach_lediging_partitions_command(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *self.csv_rows])))
+        stdout = StringIO()
+
+        call_command("detach_lediging_partitions", "2024", stdout=stdout)
+
+        self.assertIn(
+            "Detached the ledigingen of 2023 into afval_lediging_y2023", stdout.getvalue()
+        )
+        self.assertEqual(self._partitions().years(), [2024])
+        self.assertEqual(list(Lediging.objects.values_list("lediging_id", flat=True)), ["LED002"])
+        # The detached table is kept for archiving
+        self.assertEqual(self._count("afval_lediging_y2023"), 1)
+
+    def test_detach_lediging_partitions_command_drops_tables(self):
+        import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *self.csv_rows])))
+
+        call_command("detach_lediging_partitions", "2025", "--drop", stdout=StringIO())
+
+        self.assertEqual(self._partitions().years(), [])
+        self.assertFalse(Lediging.objects.exists())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('afval_lediging_y2023')")
+            self.assertIsNone(cursor.fetchone()[0])
+
+    def test_detach_lediging_partitions_command_removes_the_totals(self):
+        rows = [
+            *self.csv_rows,
+            # In the partition of 2023, in the month of January 2024 in local time
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED003;4.5;4.5;2023-12-31 23:30:00;1.50",
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED004;8.0;8.0;2024-01-10 10:00:00;2.00",
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *rows])))
+        klant = Klant.objects.get(bsn="123456782")
+        generation = get_import_generation()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("detach_lediging_partitions", "2024", stdout=StringIO())
+
+        for startdatum, einddatum, kosten in [
+            ("2023-01-01", "2023-12-31", Decimal("0")),
+            ("2024-01-01", "2024-01-31", Decimal("2.00")),
+        ]:
+            with self.subTest(startdatum=startdatum):
+                # From the totals, and from the ledigingen
+                totalen = klant.afval_profiel(
+                    startdatum=startdatum, einddatum=einddatum, met_ledigingen=False
+                )
+                profiel = klant.afval_profiel(startdatum=startdatum, einddatum=einddatum)
+
+                self.assertEqual(totalen.klant.totaal_kosten, kosten)
+                self.assertEqual(profiel.klant.totaal_kosten, kosten)
+        self.assertEqual(
+            list(LedigingTotaal.objects.filter(klant=klant).values_list("maand", flat=True)),
+            [date(2024, 1, 1)],
+        )
+        # The cached profielen are invalidated
+        self.assertGreater(get_import_generation(), generation)
+
+
+class DetachLedigingPartitionsCommandTest(TestCase):
+    @skipIf(connection.vendor == "postgresql", "Ledigingen are partitioned on PostgreSQL")
+    def test_command_requires_postgresql(self):
+        with self.assertRaisesMessage(
+            CommandError, "Ledigingen are only partitioned on PostgreSQL"
+        ):
+            call_command("detach_lediging_partitions", "2024")
+
+
+class LedigingTotaalImportTest(TestCase):
+    csv_rows = [
+        "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+        "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+        "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+        "N;GFT;LED002;4.5;4.5;2024-01-20 10:30:00;1.50",
+        "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+        "N;GFT;LED003;8.0;8.0;2024-02-01 10:30:00;2.00",
+        "SUBJ002;987654321;Piet Pietersen;OBJ002;Laan 2;CONT002;;"
+        "J;Restafval;LED004;20.0;20.0;2024-01-16 14:45:00;7.00",
+    ]
+
+    def test_import_refreshes_the_totals(self):
+        for mode in ImportMode:
+            if mode == ImportMode.SHADOW and connection.vendor != "postgresql":
+                continue
+            with self.subTest(mode=mode):
+                import_from_csv_stream(
+                    StringIO("\n".join([CSV_HEADER, *self.csv_rows])), chunk_size=2, mode=mode
+                )
+
+                self.assertCountEqual(
+                    LedigingTotaal.objects.values_list(
+                        "klant__subject_id",
+                        "container__public_container_id",
+                        "afval_type",
+                        "maand",
+                        "aantal_ledigingen",
+                        "totaal_gewicht",
+                        "totaal_kosten",
+                    ),
+                    [
+                        ("SUBJ001", "CONT001", "gft", date(2024, 1, 1), 2, 15.0, Decimal("5.00")),
+                        ("SUBJ001", "CONT001", "gft", date(2024, 2, 1), 1, 8.0, Decimal("2.00")),
+                        (
+                            "SUBJ002",
+                            "CONT002",
+                            "restafval",
+                            date(2024, 1, 1),
+                            1,
+                            20.0,
+                            Decimal("7.00"),
+                        ),
+                    ],
+                )
+
+    def _totalen(self) -> dict[tuple[str, date], tuple]:
+        return {
+            (subject_id, maand): (pk, afval_type, aantal, kosten)
+            for subject_id, maand, pk, afval_type, aantal, kosten in (
+                LedigingTotaal.objects.values_list(
+                    "klant__subject_id",
+                    "maand",
+                    "pk",
+                    "afval_type",
+                    "aantal_ledigingen",
+                    "totaal_kosten",
+                )
+            )
+        }
+
+    def test_incremental_import_only_refreshes_the_changed_months(self):
+        import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *self.csv_rows])))
+        before = self._totalen()
+        # LED002 moves from January into February
+        csv_rows = [
+            self.csv_rows[0],
+            self.csv_rows[1].replace("2024-01-20", "2024-02-20"),
+            *self.csv_rows[2:],
+        ]
+
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *csv_rows])), mode=ImportMode.INCREMENTAL
+        )
+
+        after = self._totalen()
+        self.assertEqual(after[("SUBJ001", date(2024, 1, 1))][2:], (1, Decimal("3.50")))
+        self.assertEqual(after[("SUBJ001", date(2024, 2, 1))][2:], (2, Decimal("3.50")))
+        # The totals of the other klant were left alone
+        self.assertEqual(
+            after[("SUBJ002", date(2024, 1, 1))], before[("SUBJ002", date(2024, 1, 1))]
+        )
+
+    def test_incremental_import_refreshes_the_months_of_deleted_ledigingen(self):
+        import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *self.csv_rows])))
+
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *self.csv_rows[:3]])),
+            mode=ImportMode.INCREMENTAL,
+            delete_missing=True,
+        )
+
+        self.assertEqual(
+            set(self._totalen()), {("SUBJ001", date(2024, 1, 1)), ("SUBJ001", date(2024, 2, 1))}
+        )
+
+    def test_incremental_import_refreshes_the_afval_type_of_changed_containers(self):
+        import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *self.csv_rows])))
+        csv_rows = [row.replace(";N;GFT;", ";N;Restafval;") for row in self.csv_rows]
+
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *csv_rows])), mode=ImportMode.INCREMENTAL
+        )
+
+        self.assertEqual(
+            {afval_type for _, afval_type, _, _ in self._totalen().values()}, {"restafval"}
+        )
+
+    def test_unchanged_incremental_import_leaves_the_totals_alone(self):
+        import_from_csv_stream(StringIO("\n".join([CSV_HEADER, *self.csv_rows])))
+        before = self._totalen()
+
+        with CaptureQueriesContext(connection) as queries:
+            import_from_csv_stream(
+                StringIO("\n".join([CSV_HEADER, *self.csv_rows])), mode=ImportMode.INCREMENTAL
+            )
+
+        self.assertEqual(self._totalen(), before)
+        table = LedigingTotaal._meta.db_table
+        self.assertFalse(any(table in query["sql"] for query in queries))
+
+    @skipUnless(connection.vendor == "postgresql", "Shadow tables require PostgreSQL")
+    def test_shadow_import_builds_the_totals_before_the_swap(self):
+        swap = ShadowTables.swap
+        totalen_at_swap = []
+
+        def count_and_swap(shadow_tables):
+            with connection.cursor() as cursor:
+                table = shadow_tables.tables[LedigingTotaal._meta.db_table]
+                cursor.execute(f"SELECT count(*) FROM {connection.ops.quote_name(table)}")
+                totalen_at_swap.append(cursor.fetchone()[0])
+            swap(shadow_tables)
+
+        with patch.object(ShadowTables, "swap", count_and_swap):
+            import_from_csv_stream(
+                StringIO("\n".join([CSV_HEADER, *self.csv_rows])), mode=ImportMode.SHADOW
+            )
+
+        self.assertEqual(totalen_at_swap, [3])
+        self.assertEqual(LedigingTotaal.objects.count(), 3)
+
+    def test_totals_are_by_local_month(self):
+        # 23:30 UTC on the last day of January is in February in Amsterdam
+        csv_row = self.csv_rows[0].replace("2024-01-15 10:30:00", "2024-01-31 23:30:00")
+
+        import_from_csv_stream(StringIO("\n".join([CSV_HEADER, csv_row])))
+
+        self.assertEqual(LedigingTotaal.objects.get().maand, date(2024, 2, 1))
+
+
+class LedigingLoaderTest(TestCase):
+    def _ledigingen_df(self):
+        klant = KlantFactory.create()
+        location = ContainerLocationFactory.create()
+        container = ContainerFactory.create()
+        return pd.DataFrame(
+            {
+                "lediging_id": ["LED001", ""],
+                "container_location_id": [location.pk, location.pk],
+                "klant_id": [klant.pk, klant.pk],
+                "container_id": [container.pk, container.pk],
+                "gewicht": [10.5, 20.0],
+                "geleegd_op": pd.to_datetime(
+                    ["2024-01-15 10:30:00", "2024-01-16 14:45:00"]
+                ).tz_localize("UTC"),
+                "kosten": [3.5, 0.1 + 0.2],
+            }
+        )
+
+    def _assert_loaded(self):
+        self.assertQuerySetEqual(
+            Lediging.objects.order_by("geleegd_op").values_list(
+                "lediging_id", "gewicht", "geleegd_op", "kosten"
+            ),
+            [
+                ("LED001", 10.5, datetime(2024, 1, 15, 10, 30, tzinfo=UTC), Decimal("3.50")),
+                ("", 20.0, datetime(2024, 1, 16, 14, 45, tzinfo=UTC), Decimal("0.30")),
+            ],
+        )
+
+    def test_loader_must_implement_load(self):
+        class IncompleteLoader(LedigingLoader):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteLoader()
+
+    def test_orm_loader(self):
+        created = OrmLedigingLoader().load(self._ledigingen_df())
+
+        self.assertEqual(created, 2)
+        self._assert_loaded()
+
+    @skipUnless(connection.vendor == "postgresql", "COPY requires PostgreSQL")
+    def test_copy_loader(self):
+        created = CopyLedigingLoader().load(self._ledigingen_df())
+
+        self.assertEqual(created, 2)
+        self._assert_loaded()
+        lediging = Lediging.objects.get(lediging_id="LED001")
+        self.assertIsNotNone(lediging.aangemaakt_op)
+        self.assertEqual(lediging.geleegd_op_datum, datetime(2024, 1, 15).date())
+
+    @skipUnless(connection.vendor == "postgresql", "COPY requires PostgreSQL")
+    def test_loaders_store_a_missing_gewicht_alike(self):
+        for loader in (OrmLedigingLoader(), CopyLedigingLoader()):
+            with self.subTest(loader=type(loader).__name__):
+                ledigingen = self._ledigingen_df()
+                ledigingen.loc[1, "gewicht"] = np.nan
+
+                created = loader.load(ledigingen)
+
+                self.assertEqual(created, 2)
+                gewichten = Lediging.objects.order_by("geleegd_op").values_list(
+                    "gewicht", flat=True
+                )
+                self.assertEqual(gewichten[0], 10.5)
+                self.assertTrue(math.isnan(gewichten[1]))
+                Lediging.objects.all().delete()
+
+    @skipUnless(connection.vendor == "postgresql", "COPY requires PostgreSQL")
+    def test_loaders_round_half_cents_up_alike(self):
+        for loader in (OrmLedigingLoader(), CopyLedigingLoader()):
+            with self.subTest(loader=type(loader).__name__):
+                ledigingen = self._ledigingen_df()
+                ledigingen["kosten"] = [1.005, 10.125]
+
+                loader.load(ledigingen)
+
+                kosten = Lediging.objects.order_by("geleegd_op").values_list("kosten", flat=True)
+                self.assertEqual(list(kosten), [Decimal("1.01"), Decimal("10.13")])
+                Lediging.objects.all().delete()
+
+    def test_get_lediging_loader_uses_copy_on_postgresql(self):
+        loader = get_lediging_loader()
+
+        expected = CopyLedigingLoader if connection.vendor == "postgresql" else OrmLedigingLoader
+        self.assertIsInstance(loader, expected)
+
+
+class ImportFromZipTest(TestCase):
+    def _create_zip(self, members: dict[str, str]) -> Path:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        zip_path = Path(temp_dir.name) / "export.zip"
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+            for name, content in members.items():
+                zip_file.writestr(name, content)
+        return zip_path
+
+    def test_import_reads_csv_from_zip_without_extracting(self):
+        csv_rows = [
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+            "SUBJ002;987654321;Piet Pietersen;OBJ002;Laan 2;CONT002;;"
+            "J;Restafval;LED002;20.0;20.0;2024-01-16 14:45:00;7.00",
+        ]
+        zip_path = self._create_zip({"export.csv": "\n".join([CSV_HEADER, *csv_rows])})
+
+        with patch("tempfile.NamedTemporaryFile") as mock_tempfile:
+            import_from_file(zip_path, chunk_size=1)
+
+        mock_tempfile.assert_not_called()
+        self.assertEqual(Lediging.objects.count(), 2)
+        self.assertEqual(Klant.objects.get(subject_id="SUBJ002").naam, "Piet Pietersen")
+
+    def test_zip_without_csv(self):
+        zip_path = self._create_zip({"readme.txt": "no data"})
+
+        with self.assertRaisesMessage(ValueError, "No CSV files found in ZIP archive"):
+            with _open_csv_from_zip(zip_path):
+                pass
+
+    def test_zip_with_multiple_csv_files(self):
+        zip_path = self._create_zip({"a.csv": CSV_HEADER, "b.csv": CSV_HEADER})
+
+        with self.assertRaisesMessage(ValueError, "ZIP archive contains multiple CSV files"):
+            with _open_csv_from_zip(zip_path):
+                pass
+
+
+class ParallelImportTest(TestCase):
+    csv_rows = [
+        "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+        "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+        "SUBJ002;987654321;Piet Pietersen;OBJ002;Laan 2;CONT002;;"
+        "J;Restafval;LED002;20.0;20.0;2024-01-16 14:45:00;7.00",
+        "SUBJ001;123456782;J. Jansen;OBJ001;Straat 1a;CONT001;;"
+        "J;Restafval;LED003;15.0;15.0;2024-01-17 09:00:00;5.25",
+        ";;;;;;;;;;;;;",
+        "SUBJ003;111222333;Klaas Klaassen;OBJ003;Plein 3;CONT003;;"
+        "N;Medisch;LED004;1.0;1.0;2024-01-18 08:00:00;",
+    ]
+
+    def test_parallel_import_matches_serial_import(self):
+        csv_data = "\n".join([CSV_HEADER, *self.csv_rows])
+
+        import_from_csv_stream(StringIO(csv_data), chunk_size=2, workers=2)
+
+        self.assertEqual(Klant.objects.count(), 3)
+        self.assertEqual(ContainerLocation.objects.count(), 3)
+        self.assertEqual(Container.objects.count(), 3)
+        self.assertEqual(Lediging.objects.count(), 4)
+        # Chunks are written in the order of the file
+        self.assertEqual(Klant.objects.get(subject_id="SUBJ001").naam, "Jan Jansen")
+        self.assertEqual(Container.objects.get(public_container_id="CONT001").afval_type, "gft")
+        self.assertEqual(Container.objects.get(public_container_id="CONT003").afval_type, "med")
+        self.assertEqual(Lediging.objects.get(lediging_id="LED004").kosten, 0)
+
+    def test_iter_csv_blocks(self):
+        csv_data = "\n".join(["A;B", "1;2", '3;"line\nbreak"', "5;6"]) + "\n"
+
+        blocks = list(iter_csv_blocks(StringIO(csv_data), rows_per_block=2))
+
+        self.assertEqual(blocks, ['A;B\n1;2\n3;"line\nbreak"\n', "A;B\n5;6\n"])
+        self.assertEqual(
+            pd.read_csv(StringIO(blocks[0]), sep=";")["B"].tolist(), ["2", "line\nbreak"]
+        )
+
+
+class TransformsTest(SimpleTestCase):
+    def test_prepare_chunk(self):
+        chunk_df = read_csv(
+            StringIO(
+                "\n".join(
+                    [
+                        CSV_HEADER,
+                        "SUBJ001;123456782;;OBJ001;;CONT001;KEY001;"
+                        "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.505",
+                        "SUBJ001;123456782;;OBJ001;;CONT002;;J;Groen;;1;1;2024-01-15 11:00:00;",
+                        "SUBJ001;123456782;;OBJ001;;CONT003;;;;;1;1;2024-01-15 12:00:00;0.1",
+                        "SUBJ001;123456782;;OBJ001;;CONT004;;N;Medisch;;1;1;2024-01-15 13:00:00;2",
+                        "SUBJ001;123456782;;OBJ001;;CONT005;;N;PMD;;1;1;2024-01-15 14:00:00;2",
+                        "SUBJ001;;;OBJ001;;CONT006;;N;GFT;;1;1;2024-01-15 15:00:00;2",
+                    ]
+                )
+            )
+        )
+
+        with self.assertLogs("openafval.afval.services.transforms", "WARNING") as logs:
+            chunk_df = prepare_chunk(chunk_df, REQUIRED_COLUMNS)
+
+        self.assertEqual(
+            chunk_df["afval_type"].tolist(), ["gft", "gft", "restafval", "med", "restafval"]
+        )
+        self.assertEqual(
+            chunk_df["is_verzamelcontainer"].tolist(), [False, True, False, False, False]
+        )
+        self.assertEqual(chunk_df["heeft_sleutel"].tolist(), [True, False, False, False, False])
+        self.assertEqual(chunk_df["OBJECTADRES"].tolist(), [""] * 5)
+        self.assertEqual(chunk_df["LEDIGING_ID"].tolist(), ["LED001", "", "", "", ""])
+        self.assertEqual(chunk_df["TOTAALKOSTEN_LEDIGING"].tolist(), [3.505, 0.0, 0.1, 2.0, 2.0])
+        self.assertEqual(
+            to_datetimes(chunk_df["geleegd_op_utc"])[0], datetime(2024, 1, 15, 10, 30, tzinfo=UTC)
+        )
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("PMD", logs.output[0])
+
+    def test_prepare_chunk_rejects_unexpected_booleans(self):
+        chunk_df = read_csv(
+            StringIO(
+                f"{CSV_HEADER}\n"
+                "SUBJ001;123456782;;OBJ001;;CONT001;;X;GFT;;1;1;2024-01-15 10:30:00;1"
+            )
+        )
+
+        with self.assertRaisesMessage(ValueError, "Expected J or N, got: ['X']"):
+            prepare_chunk(chunk_df, REQUIRED_COLUMNS)
+
+    def test_to_decimals(self):
+        decimals = to_decimals(pd.Series([0.1, 3.5, 2.675, 0.0, 12345678.99]))
+
+        self.assertEqual(
+            [str(value) for value in decimals], ["0.10", "3.50", "2.68", "0.00", "12345678.99"]
+        )
+
+    def test_to_decimals_rounds_half_cents_up(self):
+        decimals = to_decimals(pd.Series([1.005, 10.125, 4.445, 1.005, -0.005]))
+
+        self.assertEqual(
+            [str(value) for value in decimals], ["1.01", "10.13", "4.45", "1.01", "-0.01"]
+        )
+
+    def test_benchmark_command(self):
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_import_transforms", "--rows", "1000", "--chunk-size", "300", stdout=stdout
+        )
+
+        output = stdout.getvalue()
+        self.assertIn("row by row:", output)
+        self.assertIn("vectorized:", output)
+        self.assertIn("faster", output)
+
+
+class KeyIndexTest(SimpleTestCase):
+    def test_lookup(self):
+        pks = {key: uuid.uuid4() for key in ["OBJ001", "OBJ002", "öbj", "", "OBJ010"]}
+        index = KeyIndex()
+        # Added in batches of different sizes, which are merged along the way
+        index.update({"OBJ002": pks["OBJ002"]})
+        index.update({key: pks[key] for key in ["OBJ010", "öbj"]})
+        index.update({key: pks[key] for key in ["OBJ001", ""]})
+
+        keys = pd.Series(["OBJ010", "öbj", "OBJ001", "", "OBJ002", "OBJ010"], index=range(5, 11))
+        result = index.lookup(keys)
+
+        self.assertEqual(len(index), 5)
+        self.assertEqual(result.index.tolist(), list(range(5, 11)))
+        self.assertEqual(result.tolist(), [pks[key].hex for key in keys])
+        self.assertEqual(index.lookup_uuids(keys), [pks[key] for key in keys])
+
+    def test_lookup_of_missing_key(self):
+        index = KeyIndex()
+        index.update({"OBJ001": uuid.uuid4()})
+
+        with self.assertRaises(KeyError):
+            index.lookup(pd.Series(["OBJ001", "OBJ002"]))
+
+    def test_contains(self):
+        index = KeyIndex(with_pks=False)
+        for start in range(0, 100, 7):
+            index.add(f"LED{number:03d}" for number in range(start, min(start + 7, 100)))
+
+        self.assertEqual(len(index), 100)
+        self.assertLess(len(index._keys), 5)
+        self.assertEqual(
+            index.contains(["LED000", "LED099", "LED100", "LED05", ""]).tolist(),
+            [True, True, False, False, False],
+        )
+
+
+class FTPSTestMixin:
+    ftps_config = {"host": "ftps.example.com", "user": "user", "password": "secret", "timeout": 5}
+    csv_data = "\n".join(
+        [
+            CSV_HEADER,
+            "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+            "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+            "SUBJ002;987654321;Piet Pietersen;OBJ002;Laan 2;CONT002;;"
+            "J;Restafval;LED002;20.0;20.0;2024-01-16 14:45:00;7.00",
+        ]
+    ).encode()
+
+    def _mock_ftps(self, retrbinary, size: int | None = None):
+        patcher = patch("openafval.afval.services.import_services._FTPSWithSessionReuse")
+        mock_ftps_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        ftps = mock_ftps_class.return_value.__enter__.return_value
+        ftps.retrbinary.side_effect = retrbinary
+        ftps.size.return_value = len(self.csv_data) if size is None else size
+        ftps.voidcmd.side_effect = lambda cmd: "213 20240115103000" if "MDTM" in cmd else "200"
+        return ftps
+
+    def _send_in_chunks(self, data: bytes, chunk_size: int = 16, fail_at: int | None = None):
+        """Serve ``data`` from the ``rest`` offset, dropping the connection once at
+        ``fail_at`` bytes."""
+
+        def retrbinary(cmd, callback, blocksize=8192, rest=None):
+            nonlocal fail_at
+            for start in range(rest or 0, len(data), chunk_size):
+                if fail_at is not None and start >= fail_at:
+                    fail_at = None
+                    raise ConnectionResetError("Connection reset by peer")
+                callback(data[start : start + chunk_size])
+
+        return retrbinary
+
+
+class ImportFromFTPSTest(FTPSTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = patch("openafval.afval.services.import_services.time.sleep")
+        self.mock_sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_import_from_downloaded_file(self):
+        ftps = self._mock_ftps(self._send_in_chunks(self.csv_data))
+
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        ftps.retrbinary.assert_called_once()
+        self.assertEqual(ftps.retrbinary.call_args.args[0], "RETR data/export.csv")
+        self.assertEqual(Lediging.objects.count(), 2)
+
+    def test_streaming_import_does_not_write_temporary_file(self):
+        self._mock_ftps(self._send_in_chunks(self.csv_data))
+
+        with patch("tempfile.NamedTemporaryFile") as mock_tempfile:
+            import_from_ftps_path(self.ftps_config, "data/export.csv", chunk_size=1, streaming=True)
+
+        mock_tempfile.assert_not_called()
+        self.assertEqual(Lediging.objects.count(), 2)
+        self.assertEqual(Klant.objects.get(subject_id="SUBJ001").naam, "Jan Jansen")
+
+    def test_download_is_resumed_after_connection_drop(self):
+        ftps = self._mock_ftps(self._send_in_chunks(self.csv_data, fail_at=96))
+
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        self.assertEqual(ftps.retrbinary.call_count, 2)
+        self.assertIsNone(ftps.retrbinary.call_args_list[0].kwargs["rest"])
+        self.assertEqual(ftps.retrbinary.call_args_list[1].kwargs["rest"], 96)
+        self.mock_sleep.assert_called_once()
+        self.assertEqual(Lediging.objects.count(), 2)
+
+    def test_streaming_download_is_resumed_after_connection_drop(self):
+        ftps = self._mock_ftps(self._send_in_chunks(self.csv_data, fail_at=96))
+
+        import_from_ftps_path(self.ftps_config, "data/export.csv", chunk_size=1, streaming=True)
+
+        self.assertEqual(ftps.retrbinary.call_args_list[1].kwargs["rest"], 96)
+        self.assertEqual(Lediging.objects.count(), 2)
+
+    def test_download_is_resumed_when_transfer_ends_early(self):
+        truncated = True
+
+        def retrbinary(cmd, callback, blocksize=8192, rest=None):
+            nonlocal truncated
+            end = 96 if truncated else len(self.csv_data)
+            truncated = False
+            callback(self.csv_data[rest or 0 : end])
+
+        ftps = self._mock_ftps(retrbinary)
+
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        self.assertEqual(ftps.retrbinary.call_args_list[1].kwargs["rest"], 96)
+        self.assertEqual(Lediging.objects.count(), 2)
+
+    def test_download_retries_with_backoff(self):
+        def retrbinary(cmd, callback, *args, **kwargs):
+            raise TimeoutError("timed out")
+
+        ftps = self._mock_ftps(retrbinary)
+
+        with self.assertRaises(TimeoutError):
+            import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        self.assertEqual(ftps.retrbinary.call_count, FTP_MAX_RETRIES + 1)
+        delays = [call.args[0] for call in self.mock_sleep.call_args_list]
+        self.assertEqual(delays, sorted(delays))
+        self.assertLess(delays[0], delays[-1])
+
+    def test_permanent_errors_are_not_retried(self):
+        def retrbinary(cmd, callback, *args, **kwargs):
+            raise error_perm("550 No such file or directory")
+
+        ftps = self._mock_ftps(retrbinary)
+
+        with self.assertRaises(error_perm):
+            import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        ftps.retrbinary.assert_called_once()
+        self.mock_sleep.assert_not_called()
+
+    def test_download_fails_when_size_does_not_match(self):
+        self._mock_ftps(self._send_in_chunks(self.csv_data), size=len(self.csv_data) - 1)
+
+        with self.assertRaisesMessage(CSVImportError, "but the server reports"):
+            import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        self.assertFalse(Lediging.objects.exists())
+
+    def test_download_fails_when_remote_file_changes(self):
+        ftps = self._mock_ftps(self._send_in_chunks(self.csv_data, fail_at=96))
+        # Checked before the download, when starting it and when resuming it
+        ftps.size.side_effect = [len(self.csv_data)] * 2 + [len(self.csv_data) + 100]
+
+        with self.assertRaisesMessage(CSVImportError, "changed during the download"):
+            import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+    def test_download_without_remote_size(self):
+        ftps = self._mock_ftps(self._send_in_chunks(self.csv_data))
+        ftps.size.side_effect = error_perm("550 SIZE not allowed in ASCII mode")
+
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        self.assertEqual(Lediging.objects.count(), 2)
+
+    def test_streaming_import_fails_when_download_fails(self):
+        def retrbinary(cmd, callback, *args, **kwargs):
+            callback(self.csv_data[:200])
+            raise EOFError("connection lost")
+
+        self._mock_ftps(retrbinary)
+
+        with self.assertRaisesMessage(EOFError, "connection lost"):
+            import_from_ftps_path(self.ftps_config, "data/export.csv", streaming=True)
+
+        self.assertFalse(Lediging.objects.exists())
+
+    def test_streaming_falls_back_to_temporary_file_for_zip(self):
+        zip_buffer = BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w") as zip_file:
+            zip_file.writestr("export.csv", self.csv_data)
+        zip_data = zip_buffer.getvalue()
+        ftps = self._mock_ftps(self._send_in_chunks(zip_data, chunk_size=1024), size=len(zip_data))
+
+        import_from_ftps_path(self.ftps_config, "data/export.zip", streaming=True)
+
+        ftps.retrbinary.assert_called_once()
+        self.assertEqual(Lediging.objects.count(), 2)
+
+
+class ImportRunTest(TestCase):
+    ftps_config = ImportFromFTPSTest.ftps_config
+    csv_data = ImportFromFTPSTest.csv_data
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch("openafval.afval.services.import_services._FTPSWithSessionReuse")
+        mock_ftps_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.ftps = mock_ftps_class.return_value.__enter__.return_value
+        self.ftps.retrbinary.side_effect = self._retrbinary
+        self.ftps.size.side_effect = lambda path: len(self.csv_data)
+        self.modified = "20240115103000"
+        self.ftps.voidcmd.side_effect = lambda cmd: (
+            f"213 {self.modified}" if "MDTM" in cmd else "200"
+        )
+
+    def _retrbinary(self, cmd, callback, blocksize=8192, rest=None):
+        callback(self.csv_data[rest or 0 :])
+
+    def test_import_is_recorded(self):
+        import_run = import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        self.assertIsNotNone(import_run)
+        import_run.refresh_from_db()
+        self.assertEqual(import_run.bron, "ftps://ftps.example.com/data/export.csv")
+        self.assertEqual(import_run.modus, ImportMode.FULL)
+        self.assertEqual(import_run.aantal_ledigingen, 2)
+        self.assertEqual(import_run.bestandsgrootte, len(self.csv_data))
+        self.assertEqual(import_run.bestand_gewijzigd_op, datetime(2024, 1, 15, 10, 30, tzinfo=UTC))
+        self.assertEqual(import_run.sha256, hashlib.sha256(self.csv_data).hexdigest())
+
+    def test_streaming_import_is_recorded(self):
+        import_run = import_from_ftps_path(self.ftps_config, "data/export.csv", streaming=True)
+
+        import_run.refresh_from_db()
+        self.assertEqual(import_run.sha256, hashlib.sha256(self.csv_data).hexdigest())
+
+    def test_unchanged_file_is_not_downloaded(self):
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+        Lediging.objects.all().delete()
+
+        import_run = import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        self.assertIsNone(import_run)
+        self.ftps.retrbinary.assert_called_once()
+        self.assertEqual(ImportRun.objects.count(), 1)
+        self.assertFalse(Lediging.objects.exists())
+
+    def test_republished_file_with_same_content_is_not_imported(self):
+        first_run = import_from_ftps_path(self.ftps_config, "data/export.csv")
+        self.modified = "20240116103000"
+
+        import_run = import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        self.assertIsNone(import_run)
+        self.assertEqual(self.ftps.retrbinary.call_count, 2)
+        self.assertEqual(ImportRun.objects.count(), 1)
+        first_run.refresh_from_db()
+        self.assertEqual(first_run.bestand_gewijzigd_op, datetime(2024, 1, 16, 10, 30, tzinfo=UTC))
+
+        # The new modification time is recognised without downloading the file
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+        self.assertEqual(self.ftps.retrbinary.call_count, 2)
+
+    def test_changed_file_is_imported(self):
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+        self.csv_data = self.csv_data.replace(b"Jan Jansen", b"Jan de Vries")
+        self.modified = "20240116103000"
+
+        import_run = import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        self.assertIsNotNone(import_run)
+        self.assertEqual(ImportRun.objects.count(), 2)
+        self.assertEqual(Klant.objects.get(subject_id="SUBJ001").naam, "Jan de Vries")
+
+    def test_force_imports_unchanged_file(self):
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        import_run = import_from_ftps_path(self.ftps_config, "data/export.csv", force=True)
+
+        self.assertIsNotNone(import_run)
+        self.assertEqual(self.ftps.retrbinary.call_count, 2)
+        self.assertEqual(ImportRun.objects.count(), 2)
+
+    def test_file_is_imported_again_after_other_import(self):
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+        import_from_csv_stream(StringIO(self.csv_data.decode()), source="upload.csv")
+
+        import_run = import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        self.assertIsNotNone(import_run)
+        self.assertEqual(self.ftps.retrbinary.call_count, 2)
+
+    def test_full_import_after_incremental_import(self):
+        import_from_ftps_path(self.ftps_config, "data/export.csv", mode=ImportMode.INCREMENTAL)
+
+        self.assertIsNone(
+            import_from_ftps_path(self.ftps_config, "data/export.csv", mode=ImportMode.INCREMENTAL)
+        )
+        self.assertIsNotNone(import_from_ftps_path(self.ftps_config, "data/export.csv"))
+
+    def test_file_without_modification_time_is_downloaded(self):
+        def voidcmd(cmd):
+            if cmd.startswith("MDTM"):
+                raise error_perm("502 Command not implemented")
+            return "200"
+
+        self.ftps.voidcmd.side_effect = voidcmd
+
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+        import_from_ftps_path(self.ftps_config, "data/export.csv")
+
+        # Only recognised as unchanged by its content
+        self.assertEqual(self.ftps.retrbinary.call_count, 2)
+        self.assertEqual(ImportRun.objects.count(), 1)
+
+
+class TelemetryTest(FTPSTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.span_exporter = InMemorySpanExporter()
+        tracer_provider = TracerProvider()
+        tracer_provider.add_span_processor(SimpleSpanProcessor(self.span_exporter))
+        self.metric_reader = InMemoryMetricReader()
+        meter_provider = MeterProvider(metric_readers=[self.metric_reader])
+
+        for name, value in (
+            ("tracer", tracer_provider.get_tracer("test")),
+            ("import_metrics", telemetry.ImportMetrics(meter_provider.get_meter("test"))),
+        ):
+            patcher = patch.object(telemetry, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _spans(self) -> dict[str, list]:
+        spans = {}
+        for span in self.span_exporter.get_finished_spans():
+            spans.setdefault(span.name, []).append(span)
+        return spans
+
+    def _data_points(self) -> dict[str, list]:
+        return {
+            metric.name: list(metric.data.data_points)
+            for resource_metrics in self.metric_reader.get_metrics_data().resource_metrics
+            for scope_metrics in resource_metrics.scope_metrics
+            for metric in scope_metrics.metrics
+        }
+
+    def test_import_phases_are_traced(self):
+        csv_data = "\n".join([CSV_HEADER, *ParallelImportTest.csv_rows])
+
+        import_from_csv_stream(StringIO(csv_data), chunk_size=2, source="export.csv")
+
+        spans = self._spans()
+        (import_span,) = spans["import"]
+        self.assertEqual(import_span.attributes["import.source"], "export.csv")
+        self.assertEqual(import_span.attributes["import.rows"], 4)
+        (purge_span,) = spans["import.purge"]
+        (first_pass_span,) = spans["import.first_pass"]
+        self.assertEqual(purge_span.parent.span_id, import_span.context.span_id)
+        self.assertEqual(first_pass_span.parent.span_id, import_span.context.span_id)
+        # The row without required values is dropped, its chunk remains
+        self.assertEqual(
+            [span.attributes["import.rows"] for span in spans["import.chunk"]], [2, 1, 1]
+        )
+        self.assertEqual(
+            [span.attributes["import.model"] for span in spans["import.bulk_create"]][:4],
+            ["ContainerLocation", "Klant", "Container", "Lediging"],
+        )
+
+    def test_import_metrics(self):
+        csv_data = "\n".join([CSV_HEADER, *ParallelImportTest.csv_rows])
+
+        import_from_csv_stream(StringIO(csv_data), chunk_size=2)
+
+        data_points = self._data_points()
+        (rows,) = data_points["openafval.import.rows"]
+        self.assertEqual(rows.value, 4)
+        self.assertEqual(rows.attributes, {"import.mode": "full"})
+        (chunk_duration,) = data_points["openafval.import.chunk.duration"]
+        self.assertEqual(chunk_duration.count, 3)
+        (throughput,) = data_points["openafval.import.throughput"]
+        self.assertEqual(throughput.count, 1)
+        self.assertGreater(throughput.sum, 0)
+        (peak_memory,) = data_points["openafval.import.memory.peak"]
+        self.assertEqual(peak_memory.attributes, {"import.mode": "full", "process": "import"})
+        self.assertGreater(peak_memory.value, 0)
+
+    @patch("openafval.afval.services.import_services.time.sleep")
+    def test_streaming_download_is_traced_with_the_import(self, mock_sleep):
+        self._mock_ftps(self._send_in_chunks(self.csv_data, fail_at=96))
+
+        import_from_ftps_path(self.ftps_config, "data/export.csv", chunk_size=1, streaming=True)
+
+        spans = self._spans()
+        (root_span,) = spans["import_from_ftps"]
+        (download_span,) = spans["import.download"]
+        (import_span,) = spans["import"]
+        self.assertEqual(
+            root_span.attributes["import.source"], "ftps://ftps.example.com/data/export.csv"
+        )
+        self.assertEqual(download_span.parent.span_id, root_span.context.span_id)
+        self.assertEqual(import_span.parent.span_id, root_span.context.span_id)
+        self.assertEqual(download_span.attributes["ftps.bytes"], len(self.csv_data))
+        self.assertEqual([event.name for event in download_span.events], ["retry"])
+
+        data_points = self._data_points()
+        (bytes_downloaded,) = data_points["openafval.import.download.bytes"]
+        self.assertEqual(bytes_downloaded.value, len(self.csv_data))
+        (download_throughput,) = data_points["openafval.import.download.throughput"]
+        self.assertEqual(download_throughput.count, 1)
+
+
 class ImportFromCSVCommandTest(TestCase):
     def test_command_imports_csv_file_end_to_end(self):
         """Test that the command successfully imports a CSV file."""
@@ -223,6 +1634,48 @@ class ImportFromCSVCommandTest(TestCase):
         # Should pass chunk_size as keyword argument
         self.assertEqual(call_args[1]["chunk_size"], 10000)
 
+    @patch("openafval.afval.management.commands.import_from_csv.import_from_file")
+    def test_command_passes_mode_arguments(self, mock_import_from_file):
+        call_command(
+            "import_from_csv", "/path/to/file.csv", "--mode", "incremental", "--delete-missing"
+        )
+
+        call_args = mock_import_from_file.call_args
+        self.assertEqual(call_args[1]["mode"], ImportMode.INCREMENTAL)
+        self.assertTrue(call_args[1]["delete_missing"])
+
+    @patch("openafval.afval.management.commands.import_from_csv.import_from_file")
+    def test_command_with_defer_indexes(self, mock_import_from_file):
+        call_command("import_from_csv", "/path/to/file.csv", "--defer-indexes")
+
+        self.assertTrue(mock_import_from_file.call_args.kwargs["defer_indexes"])
+
+    def test_command_defer_indexes_requires_full_mode(self):
+        with self.assertRaisesMessage(
+            CommandError, "--defer-indexes can only be used with --mode full"
+        ):
+            call_command(
+                "import_from_csv", "/path/to/file.csv", "--mode", "shadow", "--defer-indexes"
+            )
+
+    @patch("openafval.afval.management.commands.import_from_csv.import_from_file")
+    def test_command_with_truncate(self, mock_import_from_file):
+        call_command("import_from_csv", "/path/to/file.csv", "--truncate")
+
+        self.assertTrue(mock_import_from_file.call_args.kwargs["truncate"])
+
+    def test_command_truncate_requires_full_mode(self):
+        with self.assertRaisesMessage(CommandError, "--truncate can only be used with --mode full"):
+            call_command(
+                "import_from_csv", "/path/to/file.csv", "--mode", "incremental", "--truncate"
+            )
+
+    def test_command_delete_missing_requires_incremental_mode(self):
+        with self.assertRaisesMessage(
+            CommandError, "--delete-missing can only be used with --mode incremental"
+        ):
+            call_command("import_from_csv", "/path/to/file.csv", "--delete-missing")
+
     @patch("openafval.afval.management.commands.import_from_csv.import_from_file")
     def test_command_with_local_path_calls_local_file_import(self, mock_import_from_file):
         call_command("import_from_csv", "/local/path/file.csv")
@@ -258,6 +1711,44 @@ class ImportFromCSVCommandTest(TestCase):
         remote_path = call_args[0][1]
         self.assertEqual(remote_path, "data/file.csv")
 
+    @patch("openafval.afval.management.commands.import_from_csv.import_from_ftps_path")
+    @patch.dict(os.environ, {"FTPS_USER": "envuser", "FTPS_PASSWORD": "envpass"})
+    def test_command_passes_stream_argument(self, mock_import_from_ftps):
+        call_command("import_from_csv", "ftps://example.com/data/file.csv", "--stream")
+
+        mock_import_from_ftps.assert_called_once()
+        self.assertTrue(mock_import_from_ftps.call_args.kwargs["streaming"])
+
+    @patch("openafval.afval.management.commands.import_from_csv.import_from_file")
+    def test_command_passes_workers_argument(self, mock_import_from_file):
+        call_command("import_from_csv", "/tmp/file.csv", "--workers", "4")
+
+        self.assertEqual(mock_import_from_file.call_args.kwargs["workers"], 4)
+
+    def test_command_rejects_invalid_workers(self):
+        with self.assertRaisesMessage(CommandError, "--workers must be at least 1"):
+            call_command("import_from_csv", "/tmp/file.csv", "--workers", "0")
+
+    @patch("openafval.afval.management.commands.import_from_csv.import_from_ftps_path")
+    @patch.dict(os.environ, {"FTPS_USER": "envuser", "FTPS_PASSWORD": "envpass"})
+    def test_command_passes_force_argument(self, mock_import_from_ftps):
+        call_command("import_from_csv", "ftps://example.com/data/file.csv", "--force")
+
+        self.assertTrue(mock_import_from_ftps.call_args.kwargs["force"])
+
+    @patch(
+        "openafval.afval.management.commands.import_from_csv.import_from_ftps_path",
+        return_value=None,
+    )
+    @patch.dict(os.environ, {"FTPS_USER": "envuser", "FTPS_PASSWORD": "envpass"})
+    def test_command_reports_skipped_import(self, mock_import_from_ftps):
+        stdout = StringIO()
+
+        call_command("import_from_csv", "ftps://example.com/data/file.csv", stdout=stdout)
+
+        self.assertIn("has not changed since the last import", stdout.getvalue())
+        self.assertNotIn("Import completed successfully", stdout.getvalue())
+
     @patch("openafval.afval.management.commands.import_from_csv.import_from_ftps_path")
     @patch.dict(os.environ, {"FTPS_USER": "envuser", "FTPS_PASSWORD": "envpass"})
     def test_command_uses_environment_variables_for_ftps_credentials(self, mock_import_from_ftps):
@@ -0,0 +1,214 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from openafval.afval.constants import ImportJobStatusChoices
+from openafval.afval.models import ImportJob, Klant, Lediging
+from openafval.afval.services.import_jobs import (
+    _ProgressReporter,
+    claim_next_job,
+    fail_stale_jobs,
+    run_import_job,
+)
+from openafval.afval.services.import_services import import_from_csv_stream
+
+from .test_import import CSV_HEADER
+
+CSV_ROWS = [
+    "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT001;KEY001;"
+    "N;GFT;LED001;10.5;10.5;2024-01-15 10:30:00;3.50",
+    "SUBJ002;987654321;Piet Pietersen;OBJ002;Laan 2;CONT002;;"
+    "J;Restafval;LED002;20.0;20.0;2024-01-16 14:45:00;7.00",
+    "SUBJ001;123456782;Jan Jansen;OBJ001;Straat 1;CONT003;;"
+    "N;GFT;LED003;15.0;15.0;2024-01-17 09:00:00;5.25",
+]
+# VERZAMELCONTAINER_J_N is not J or N
+INVALID_CSV = "\n".join([CSV_HEADER, CSV_ROWS[0].replace(";N;GFT;", ";X;GFT;")])
+
+
+class ImportJobTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        private_media = tempfile.TemporaryDirectory()
+        self.addCleanup(private_media.cleanup)
+        settings_override = override_settings(PRIVATE_MEDIA_ROOT=private_media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _create_job(self, csv_data: str, **kwargs) -> ImportJob:
+        content = csv_data.encode("utf-8")
+        job = ImportJob(bestandsnaam="export.csv", bestandsgrootte=len(content), **kwargs)
+        job.bestand.save("export.csv", ContentFile(content), save=True)
+        return job
+
+    def test_run_import_job(self):
+        job = self._create_job("\n".join([CSV_HEADER, *CSV_ROWS]))
+        path = Path(job.bestand.path)
+        self.assertTrue(path.exists())
+
+        job = claim_next_job()
+        job = run_import_job(job, chunk_size=2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJobStatusChoices.SUCCEEDED)
+        self.assertEqual(job.rijen_gelezen, 3)
+        self.assertEqual(job.rijen_geimporteerd, 3)
+        self.assertEqual(job.bytes_gelezen, job.bestandsgrootte)
+        self.assertEqual(job.voortgang, 1.0)
+        self.assertIsNotNone(job.voltooid_op)
+        self.assertEqual(job.import_run.bron, "export.csv")
+        self.assertEqual(job.import_run.aantal_ledigingen, 3)
+        self.assertEqual(Klant.objects.count(), 2)
+        self.assertEqual(Lediging.objects.count(), 3)
+        # The upload contains BSNs and is removed once imported
+        self.assertEqual(job.bestand.name, "")
+        self.assertFalse(path.exists())
+
+    def test_failed_import_job(self):
+        job = self._create_job(INVALID_CSV)
+        path = Path(job.bestand.path)
+
+        with self.assertLogs("openafval.afval.services.import_jobs", level="ERROR"):
+            job = run_import_job(claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJobStatusChoices.FAILED)
+        self.assertIn("Expected J or N", job.foutmelding)
+        self.assertIsNone(job.import_run)
+        self.assertFalse(path.exists())
+
+    def test_claim_next_job_takes_the_oldest_pending_job(self):
+        newest = self._create_job("")
+        oldest = self._create_job("")
+        ImportJob.objects.filter(pk=oldest.pk).update(
+            aangemaakt_op=newest.aangemaakt_op - timedelta(minutes=1)
+        )
+        self._create_job("", status=ImportJobStatusChoices.SUCCEEDED)
+
+        first = claim_next_job()
+        second = claim_next_job()
+
+        self.assertEqual(first.pk, oldest.pk)
+        self.assertEqual(first.status, ImportJobStatusChoices.RUNNING)
+        self.assertIsNotNone(first.gestart_op)
+        self.assertEqual(second.pk, newest.pk)
+        self.assertIsNone(claim_next_job())
+
+    def test_progress_is_reported_per_chunk(self):
+        progress = []
+
+        import_from_csv_stream(
+            StringIO("\n".join([CSV_HEADER, *CSV_ROWS])),
+            chunk_size=2,
+            progress=lambda *counts: progress.append(counts),
+        )
+
+        self.assertEqual(progress, [(2, 2), (3, 3)])
+
+    def test_progress_reporter_saves_from_its_own_thread(self):
+        job = self._create_job("", status=ImportJobStatusChoices.RUNNING)
+        reporter = _ProgressReporter(job, interval=60)
+        reporter.update(bytes_read=100, rows_parsed=10, rows_imported=8)
+
+        reporter._save()
+
+        job.refresh_from_db()
+        self.assertEqual(
+            (job.bytes_gelezen, job.rijen_gelezen, job.rijen_geimporteerd), (100, 10, 8)
+        )
+
+    def test_remaining_time_is_extrapolated_from_the_bytes_read(self):
+        job = ImportJob(
+            status=ImportJobStatusChoices.RUNNING,
+            bestandsgrootte=1000,
+            bytes_gelezen=250,
+            gestart_op=timezone.now() - timedelta(seconds=30),
+        )
+
+        self.assertEqual(job.voortgang, 0.25)
+        self.assertAlmostEqual(job.resterende_tijd.total_seconds(), 90, delta=1)
+
+        job.bytes_gelezen = 0
+        self.assertIsNone(job.resterende_tijd)
+
+    def test_progress_reporter_saves_a_heartbeat(self):
+        job = self._create_job("", status=ImportJobStatusChoices.RUNNING)
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        ImportJob.objects.filter(pk=job.pk).update(gewijzigd_op=an_hour_ago)
+
+        _ProgressReporter(job, interval=60)._save()
+
+        job.refresh_from_db()
+        self.assertGreater(job.gewijzigd_op, an_hour_ago)
+        self.assertEqual(fail_stale_jobs(), [])
+
+    def test_fail_stale_jobs(self):
+        stale = self._create_job("", status=ImportJobStatusChoices.RUNNING)
+        path = Path(stale.bestand.path)
+        running = self._create_job("", status=ImportJobStatusChoices.RUNNING)
+        pending = self._create_job("")
+        ImportJob.objects.filter(pk__in=[stale.pk, pending.pk]).update(
+            gewijzigd_op=timezone.now() - timedelta(hours=1)
+        )
+
+        with self.assertLogs("openafval.afval.services.import_jobs", level="ERROR"):
+            failed = fail_stale_jobs()
+
+        self.assertEqual([job.pk for job in failed], [stale.pk])
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, ImportJobStatusChoices.FAILED)
+        self.assertIn("stopped", stale.foutmelding)
+        self.assertIsNotNone(stale.voltooid_op)
+        self.assertEqual(stale.bestand.name, "")
+        self.assertFalse(path.exists())
+        running.refresh_from_db()
+        self.assertEqual(running.status, ImportJobStatusChoices.RUNNING)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, ImportJobStatusChoices.PENDING)
+
+    def test_run_import_jobs_command_fails_stale_jobs(self):
+        stale = self._create_job("", status=ImportJobStatusChoices.RUNNING)
+        ImportJob.objects.filter(pk=stale.pk).update(
+            gewijzigd_op=timezone.now() - timedelta(hours=1)
+        )
+        stderr = StringIO()
+
+        with self.assertLogs("openafval.afval.services.import_jobs", level="ERROR"):
+            call_command("run_import_jobs", "--once", stdout=StringIO(), stderr=stderr)
+
+        self.assertIn(f"(job {stale.pk}) stopped", stderr.getvalue())
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, ImportJobStatusChoices.FAILED)
+
+    def test_run_import_jobs_command(self):
+        self._create_job("\n".join([CSV_HEADER, *CSV_ROWS]))
+        self._create_job(INVALID_CSV)
+        stdout, stderr = StringIO(), StringIO()
+
+        with self.assertLogs("openafval.afval.services.import_jobs", level="ERROR"):
+            call_command("run_import_jobs", "--once", stdout=stdout, stderr=stderr)
+
+        self.assertIn("Imported 3 ledigingen", stdout.getvalue())
+        self.assertIn("Import failed: ValueError: Expected J or N", stderr.getvalue())
+        self.assertFalse(
+            ImportJob.objects.filter(
+                status__in=[ImportJobStatusChoices.PENDING, ImportJobStatusChoices.RUNNING]
+            ).exists()
+        )
+
+    @patch("openafval.afval.management.commands.run_import_jobs.time.sleep")
+    def test_run_import_jobs_command_polls_for_new_jobs(self, mock_sleep):
+        mock_sleep.side_effect = [None, KeyboardInterrupt]
+
+        with self.assertRaises(KeyboardInterrupt):
+            call_command("run_import_jobs", "--poll-interval", "3", stdout=StringIO())
+
+        mock_sleep.assert_called_with(3.0)
+        self.assertEqual(mock_sleep.call_count, 2)
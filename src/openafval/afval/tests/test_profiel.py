@@ -8,9 +8,12 @@ the aggregation logic is correct in isolation.
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+from django.db import connection
+from django.db.models import Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from openafval.afval.models import ContainerLocation
+from openafval.afval.models import ContainerLocation, Lediging, LedigingTotaal
 from openafval.afval.profiel import (
     AfvalProfiel,
     ContainerLocatieProfiel,
@@ -18,6 +21,7 @@ from openafval.afval.profiel import (
     KlantProfiel,
     LedigingProfiel,
 )
+from openafval.afval.services.aggregates import refresh_lediging_totalen
 
 from .factories import (
     ContainerFactory,
@@ -378,6 +382,102 @@ class BuildProfielEmptyTest(TestCase):
         self.assertEqual(profiel.klant.totaal_kosten, 0.0)
 
 
+class BuildProfielQueriesTest(TestCase):
+    def setUp(self):
+        self.klant = KlantFactory.create()
+        location = ContainerLocationFactory.create()
+        for afval_type in ("gft", "restafval"):
+            LedigingFactory.create_batch(
+                3,
+                klant=self.klant,
+                container=ContainerFactory.create(afval_type=afval_type),
+                container_location=location,
+            )
+        refresh_lediging_totalen()
+
+    def test_profiel_is_built_with_two_queries(self):
+        adres = ContainerLocation.objects.get().adres
+
+        # The containers and locations, and the ledigingen in the date range
+        with self.assertNumQueries(2):
+            profiel = _build(
+                self.klant,
+                startdatum="2000-01-01",
+                einddatum="2100-01-01",
+                afval_type="gft",
+                adressen=[adres],
+            )
+
+        self.assertEqual(len(profiel.containers), 1)
+        self.assertEqual(len(profiel.container_locaties), 1)
+        self.assertEqual(len(profiel.ledigingen), 3)
+
+    def test_given_locations_queryset_takes_one_more_query(self):
+        with self.assertNumQueries(3):
+            profiel = _build(self.klant, adressen=ContainerLocation.objects.all())
+
+        self.assertEqual(len(profiel.ledigingen), 6)
+
+    def test_ledigingen_are_read_in_the_date_range_only(self):
+        with CaptureQueriesContext(connection) as queries:
+            profiel = _build(self.klant, startdatum="2000-01-01", einddatum="2100-01-01")
+
+        self.assertEqual(len(profiel.ledigingen), 6)
+        dimensions, ledigingen = (query["sql"] for query in queries)
+        self.assertNotIn("geleegd_op", dimensions)
+        self.assertIn("geleegd_op_datum", ledigingen)
+
+    def test_containers_and_locations_outside_the_date_range_are_reported(self):
+        profiel = _build(self.klant, startdatum="2100-01-01")
+
+        self.assertEqual(len(profiel.containers), 2)
+        self.assertEqual(len(profiel.container_locaties), 1)
+        self.assertEqual(profiel.ledigingen, [])
+        self.assertEqual(profiel.klant.totaal_kosten, 0)
+
+    def test_totals_of_whole_months_are_read_from_the_monthly_totals(self):
+        table = LedigingTotaal._meta.db_table
+        for filters, whole_months in [
+            ({}, True),
+            ({"startdatum": "2000-01-01", "einddatum": "2100-01-31"}, True),
+            ({"startdatum": "2000-01-02"}, False),
+            ({"einddatum": "2100-01-30"}, False),
+        ]:
+            with self.subTest(**filters), CaptureQueriesContext(connection) as queries:
+                profiel = self.klant.afval_profiel(**filters, met_ledigingen=False)
+
+                dimensions, totalen = (query["sql"] for query in queries)
+                self.assertNotIn(table, dimensions)
+                self.assertEqual(table in totalen, whole_months)
+                self.assertEqual(
+                    profiel.klant.totaal_kosten,
+                    Lediging.objects.aggregate(Sum("kosten"))["kosten__sum"],
+                )
+
+    def test_totals_without_ledigingen_match(self):
+        adres = ContainerLocation.objects.get().adres
+        for filters in [
+            {},
+            {"afval_type": "gft"},
+            {"container_locaties": [adres]},
+            {"startdatum": "2100-01-01"},
+        ]:
+            with self.subTest(**filters):
+                profiel = self.klant.afval_profiel(**filters)
+                with self.assertNumQueries(2):
+                    totalen = self.klant.afval_profiel(**filters, met_ledigingen=False)
+
+                self.assertEqual(totalen.ledigingen, [])
+                self.assertEqual(totalen.klant.totaal_kosten, profiel.klant.totaal_kosten)
+                for actual, expected in [
+                    *zip(totalen.containers, profiel.containers, strict=True),
+                    *zip(totalen.container_locaties, profiel.container_locaties, strict=True),
+                ]:
+                    self.assertEqual(actual.id, expected.id)
+                    self.assertAlmostEqual(actual.totaal_gewicht, expected.totaal_gewicht)
+                    self.assertEqual(actual.totaal_kosten, expected.totaal_kosten)
+
+
 class BuildProfielContainerLocatiesInputTest(TestCase):
     def setUp(self):
         self.klant = KlantFactory.create()
@@ -422,6 +522,24 @@ class BuildProfielContainerLocatiesInputTest(TestCase):
         self.assertEqual(profiel_empty.container_locaties, profiel_none.container_locaties)
         self.assertEqual(profiel_empty.ledigingen, profiel_none.ledigingen)
 
+    def test_locations_are_ordered_as_the_database_orders_addresses(self):
+        # Python sorts capitals first, most database collations don't
+        for adres in ["de Ruyterkade 7, Amsterdam", "Dijkstraat 2, Amsterdam", "damrak 3"]:
+            LedigingFactory.create(
+                klant=self.klant, container_location__adres=adres, container__afval_type="gft"
+            )
+
+        profiel = self.klant.afval_profiel()
+
+        self.assertEqual(
+            [locatie.id for locatie in profiel.container_locaties],
+            list(
+                ContainerLocation.objects.filter(ledigingen__klant=self.klant)
+                .order_by("adres", "id")
+                .values_list("id", flat=True)
+            ),
+        )
+
     def test_invalid_container_locaties_type_raises(self):
         with self.assertRaises(AssertionError):
             self.klant.afval_profiel(container_locaties=42)
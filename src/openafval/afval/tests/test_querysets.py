@@ -1,9 +1,13 @@
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 from zoneinfo import ZoneInfo
 
+from django.db import connection
 from django.test import TestCase
 
-from openafval.afval.models import Container, ContainerLocation, Lediging
+from openafval.afval.models import Container, ContainerLocation, Lediging, LedigingTotaal
+from openafval.afval.profiel import AfvalProfielBuilder
+from openafval.afval.services.aggregates import refresh_lediging_totalen
 
 from .factories import (
     ContainerFactory,
@@ -138,3 +142,125 @@ class LedigingQuerySetTest(TestCase):
         result = Lediging.objects.for_klant(klant)
 
         self.assertEqual(list(result), [lediging_new, lediging_old])
+
+    def test_geleegd_tussen_includes_both_local_dates(self):
+        tz = ZoneInfo(TZ_LOCAL)
+        ledigingen = {
+            geleegd_op: LedigingFactory.create(geleegd_op=geleegd_op)
+            for geleegd_op in [
+                datetime(2025, 12, 31, 23, 59, tzinfo=tz),
+                datetime(2026, 1, 1, 0, 0, tzinfo=tz),
+                datetime(2026, 1, 31, 23, 59, tzinfo=tz),
+                datetime(2026, 2, 1, 0, 0, tzinfo=tz),
+            ]
+        }
+
+        result = Lediging.objects.geleegd_tussen(
+            startdatum=date(2026, 1, 1), einddatum=date(2026, 1, 31)
+        )
+
+        self.assertCountEqual(
+            result,
+            [
+                ledigingen[datetime(2026, 1, 1, 0, 0, tzinfo=tz)],
+                ledigingen[datetime(2026, 1, 31, 23, 59, tzinfo=tz)],
+            ],
+        )
+        self.assertEqual(Lediging.objects.geleegd_tussen().count(), 4)
+
+
+class LedigingTotaalQuerySetTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        tz = ZoneInfo(TZ_LOCAL)
+        self.klant = KlantFactory.create()
+        self.gft = ContainerFactory.create(afval_type="gft")
+        self.rest = ContainerFactory.create(afval_type="restafval")
+        for container, geleegd_op, kosten in [
+            (self.gft, datetime(2025, 12, 1, tzinfo=tz), 1),
+            (self.gft, datetime(2026, 1, 1, tzinfo=tz), 2),
+            (self.gft, datetime(2026, 1, 31, tzinfo=tz), 4),
+            (self.rest, datetime(2026, 2, 1, tzinfo=tz), 8),
+        ]:
+            LedigingFactory.create(
+                klant=self.klant,
+                container=container,
+                geleegd_op=geleegd_op,
+                kosten=kosten,
+                gewicht=1.0,
+            )
+        LedigingFactory.create(kosten=100)  # Another klant
+        refresh_lediging_totalen()
+
+    def test_totalen_per_container(self):
+        totalen = LedigingTotaal.objects.for_klant(self.klant).totalen("container", "afval_type")
+
+        self.assertCountEqual(
+            [(row["container"], row["afval_type"], row["totaal_kosten"]) for row in totalen],
+            [(self.gft.pk, "gft", Decimal("7.00")), (self.rest.pk, "restafval", Decimal("8.00"))],
+        )
+
+    def test_totalen_per_jaar(self):
+        totalen = LedigingTotaal.objects.for_klant(self.klant).totalen("jaar")
+
+        self.assertEqual(
+            [(row["jaar"], row["aantal_ledigingen"], row["totaal_gewicht"]) for row in totalen],
+            [(2025, 1, 1.0), (2026, 3, 3.0)],
+        )
+
+    def test_totaal_in_maanden(self):
+        totaal = (
+            LedigingTotaal.objects.for_klant(self.klant)
+            .in_maanden(startmaand=date(2026, 1, 15), eindmaand=date(2026, 1, 15))
+            .totaal()
+        )
+
+        self.assertEqual(totaal["aantal_ledigingen"], 2)
+        self.assertEqual(totaal["totaal_kosten"], Decimal("6.00"))
+
+
+class LedigingIndexTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        if connection.vendor != "postgresql":
+            self.skipTest("Query plans are only checked on PostgreSQL")
+
+    def _index_names(self, index: str) -> set[str]:
+        # The index of a partitioned table has an index of its own on every partition
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT pg_class.relname
+                FROM pg_inherits
+                JOIN pg_class ON pg_class.oid = pg_inherits.inhrelid
+                WHERE pg_inherits.inhparent = %s::regclass
+                """,
+                [index],
+            )
+            return {index, *(name for (name,) in cursor.fetchall())}
+
+    def test_afval_profiel_queries_only_scan_the_covering_index(self):
+        klant = KlantFactory.create()
+        LedigingFactory.create_batch(5, klant=klant)
+        LedigingFactory.create_batch(5)
+        scans = tuple(
+            f"Index Only Scan using {name} "
+            for name in self._index_names("afval_lediging_profiel_idx")
+        )
+
+        # With the ledigingen, and the totals of a range of days (not whole months)
+        for met_ledigingen in (True, False):
+            with self.subTest(met_ledigingen=met_ledigingen):
+                builder = AfvalProfielBuilder(
+                    startdatum=date(2026, 1, 2),
+                    einddatum=date(2026, 1, 30),
+                    met_ledigingen=met_ledigingen,
+                )
+
+                with connection.cursor() as cursor:
+                    # The tables are too small for the planner to prefer an index otherwise
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                    cursor.execute("SET LOCAL enable_bitmapscan = off")
+                    plan = builder.rows([klant]).explain()
+
+                self.assertTrue(any(scan in plan for scan in scans), plan)
@@ -4,7 +4,11 @@ from django.views.generic import RedirectView
 from drf_spectacular.views import SpectacularJSONAPIView, SpectacularRedocView
 from rest_framework import routers
 
-from openafval.afval.api.views import AfvalProfielAPIView
+from openafval.afval.api.views import (
+    AfvalProfielAPIView,
+    AfvalProfielenAPIView,
+    AfvalProfielLedigingenAPIView,
+)
 
 app_name = "api"
 
@@ -33,6 +37,16 @@ urlpatterns = [
                     AfvalProfielAPIView.as_view(),
                     name="afval-profiel",
                 ),
+                re_path(
+                    "afval-profiel/(?P<bsn>[0-9]{8,9})/ledigingen/$",
+                    AfvalProfielLedigingenAPIView.as_view(),
+                    name="afval-profiel-ledigingen",
+                ),
+                path(
+                    "afval-profielen/",
+                    AfvalProfielenAPIView.as_view(),
+                    name="afval-profielen",
+                ),
                 path("", include(router.urls)),
             ]
         ),
@@ -160,6 +160,10 @@ LOGIN_URLS = [reverse_lazy("admin:login")]
 # Default (connection timeout, read timeout) for the requests library (in seconds)
 REQUESTS_DEFAULT_TIMEOUT = (10, 30)
 
+# Number of seconds an afval profiel stays cached. Imports invalidate all cached
+# profielen, so this only limits how long unused profielen take up cache memory.
+AFVAL_PROFIEL_CACHE_TIMEOUT = config("AFVAL_PROFIEL_CACHE_TIMEOUT", default=24 * 60 * 60)
+
 ##############################
 #                            #
 # 3RD PARTY LIBRARY SETTINGS #